@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+图着色核心 --- 不依赖 arcpy
+
+邻接关系以 CSR 数组保存（indptr / indices），不再使用 n * n 的邻接矩阵；
+先按 DSATUR（饱和度优先，度数大者优先）贪心着色，
+贪心失败的连通分量再按度数优先的顺序做有步数上限的回溯。
+相互独立的分组（例如按省份分组）可以交给进程池并行着色；
+导入了 arcpy 的脚本使用 colorGroupsIsolated，进程池在以本模块为入口的独立 python 进程中创建，子进程不会重新导入 arcpy。
+"""
+import heapq
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+
+import numpy as np
+
+# 全部分组的要素总数少于该值时在当前进程中着色，进程启动的开销大于着色本身
+PARALLEL_MIN_NODES = 50000
+
+
+class graphColoringError(Exception):
+    pass
+
+
+def buildAdjacency(neighbourDic):
+    """
+    usage: 将 id -> 相邻 id 的映射转换为 CSR 邻接数组，邻接关系自动对称，忽略自身和不存在的 id
+    :param neighbourDic: {id: [neighbourId, ....], ....}
+    :return: (ids, indptr, indices)
+     --- ids: [id, ....] 顶点序号与 id 的对应关系
+     --- indptr: numpy.ndarray --- 顶点 i 的相邻顶点为 indices[indptr[i]:indptr[i + 1]]
+     --- indices: numpy.ndarray
+    """
+    ids = list(neighbourDic)
+    idIndex = {each: i for i, each in enumerate(ids)}
+    vertexNum = len(ids)
+
+    src = []
+    dst = []
+    for i, each in enumerate(ids):
+        for eachNeighbour in neighbourDic[each]:
+            j = idIndex.get(eachNeighbour)
+            if j is not None and j != i:
+                src.append(i)
+                dst.append(j)
+
+    src = np.array(src, dtype=np.int64)
+    dst = np.array(dst, dtype=np.int64)
+    edges = np.unique(np.concatenate((src * vertexNum + dst, dst * vertexNum + src)))
+    src = edges // max(vertexNum, 1)
+    indices = edges % max(vertexNum, 1)
+
+    indptr = np.zeros(vertexNum + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=vertexNum), out=indptr[1:])
+    return ids, indptr, indices
+
+
+def connectedComponents(indptr, indices):
+    """
+    usage: 按广度优先遍历划分连通分量，分量内部按度数优先的广度优先顺序排列
+    :return: [[vertexIndex, ....], ....]
+    """
+    vertexNum = indptr.size - 1
+    degree = np.diff(indptr)
+    visited = np.zeros(vertexNum, dtype=bool)
+    indptrList = indptr.tolist()
+    indicesList = indices.tolist()
+    degreeList = degree.tolist()
+
+    components = []
+    # 从度数最大的顶点开始遍历
+    for start in np.argsort(-degree, kind="stable").tolist():
+        if visited[start]:
+            continue
+        visited[start] = True
+        order = [start]
+        k = 0
+        while k < len(order):
+            v = order[k]
+            k += 1
+            neighbours = [u for u in indicesList[indptrList[v]:indptrList[v + 1]] if not visited[u]]
+            neighbours.sort(key=lambda u: -degreeList[u])
+            for u in neighbours:
+                visited[u] = True
+                order.append(u)
+        components.append(order)
+    return components
+
+
+def dsaturColoring(indptr, indices, maxColor, vertices=None, colors=None):
+    """
+    usage: DSATUR 贪心着色，颜色从 1 开始编号
+    :param vertices: 需要着色的顶点，默认为全部顶点
+    :param colors: numpy.ndarray，着色结果写入其中，0 表示未着色
+    :return: Bool --- 是否在 maxColor 种颜色内完成着色（失败时已着色的顶点不回退）
+    """
+    vertexNum = indptr.size - 1
+    if colors is None:
+        colors = np.zeros(vertexNum, dtype=np.int64)
+    if vertices is None:
+        vertices = range(vertexNum)
+
+    indptrList = indptr.tolist()
+    indicesList = indices.tolist()
+    colorList = colors.tolist()
+    neighbourColors = {}
+
+    heap = []
+    for v in vertices:
+        neighbourColors[v] = set()
+        heapq.heappush(heap, (0, -(indptrList[v + 1] - indptrList[v]), v))
+
+    success = True
+    while heap:
+        negSat, negDegree, v = heapq.heappop(heap)
+        # 过期记录：已着色，或饱和度已经变化
+        if colorList[v] or -negSat != len(neighbourColors[v]):
+            continue
+
+        used = neighbourColors[v]
+        color = 1
+        while color in used:
+            color += 1
+        if color > maxColor:
+            success = False
+            break
+
+        colorList[v] = color
+        for u in indicesList[indptrList[v]:indptrList[v + 1]]:
+            if colorList[u] == 0 and u in neighbourColors and color not in neighbourColors[u]:
+                neighbourColors[u].add(color)
+                heapq.heappush(heap, (-len(neighbourColors[u]), -(indptrList[u + 1] - indptrList[u]), u))
+
+    colors[:] = colorList
+    return success
+
+
+def backtrackColoring(indptr, indices, maxColor, order, colors, maxSteps):
+    """
+    usage: 按给定顺序回溯着色，只修改 order 中顶点的颜色
+    :param order: [vertexIndex, ....] --- 着色顺序，相邻顶点尽量靠近可以减少回溯
+    :param colors: numpy.ndarray，着色结果写入其中
+    :param maxSteps: 回溯的最大步数，超过后抛出 graphColoringError
+    :return: colors
+    """
+    indptrList = indptr.tolist()
+    indicesList = indices.tolist()
+    colorList = colors.tolist()
+    for v in order:
+        colorList[v] = 0
+
+    i = 0
+    steps = 0
+    while 0 <= i < len(order):
+        steps += 1
+        if steps > maxSteps:
+            raise graphColoringError(f"Backtracking exceeds {maxSteps} steps, try more colors")
+
+        v = order[i]
+        used = {colorList[u] for u in indicesList[indptrList[v]:indptrList[v + 1]]}
+        color = colorList[v] + 1
+        while color in used:
+            color += 1
+
+        if color <= maxColor:
+            colorList[v] = color
+            i += 1
+        else:
+            colorList[v] = 0
+            i -= 1
+
+    if i < 0:
+        raise graphColoringError(f"The graph can not be colored with {maxColor} colors")
+
+    colors[:] = colorList
+    return colors
+
+
+def colorGraph(neighbourDic, maxColor=4, maxSteps=1000000):
+    """
+    usage: 图着色，相邻的 id 颜色不同
+    :param neighbourDic: {id: [neighbourId, ....], ....}
+    :param maxColor: 颜色数量
+    :param maxSteps: 每个连通分量回溯的最大步数
+    :return: {id: color, ....} --- 颜色从 1 开始编号
+    """
+    if maxColor < 1:
+        raise graphColoringError("maxColor must be greater than 0")
+
+    ids, indptr, indices = buildAdjacency(neighbourDic)
+    colors = np.zeros(len(ids), dtype=np.int64)
+
+    for component in connectedComponents(indptr, indices):
+        if not dsaturColoring(indptr, indices, maxColor, component, colors):
+            backtrackColoring(indptr, indices, maxColor, component, colors, maxSteps)
+
+    return dict(zip(ids, colors.tolist()))
+
+
+def _colorGroup(args):
+    """
+    usage: worker of process pool
+    """
+    groupKey, neighbourDic, maxColor, maxSteps = args
+    return groupKey, colorGraph(neighbourDic, maxColor, maxSteps)
+
+
+def _useProcessPool(groupDic, processNum, minParallelNodes):
+    processNum = min(processNum or multiprocessing.cpu_count(), len(groupDic))
+    nodeNum = sum(len(each) for each in groupDic.values())
+    return processNum if processNum > 1 and nodeNum >= minParallelNodes else 1
+
+
+def colorGroups(groupDic, maxColor=4, maxSteps=1000000, processNum=None, minParallelNodes=PARALLEL_MIN_NODES):
+    """
+    usage: 多个相互独立的分组分别着色，分组之间使用进程池并行
+     --- 进程池的子进程会重新导入主模块，主模块导入了 arcpy 时请使用 colorGroupsIsolated
+    :param groupDic: {groupKey: {id: [neighbourId, ....], ....}, ....}
+    :param maxColor: 颜色数量
+    :param maxSteps: 每个连通分量回溯的最大步数
+    :param processNum: 进程数量，默认为 cpu 数量；为 1 时不创建进程池
+    :param minParallelNodes: 要素总数少于该值时不创建进程池
+    :return: {groupKey: {id: color, ....}, ....}
+    """
+    jobs = [(groupKey, neighbourDic, maxColor, maxSteps) for groupKey, neighbourDic in groupDic.items()]
+    processNum = _useProcessPool(groupDic, processNum, minParallelNodes)
+
+    if processNum <= 1:
+        return dict(_colorGroup(each) for each in jobs)
+
+    # 大的分组先提交，减少最后只剩一个进程在运行的时间
+    jobs.sort(key=lambda each: -len(each[1]))
+    with multiprocessing.Pool(processNum) as pool:
+        return dict(pool.imap_unordered(_colorGroup, jobs))
+
+
+def colorGroupsIsolated(groupDic, maxColor=4, maxSteps=1000000, processNum=None, executable=None,
+                        minParallelNodes=PARALLEL_MIN_NODES):
+    """
+    usage: 同 colorGroups，需要并行时在一个以本模块为入口的独立 python 进程中创建进程池，
+           进程池的子进程只重新导入本模块，不会重新导入调用者（例如导入了 arcpy 的 ArcGIS 工具脚本）
+    :param executable: str, python 解释器，默认为 sys.executable（ArcGIS 中需要指定 python.exe）
+    :return: {groupKey: {id: color, ....}, ....}
+    """
+    processNum = _useProcessPool(groupDic, processNum, minParallelNodes)
+    if processNum <= 1:
+        return colorGroups(groupDic, maxColor, maxSteps, processNum=1)
+
+    res = subprocess.run([executable or sys.executable, os.path.abspath(__file__)],
+                         input=pickle.dumps((groupDic, maxColor, maxSteps, processNum)), capture_output=True)
+    if res.returncode != 0:
+        raise graphColoringError(f"Coloring process failed --- {res.stderr.decode(errors='replace')[-2000:]}")
+    status, value = pickle.loads(res.stdout)
+    if status == "error":
+        raise graphColoringError(value)
+    return value
+
+
+if __name__ == "__main__":
+    # colorGroupsIsolated 的入口：从 stdin 读取参数，结果写入 stdout，其余输出改到 stderr
+    out = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    groupDic, maxColor, maxSteps, processNum = pickle.loads(sys.stdin.buffer.read())
+    try:
+        result = ("ok", colorGroups(groupDic, maxColor, maxSteps, processNum, minParallelNodes=0))
+    except graphColoringError as e:
+        result = ("error", str(e))
+    out.write(pickle.dumps(result))
+    out.flush()
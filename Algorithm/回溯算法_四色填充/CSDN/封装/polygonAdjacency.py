@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+面要素相邻关系 --- 不生成临时要素类，直接输出 graphColoring 使用的 id -> 相邻 id 映射
+shapefile 使用 pyshp 读取，不依赖 arcpy；其他数据（gdb 要素类、图层等）通过 arcpy.da.SearchCursor 读取
+
+两种方式：
+    sweep --- 外包矩形扫描线筛选候选对，再做精确的边相交检测，边界相交、共线重叠、T 形相接、角点相接均视为相邻，
+              与 SpatialJoin INTERSECT 的结果一致（默认）
+    edge  --- 量化节点坐标后对边做哈希，存在相同边的两个面相邻，速度快，但只适用于公共边两侧节点完全一致的数据，
+              一侧多出节点（T 形相接）时会漏掉相邻关系
+"""
+import numpy as np
+
+try:
+    import shapefile
+    SHP_LIB = True
+except:
+    SHP_LIB = False
+
+
+# shapefile 的 OID 字段不在 dbf 中，值即为要素序号
+OID_FIELDS = ("FID", "OID", "OBJECTID")
+
+
+class polygonAdjacencyError(Exception):
+    pass
+
+
+def readPolygonRings(shpPath, uniqueField=None):
+    """
+    usage: 使用 pyshp 读取面要素的全部环
+    :param shpPath: shapefile path
+    :param uniqueField: 唯一值字段，为空或为 OID 字段（FID）时使用要素序号
+    :return: (ids, featureRings)
+     --- ids: [str(id), ....]
+     --- featureRings: [[numpy.ndarray (n, 2), ....], ....]
+    """
+    if not SHP_LIB:
+        raise polygonAdjacencyError("Module 'shapefile' (pyshp) is needed to read polygons")
+
+    ids = []
+    featureRings = []
+    with shapefile.Reader(shpPath) as reader:
+        fieldNames = [each[0] for each in reader.fields[1:]]
+        if uniqueField and uniqueField not in fieldNames:
+            if uniqueField.upper() not in OID_FIELDS:
+                raise polygonAdjacencyError(f"Field '{uniqueField}' is not exists in {shpPath}")
+            uniqueField = None
+
+        for i, shapeRec in enumerate(reader.iterShapeRecords()):
+            ids.append(str(shapeRec.record[uniqueField]) if uniqueField else str(i))
+
+            shape = shapeRec.shape
+            points = np.array(shape.points, dtype=np.float64).reshape(-1, 2)
+            bounds = list(shape.parts) + [points.shape[0]]
+            featureRings.append([points[bounds[k]:bounds[k + 1]] for k in range(len(bounds) - 1)
+                                 if bounds[k + 1] - bounds[k] > 1])
+
+    return ids, featureRings
+
+
+def readFeatureRings(inputFC, uniqueField=None):
+    """
+    usage: 使用 arcpy.da.SearchCursor 读取面要素的全部环，适用于 gdb 要素类、图层等非 shapefile 数据
+    :param inputFC: feature class / layer
+    :param uniqueField: 唯一值字段，为空时使用要素序号
+    :return: (ids, featureRings)，同 readPolygonRings
+    """
+    import arcpy
+
+    ids = []
+    featureRings = []
+    fields = ["SHAPE@"] + ([uniqueField] if uniqueField else [])
+    with arcpy.da.SearchCursor(inputFC, fields) as cur:
+        for i, row in enumerate(cur):
+            ids.append(str(row[1]) if uniqueField else str(i))
+
+            rings = []
+            for part in (row[0] or []):
+                ring = []
+                # 同一部分中的内环以 None 分隔
+                for pnt in list(part) + [None]:
+                    if pnt is not None:
+                        ring.append((pnt.X, pnt.Y))
+                        continue
+                    if len(ring) > 1:
+                        rings.append(np.array(ring, dtype=np.float64))
+                    ring = []
+            featureRings.append(rings)
+
+    return ids, featureRings
+
+
+def _featureEdges(featureRings):
+    """
+    usage: 展开全部要素的边
+    :return: (edgeStart, edgeEnd, edgeFeature)
+    """
+    starts = []
+    ends = []
+    owners = []
+    for featureIndex, rings in enumerate(featureRings):
+        for ring in rings:
+            ring = np.asarray(ring, dtype=np.float64)[:, :2]
+            # 未闭合的环补上闭合边
+            if not np.array_equal(ring[0], ring[-1]):
+                ring = np.vstack((ring, ring[:1]))
+            starts.append(ring[:-1])
+            ends.append(ring[1:])
+            owners.append(np.full(ring.shape[0] - 1, featureIndex, dtype=np.int64))
+
+    if not starts:
+        return np.empty((0, 2)), np.empty((0, 2)), np.empty(0, dtype=np.int64)
+    return np.concatenate(starts), np.concatenate(ends), np.concatenate(owners)
+
+
+def _groupPairs(keys, owners):
+    """
+    usage: 键相同且所属要素不同的记录两两组成相邻对
+    :return: numpy.ndarray --- shape (K, 2)，每对 i < j，不重复
+    """
+    if keys.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    records = np.unique(np.stack((keys, owners), axis=1), axis=0)
+    keys, owners = records[:, 0], records[:, 1]
+    same = keys[1:] == keys[:-1]
+
+    # 绝大多数键只属于两个要素，直接取相邻记录
+    pairs = [np.stack((owners[:-1][same], owners[1:][same]), axis=1)]
+
+    # 属于三个及以上要素的键（重叠的面）补全其余组合
+    starts = np.nonzero(np.diff(np.concatenate(([False], same, [False])).astype(np.int8)) == 1)[0]
+    ends = np.nonzero(np.diff(np.concatenate(([False], same, [False])).astype(np.int8)) == -1)[0]
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if end - start < 2:
+            continue
+        group = owners[start:end + 1].tolist()
+        pairs.append(np.array([(a, b) for k, a in enumerate(group) for b in group[k + 2:]],
+                              dtype=np.int64).reshape(-1, 2))
+
+    pairs = np.concatenate(pairs)
+    pairs = np.sort(pairs, axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def edgeAdjacency(featureRings, quantum=1e-6, vertexTouch=False):
+    """
+    usage: 公共边哈希 --- 量化后起终点相同（不分方向）的边视为同一条边
+    :param featureRings: [[ring, ....], ....]
+    :param quantum: 量化步长
+    :param vertexTouch: 只有公共节点（例如角点相接）的面是否也视为相邻
+    :return: numpy.ndarray --- shape (K, 2)，相邻要素序号对
+    """
+    edgeStart, edgeEnd, edgeOwner = _featureEdges(featureRings)
+    if edgeOwner.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    quantized = np.round(np.vstack((edgeStart, edgeEnd)) / quantum).astype(np.int64)
+    _, vertexId = np.unique(quantized, axis=0, return_inverse=True)
+    vertexId = vertexId.reshape(-1)
+    vertexNum = int(vertexId.max()) + 1
+    startId = vertexId[:edgeOwner.size]
+    endId = vertexId[edgeOwner.size:]
+
+    if vertexTouch:
+        return _groupPairs(np.concatenate((startId, endId)), np.concatenate((edgeOwner, edgeOwner)))
+
+    valid = startId != endId
+    edgeKey = np.minimum(startId, endId) * vertexNum + np.maximum(startId, endId)
+    return _groupPairs(edgeKey[valid], edgeOwner[valid])
+
+
+def _pntSegDistance(pnts, segStart, segEnd):
+    # 支持广播的点到线段距离
+    seg = segEnd - segStart
+    diff = pnts - segStart
+    segLen2 = np.sum(seg * seg, axis=-1)
+    t = np.sum(diff * seg, axis=-1) / np.where(segLen2 > 0, segLen2, 1.0)
+    t = np.clip(t, 0.0, 1.0)
+    foot = diff - t[..., None] * seg
+    return np.sqrt(np.sum(foot * foot, axis=-1))
+
+
+def _cross(o, a, b):
+    return (a[..., 0] - o[..., 0]) * (b[..., 1] - o[..., 1]) - (a[..., 1] - o[..., 1]) * (b[..., 0] - o[..., 0])
+
+
+def _edgesTouch(startA, endA, startB, endB, tolerance, chunkSize=1024):
+    """
+    usage: 两组边之间是否存在相交或距离不大于容差的边
+    """
+    for k in range(0, startA.shape[0], chunkSize):
+        a0 = startA[k:k + chunkSize, None, :]
+        a1 = endA[k:k + chunkSize, None, :]
+        b0 = startB[None, :, :]
+        b1 = endB[None, :, :]
+
+        d1 = _cross(a0, a1, b0)
+        d2 = _cross(a0, a1, b1)
+        d3 = _cross(b0, b1, a0)
+        d4 = _cross(b0, b1, a1)
+        if np.any((d1 * d2 < 0) & (d3 * d4 < 0)):
+            return True
+
+        # 端点落在另一条边的容差范围内（包括共线重叠、端点相接）
+        dis = np.minimum(np.minimum(_pntSegDistance(a0, b0, b1), _pntSegDistance(a1, b0, b1)),
+                         np.minimum(_pntSegDistance(b0, a0, a1), _pntSegDistance(b1, a0, a1)))
+        if np.any(dis <= tolerance):
+            return True
+    return False
+
+
+def _pointInEdges(pnt, edgeStart, edgeEnd):
+    """
+    usage: 射线法判断点是否位于一组闭合环（一个面的全部边）内部，内环（洞）中的点在外部
+    """
+    cross = (edgeStart[:, 1] > pnt[1]) != (edgeEnd[:, 1] > pnt[1])
+    if not cross.any():
+        return False
+    s0, s1 = edgeStart[cross], edgeEnd[cross]
+    x = s0[:, 0] + (pnt[1] - s0[:, 1]) * (s1[:, 0] - s0[:, 0]) / (s1[:, 1] - s0[:, 1])
+    return bool(np.count_nonzero(x > pnt[0]) % 2)
+
+
+def sweepAdjacency(featureRings, tolerance=1e-6):
+    """
+    usage: 外包矩形扫描线 + 精确边相交检测，边界相交或距离不大于容差、或一个面位于另一个面内部时视为相邻
+    :param featureRings: [[ring, ....], ....]
+    :param tolerance: 容差
+    :return: numpy.ndarray --- shape (K, 2)，相邻要素序号对
+    """
+    edgeStart, edgeEnd, edgeOwner = _featureEdges(featureRings)
+    featureNum = len(featureRings)
+    if edgeOwner.size == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    order = np.argsort(edgeOwner, kind="stable")
+    edgeStart, edgeEnd, edgeOwner = edgeStart[order], edgeEnd[order], edgeOwner[order]
+    bounds = np.searchsorted(edgeOwner, np.arange(featureNum + 1))
+
+    edgeXMin = np.minimum(edgeStart[:, 0], edgeEnd[:, 0])
+    edgeYMin = np.minimum(edgeStart[:, 1], edgeEnd[:, 1])
+    edgeXMax = np.maximum(edgeStart[:, 0], edgeEnd[:, 0])
+    edgeYMax = np.maximum(edgeStart[:, 1], edgeEnd[:, 1])
+
+    hasEdge = bounds[1:] > bounds[:-1]
+    extent = np.full((featureNum, 4), np.nan)
+    for i in np.nonzero(hasEdge)[0].tolist():
+        k0, k1 = bounds[i], bounds[i + 1]
+        extent[i] = (edgeXMin[k0:k1].min() - tolerance, edgeYMin[k0:k1].min() - tolerance,
+                     edgeXMax[k0:k1].max() + tolerance, edgeYMax[k0:k1].max() + tolerance)
+
+    # 按 xmin 排序扫描，活动列表中只保留 xmax 尚未越过扫描线的要素
+    pairs = []
+    active = []
+    for i in np.argsort(extent[:, 0], kind="stable").tolist():
+        if not hasEdge[i]:
+            continue
+        xmin, ymin, xmax, ymax = extent[i]
+        active = [j for j in active if extent[j, 2] >= xmin]
+        for j in active:
+            if extent[j, 1] > ymax or extent[j, 3] < ymin:
+                continue
+
+            # 只检测落在对方外包矩形内的边
+            ka = np.arange(bounds[i], bounds[i + 1])
+            kb = np.arange(bounds[j], bounds[j + 1])
+            ka = ka[(edgeXMax[ka] >= extent[j, 0]) & (edgeXMin[ka] <= extent[j, 2])
+                    & (edgeYMax[ka] >= extent[j, 1]) & (edgeYMin[ka] <= extent[j, 3])]
+            kb = kb[(edgeXMax[kb] >= xmin) & (edgeXMin[kb] <= xmax)
+                    & (edgeYMax[kb] >= ymin) & (edgeYMin[kb] <= ymax)]
+            if ka.size and kb.size and _edgesTouch(edgeStart[ka], edgeEnd[ka], edgeStart[kb], edgeEnd[kb], tolerance):
+                pairs.append((min(i, j), max(i, j)))
+            # 边界不相交时，一个面完全位于另一个面内部同样视为相交
+            elif (_pointInEdges(edgeStart[bounds[i]], edgeStart[bounds[j]:bounds[j + 1]], edgeEnd[bounds[j]:bounds[j + 1]])
+                  or _pointInEdges(edgeStart[bounds[j]], edgeStart[bounds[i]:bounds[i + 1]],
+                                   edgeEnd[bounds[i]:bounds[i + 1]])):
+                pairs.append((min(i, j), max(i, j)))
+        active.append(i)
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.array(pairs, dtype=np.int64), axis=0)
+
+
+def pairsToNeighbourDic(ids, pairs):
+    """
+    usage: 相邻要素序号对转换为 id -> 相邻 id 映射，没有相邻要素的 id 也会保留
+    :return: {id: [neighbourId, ....], ....}
+    """
+    neighbourDic = {each: [] for each in ids}
+    for i, j in pairs.tolist():
+        neighbourDic[ids[i]].append(ids[j])
+        neighbourDic[ids[j]].append(ids[i])
+    return neighbourDic
+
+
+def shapefileNeighbours(shpPath, uniqueField=None, method="sweep", tolerance=1e-6):
+    """
+    usage: 读取面 shapefile 并生成相邻关系，可直接交给 graphColoring.colorGraph 着色
+    :param shpPath: shapefile path
+    :param uniqueField: 唯一值字段，为空时使用要素序号
+    :param method: "sweep"（默认，结果与 SpatialJoin INTERSECT 一致） / "edge"
+    :param tolerance: edge 方式为量化步长，sweep 方式为相交容差
+    :return: {str(id): [str(neighbourId), ....], ....}
+    """
+    ids, featureRings = readPolygonRings(shpPath, uniqueField)
+    return ringsToNeighbourDic(ids, featureRings, method, tolerance)
+
+
+def featureNeighbours(inputFC, uniqueField=None, method="sweep", tolerance=1e-6):
+    """
+    usage: 生成任意面要素的相邻关系 --- shapefile 使用 pyshp 直接读取，其他数据使用 arcpy.da.SearchCursor 读取
+    :param inputFC: feature class / layer
+    :param uniqueField: 唯一值字段，为空时使用要素序号
+    :param method: "sweep"（默认，结果与 SpatialJoin INTERSECT 一致） / "edge"
+    :param tolerance: edge 方式为量化步长，sweep 方式为相交容差
+    :return: {str(id): [str(neighbourId), ....], ....}
+    """
+    import arcpy
+
+    catalogPath = arcpy.Describe(inputFC).catalogPath
+    if SHP_LIB and catalogPath.lower().endswith(".shp"):
+        return shapefileNeighbours(catalogPath, uniqueField, method, tolerance)
+
+    ids, featureRings = readFeatureRings(inputFC, uniqueField)
+    return ringsToNeighbourDic(ids, featureRings, method, tolerance)
+
+
+def ringsToNeighbourDic(ids, featureRings, method="sweep", tolerance=1e-6):
+    """
+    usage: 按指定方式计算相邻要素对，并转换为 id -> 相邻 id 映射
+    """
+    if method == "edge":
+        pairs = edgeAdjacency(featureRings, tolerance)
+    elif method == "sweep":
+        pairs = sweepAdjacency(featureRings, tolerance)
+    else:
+        raise polygonAdjacencyError(f"Unknown adjacency method --- {method}")
+    return pairsToNeighbourDic(ids, pairs)
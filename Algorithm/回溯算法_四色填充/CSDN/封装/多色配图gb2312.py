@@ -1,6 +1,13 @@
 import arcpy
-from numpy import *
 import datetime
+import os
+import sys
+
+from graphColoring import colorGroupsIsolated
+from polygonAdjacency import featureNeighbours
+
+# inside ArcGIS, sys.executable is not python, the coloring process needs the real interpreter
+PYTHON_EXE = os.path.join(sys.exec_prefix, "python.exe") if os.name == "nt" else sys.executable
 
 
 def addColorField(InputFeature, colorField):
@@ -21,74 +28,43 @@ def generateColorValue(InputFeature, level, UniqueField, ConnectField, splitDim,
     C = []
     S = []
     N = 0
+    groupIndex = {}
+    # without ConnectField, the neighbours are built from the polygon edges
+    nearDic = None
+    if not ConnectField:
+        nearDic = featureNeighbours(InputFeature, UniqueField)
+
     rows = arcpy.UpdateCursor(InputFeature)
-    if (level):
-        for row in rows:
-            N = N + 1
-            U.append(str(row.getValue(UniqueField)))
-            C.append(str(row.getValue(ConnectField)))
-            S.append(row.getValue(level))
-    else:
-        for row in rows:
-            N = N + 1
-            U.append(str(row.getValue(UniqueField)))
-            C.append(str(row.getValue(ConnectField)))
-            S.append('total')
-
-    sheng = list(set(S))
-    for each_sheng in sheng:
-        u = []
-        c = []
-        for i in range(0, N):
-            if (S[i] == each_sheng):
-                u.append(U[i])
-                c.append(C[i])
-        n = len(u)
-        mat = zeros([n, n], int)
-        for i in range(0, n):
-            tem = c[i].split(splitDim)
-            for j in tem:
-                if (j in u):
-                    ind = u.index(j)
-                    if (ind != i):
-                        mat[i][ind] = 1
-        colorIndex = ones(n, int)
-        I = 1
-        colorI = 1
-        while (I < n and I >= 0):
-            arcpy.AddMessage(str(I))
-            while (colorI <= maxColor and I < n):
-                for k in range(0, I):
-                    if (mat[k][I] and colorIndex[k] == colorI):
-                        k = k - 1
-                        break
-                if ((k + 1) == I):
-                    colorIndex[I] = colorI
-                    colorI = 1
-                    I = I + 1
-                else:
-                    colorI = colorI + 1
-            if (colorI > maxColor):
-                I = I - 1
-                colorI = colorIndex[I] + 1
-
-        i = 0
-        j = 0
-        # rows = arcpy.UpdateCursor(InputFeature)
-        # for row in rows:
-        #     if (S[j] == each_sheng):
-        #         row.color = int(colorIndex[i])
-        #         rows.updateRow(row)
-        #         i = i + 1
-        #     j = j + 1
-        # rows = arcpy.UpdateCursor(InputFeature)
-        with arcpy.da.UpdateCursor(InputFeature, [colorField]) as cur:
-            for row in cur:
-                if (S[j] == each_sheng):
-                    row[0] = int(colorIndex[i])
-                    cur.updateRow(row)
-                    i = i + 1
-                j = j + 1
+    for row in rows:
+        N = N + 1
+        U.append(str(row.getValue(UniqueField)))
+        if nearDic is None:
+            C.append(str(row.getValue(ConnectField)).split(splitDim))
+        else:
+            C.append(nearDic[U[-1]])
+        S.append(row.getValue(level) if level else 'total')
+        groupIndex.setdefault(S[-1], []).append(N - 1)
+
+    # groups are independent, each group is colored in a worker process
+    groupDic = {}
+    for each_sheng, index in groupIndex.items():
+        uSet = set(U[i] for i in index)
+
+        # keep the neighbours inside the same group only
+        neighbourDic = {}
+        for i in index:
+            neighbourDic[U[i]] = [j for j in C[i] if j in uSet]
+        groupDic[each_sheng] = neighbourDic
+
+    groupColors = colorGroupsIsolated(groupDic, maxColor, executable=PYTHON_EXE)
+    arcpy.AddMessage(f"{len(groupDic)} groups colored, feature count: {N}")
+
+    rowColors = [groupColors[S[i]][U[i]] for i in range(0, N)]
+
+    with arcpy.da.UpdateCursor(InputFeature, [colorField]) as cur:
+        for j, row in enumerate(cur):
+            row[0] = int(rowColors[j])
+            cur.updateRow(row)
 
 
 def main(InputFeature, colorField, level, UniqueField, ConnectField, splitDim, maxColor):
@@ -99,21 +75,21 @@ def main(InputFeature, colorField, level, UniqueField, ConnectField, splitDim, m
     generateColorValue(InputFeature, level, UniqueField, ConnectField, splitDim, maxColor, colorField)
 
 
-InputFeature = arcpy.GetParameterAsText(0)
-colorField = arcpy.GetParameterAsText(1)
-UniqueField = arcpy.GetParameterAsText(2)
-ConnectField = arcpy.GetParameterAsText(3)
-level = arcpy.GetParameterAsText(4)
-splitDim = arcpy.GetParameterAsText(5)
-maxColor = arcpy.GetParameterAsText(6)
+if __name__ == "__main__":
+    InputFeature = arcpy.GetParameterAsText(0)
+    colorField = arcpy.GetParameterAsText(1)
+    UniqueField = arcpy.GetParameterAsText(2)
+    ConnectField = arcpy.GetParameterAsText(3)
+    level = arcpy.GetParameterAsText(4)
+    splitDim = arcpy.GetParameterAsText(5)
+    maxColor = arcpy.GetParameterAsText(6)
 
-maxColor = int(maxColor)
+    maxColor = int(maxColor)
 
-if __name__ == "__main__":
     runData = datetime.datetime.now()
     limit = datetime.datetime.strptime("2021-03-01 00:00:00", "%Y-%m-%d %H:%M:%S")
 
     if limit > runData:
         main(InputFeature, colorField, level, UniqueField, ConnectField, splitDim, maxColor)
     else:
-        arcpy.AddError("failed")
\ No newline at end of file
+        arcpy.AddError("failed")
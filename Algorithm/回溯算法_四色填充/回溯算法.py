@@ -1,6 +1,10 @@
 import numpy
 import arcpy
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "CSDN", "封装"))
+from polygonAdjacency import featureNeighbours
 
 arcpy.env.overwriteOutput = True
 
@@ -35,34 +39,26 @@ def addColorField(inputFC):
 
 
 def getNearFeature(inputFC, unicField, nearField, outputPath, outputName):
-    # add unic field
-    try:
-        arcpy.AddField_management(inputFC, nearField, "TEXT")
-    except:
-        arcpy.DeleteField_management(inputFC, nearField)
-        arcpy.AddField_management(inputFC, nearField, "TEXT")
+    # get all near data to each feature from the polygon edges, no temp data and SpatialJoin needed
+    nearDic = featureNeighbours(inputFC, unicField)
+    nearText = {key: ",".join(value) for key, value in nearDic.items()}
 
-    # copy a temp data
-    tempData = arcpy.CopyFeatures_management(inputFC, os.path.join(outputPath, "temp"))
+    outputFC = arcpy.CopyFeatures_management(inputFC, os.path.join(outputPath, outputName))[0]
 
-    # generate a field mapping
-    mps = arcpy.FieldMappings()
-
-    mp1 = arcpy.FieldMap()
-    mp1.addInputField(inputFC, unicField)
-    mp1.addInputField(tempData, unicField)
-    mp1.mergeRule = "Join"
-    mp1.joinDelimiter = ","
-    mp1.outputField = arcpy.ListFields(inputFC, nearField)[0]
-
-    mps.addFieldMap(mp1)
+    # add near field, long enough for the longest neighbour list
+    fieldLength = max([len(each) for each in nearText.values()] + [255])
+    try:
+        arcpy.AddField_management(outputFC, nearField, "TEXT", field_length=fieldLength)
+    except:
+        arcpy.DeleteField_management(outputFC, nearField)
+        arcpy.AddField_management(outputFC, nearField, "TEXT", field_length=fieldLength)
 
-    print(mps.exportToString())
-    # get all near data to each feature
-    arcpy.SpatialJoin_analysis(inputFC, tempData, os.path.join(outputPath, outputName),
-                               "JOIN_ONE_TO_ONE", field_mapping=mps, match_option="INTERSECT")
+    with arcpy.da.UpdateCursor(outputFC, [unicField, nearField]) as cur:
+        for row in cur:
+            row[1] = nearText[str(row[0])]
+            cur.updateRow(row)
 
-    return os.path.join(outputPath, outputName)
+    return outputFC
 
 
 def main(inputFC, unicField, nearField, outputPath, outputName):
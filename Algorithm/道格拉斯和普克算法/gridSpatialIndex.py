@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+"""
+均匀格网空间索引 --- 一次注册全部线段，批量回答 "哪些线段在点的容差范围内"
+
+线段按外包矩形覆盖的全部格网登记（跨格网的线段会登记在多个格网中），
+格网编号为整数 ix * rowNum + iy，登记结果按编号排序后以 CSR 形式保存：
+    cellKeys    --- 有线段的格网编号（升序）
+    cellOffsets --- 每个格网的线段在 cellSegs 中的起止位置
+    cellSegs    --- 线段序号
+"""
+import math
+
+import numpy as np
+
+
+class gridSpatialIndexError(Exception):
+    pass
+
+
+def pntSegDistance2D(pnts, segStart, segEnd):
+    """
+    usage: 逐对计算点到线段的平面距离
+    :param pnts: numpy.ndarray --- shape (M, 2)
+    :param segStart: numpy.ndarray --- shape (M, 2)
+    :param segEnd: numpy.ndarray --- shape (M, 2)
+    :return: numpy.ndarray --- shape (M,)
+    """
+    seg = segEnd - segStart
+    diff = pnts - segStart
+    segLen2 = np.einsum("ij,ij->i", seg, seg)
+    t = np.divide(np.einsum("ij,ij->i", diff, seg), segLen2,
+                  out=np.zeros_like(segLen2), where=segLen2 > 0)
+    t = np.clip(t, 0.0, 1.0)
+    foot = diff - t[:, None] * seg
+    return np.sqrt(np.einsum("ij,ij->i", foot, foot))
+
+
+class gridSpatialIndex:
+    """
+    usage: generate a uniform grid index of segments
+     --- index = gridSpatialIndex(segments)
+         pntIndex, segIndex = index.queryPairs(pnts, tolerance)
+    :param segments: (M, 4) --- (x1, y1, x2, y2), z 值可以带上但不参与计算 (M, 6) --- (x1, y1, z1, x2, y2, z2)
+    :param cellSize: 格网边长，None 时根据范围和线段数量自动计算
+    """
+
+    def __init__(self, segments, cellSize=None):
+        segs = np.asarray(segments, dtype=np.float64)
+        if segs.ndim != 2 or segs.shape[1] not in (4, 6):
+            raise gridSpatialIndexError("Segments must be shaped as (M, 4) or (M, 6)")
+        if segs.shape[1] == 6:
+            segs = segs[:, [0, 1, 3, 4]]
+
+        self.segStart = np.ascontiguousarray(segs[:, :2])
+        self.segEnd = np.ascontiguousarray(segs[:, 2:])
+        self.segNum = segs.shape[0]
+
+        if self.segNum == 0:
+            self.extent = (0.0, 0.0, 0.0, 0.0)
+        else:
+            self.extent = (float(min(segs[:, 0].min(), segs[:, 2].min())),
+                           float(min(segs[:, 1].min(), segs[:, 3].min())),
+                           float(max(segs[:, 0].max(), segs[:, 2].max())),
+                           float(max(segs[:, 1].max(), segs[:, 3].max())))
+
+        self.cellSize = float(cellSize) if cellSize else self._autoCellSize()
+        if self.cellSize <= 0:
+            raise gridSpatialIndexError("cellSize must be greater than 0")
+
+        self.colNum = int(math.floor((self.extent[2] - self.extent[0]) / self.cellSize)) + 1
+        self.rowNum = int(math.floor((self.extent[3] - self.extent[1]) / self.cellSize)) + 1
+
+        self._build()
+
+    @classmethod
+    def fromLineEquations(cls, lines, cellSize=None):
+        """
+        usage: build index from lineEquation objects of 道格拉斯和普克算法_WithoutArcpy
+        """
+        segs = [(each.x1, each.y1, each.x2, each.y2) for each in lines]
+        return cls(np.array(segs, dtype=np.float64).reshape(len(segs), 4), cellSize)
+
+    def _autoCellSize(self):
+        # 格网边长取 "平均每个格网一条线段" 与 "线段外包矩形边长中位数" 中的较大值，
+        # 使大多数线段只登记在 1 ~ 4 个格网中
+        if self.segNum == 0:
+            return 1.0
+        width = self.extent[2] - self.extent[0]
+        height = self.extent[3] - self.extent[1]
+        bySegNum = math.sqrt(max(width * height, 0.0) / self.segNum)
+
+        segSize = np.maximum(np.abs(self.segEnd[:, 0] - self.segStart[:, 0]),
+                             np.abs(self.segEnd[:, 1] - self.segStart[:, 1]))
+        bySegSize = float(np.median(segSize))
+
+        cellSize = max(bySegNum, bySegSize)
+        if cellSize == 0:
+            cellSize = max(width, height, 1.0)
+        return cellSize
+
+    def _cellXY(self, x, y):
+        ix = np.floor((x - self.extent[0]) / self.cellSize).astype(np.int64)
+        iy = np.floor((y - self.extent[1]) / self.cellSize).astype(np.int64)
+        return ix, iy
+
+    def _build(self):
+        xmin = np.minimum(self.segStart[:, 0], self.segEnd[:, 0])
+        xmax = np.maximum(self.segStart[:, 0], self.segEnd[:, 0])
+        ymin = np.minimum(self.segStart[:, 1], self.segEnd[:, 1])
+        ymax = np.maximum(self.segStart[:, 1], self.segEnd[:, 1])
+
+        ix0, iy0 = self._cellXY(xmin, ymin)
+        ix1, iy1 = self._cellXY(xmax, ymax)
+        ix1 = np.minimum(ix1, self.colNum - 1)
+        iy1 = np.minimum(iy1, self.rowNum - 1)
+
+        # 每条线段覆盖的格网数量，按数量展开为 (线段, 格网) 对
+        width = ix1 - ix0 + 1
+        cellCount = width * (iy1 - iy0 + 1)
+        segIndex = np.repeat(np.arange(self.segNum, dtype=np.int64), cellCount)
+        firstPos = np.repeat(np.cumsum(cellCount) - cellCount, cellCount)
+        local = np.arange(segIndex.size, dtype=np.int64) - firstPos
+
+        ix = ix0[segIndex] + local % width[segIndex]
+        iy = iy0[segIndex] + local // width[segIndex]
+        keys = ix * self.rowNum + iy
+
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        self.cellSegs = segIndex[order]
+        self.cellKeys, firstIndex = np.unique(keys, return_index=True)
+        self.cellOffsets = np.append(firstIndex, keys.size).astype(np.int64)
+
+    def _candidatePairs(self, pnts, tolerance):
+        ix, iy = self._cellXY(pnts[:, 0], pnts[:, 1])
+        reach = int(math.ceil(tolerance / self.cellSize))
+        pntIndex = np.arange(pnts.shape[0], dtype=np.int64)
+
+        pairPnt = []
+        pairSeg = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                cx = ix + dx
+                cy = iy + dy
+                inside = (cx >= 0) & (cx < self.colNum) & (cy >= 0) & (cy < self.rowNum)
+                keys = cx[inside] * self.rowNum + cy[inside]
+                pos = np.searchsorted(self.cellKeys, keys)
+                pos = np.minimum(pos, self.cellKeys.size - 1)
+                found = self.cellKeys[pos] == keys
+
+                pos = pos[found]
+                counts = self.cellOffsets[pos + 1] - self.cellOffsets[pos]
+                pairPnt.append(np.repeat(pntIndex[inside][found], counts))
+                firstPos = np.repeat(self.cellOffsets[pos], counts)
+                local = np.arange(counts.sum(), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+                pairSeg.append(self.cellSegs[firstPos + local])
+
+        return np.concatenate(pairPnt), np.concatenate(pairSeg)
+
+    def queryPairs(self, pnts, tolerance):
+        """
+        usage: 批量查询与点的平面距离不大于容差的线段
+        :param pnts: (N, 2) / (N, 3) 点坐标
+        :param tolerance: Double --- 容差
+        :return: (pntIndex, segIndex) --- 两个等长数组，按点序号、线段序号排序，不重复
+        """
+        pnts = np.asarray(pnts, dtype=np.float64)
+        if pnts.ndim != 2 or pnts.shape[1] < 2:
+            raise gridSpatialIndexError("Points must be shaped as (N, 2) or (N, 3)")
+        pnts = pnts[:, :2]
+
+        empty = np.empty(0, dtype=np.int64)
+        if self.segNum == 0 or pnts.shape[0] == 0:
+            return empty, empty
+
+        pairPnt, pairSeg = self._candidatePairs(pnts, tolerance)
+
+        # 跨多个格网的线段可能被重复找到
+        pairKey = np.unique(pairPnt * self.segNum + pairSeg)
+        pairPnt = pairKey // self.segNum
+        pairSeg = pairKey % self.segNum
+
+        dis = pntSegDistance2D(pnts[pairPnt], self.segStart[pairSeg], self.segEnd[pairSeg])
+        touch = dis <= tolerance
+        return pairPnt[touch], pairSeg[touch]
+
+    def query(self, pnts, tolerance):
+        """
+        usage: 批量查询，每个点返回一个线段序号列表
+        :return: [[segIndex, ....], ....] --- 与 pnts 等长
+        """
+        pntNum = len(pnts)
+        pairPnt, pairSeg = self.queryPairs(pnts, tolerance)
+        bounds = np.searchsorted(pairPnt, np.arange(pntNum + 1))
+        return [pairSeg[bounds[i]:bounds[i + 1]].tolist() for i in range(pntNum)]
+
+    def pointTouchDet(self, pnts, tolerance):
+        """
+        usage: 与 lineEquation.pointTouchDet 对应的批量版本，返回每个点是否落在任意线段的容差范围内
+        :return: numpy.ndarray --- shape (N,), dtype bool
+        """
+        touch = np.zeros(len(pnts), dtype=bool)
+        touch[self.queryPairs(pnts, tolerance)[0]] = True
+        return touch
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""
+批量线简化 --- 将 sqlite 数据库中的多张点表分发到进程池中并行简化
+
+每张点表对应一条线，简化结果写入同名的 "_res" 表；
+每个进程使用独立的数据库连接，先在事务之外读取并简化所负责的全部点表，
+再在一个写事务内写入全部结果表，写锁只在写入期间持有，不使用任何全局变量。
+
+topology=True 时按保持拓扑的方式简化（见 topoSimplify），相邻线的公共部分只简化一次；
+公共弧段需要全部表一起提取，因此在当前进程中读取并简化全部表，不使用进程池。
+"""
+import fnmatch
+import multiprocessing
+import os
+import sqlite3
+
+import numpy as np
+
+from lineSimplify_Numpy import DPKeepMask, VWKeepMask
+from pntTableIO import DEFAULT_BLOCK_SIZE, fieldsDtype, readPntArray, tableFields
+from topoSimplify import topoKeepMasks
+
+# 多个进程同时写入同一个数据库时，等待写锁的最长时间（秒）
+DB_LOCK_TIMEOUT = 600
+
+# 可选的简化算法，DP 的容差为距离，VW 的容差为面积
+SIMPLIFIERS = {"DP": DPKeepMask, "VW": VWKeepMask}
+
+
+class batchSimplifyError(Exception):
+    pass
+
+
+def listPntTables(db, pattern="*"):
+    """
+    usage: list the point tables in db which match the glob pattern, "_res" tables are excluded
+    :param db: sqlite database path
+    :param pattern: glob pattern, e.g. "shp_*"
+    :return: [tableName, ....]
+    """
+    conn = sqlite3.connect(db)
+    try:
+        names = [each[0] for each in
+                 conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name;")]
+    finally:
+        conn.close()
+
+    return [each for each in names if fnmatch.fnmatchcase(each, pattern) and not each.endswith("_res")]
+
+
+def coordFieldIndex(fieldNames):
+    """
+    usage: 获取坐标字段在表中的位置，优先使用名为 x, y, z 的字段，否则取前三个字段
+    :param fieldNames: [fieldName, ....]
+    :return: [x_index, y_index, z_index] / [x_index, y_index]
+    """
+    lowerNames = [each.lower() for each in fieldNames]
+    if "x" in lowerNames and "y" in lowerNames:
+        index = [lowerNames.index("x"), lowerNames.index("y")]
+        if "z" in lowerNames:
+            index.append(lowerNames.index("z"))
+        return index
+
+    if len(fieldNames) < 2:
+        raise batchSimplifyError("Point table must have at least two coord fields")
+    return list(range(min(3, len(fieldNames))))
+
+
+def readTableRows(db, table):
+    """
+    usage: read one point table block by block into an array
+    :return: (fieldNames, rows --- numpy.ndarray)
+    """
+    fieldNames, fieldTypes = tableFields(db, table)
+    return fieldNames, readPntArray(db, table, fieldNames, dtype=fieldsDtype(fieldTypes))
+
+
+def simplifyTable(db, table, tolerance, method="DP"):
+    """
+    usage: read one point table and simplify it, nothing is written here
+    :return: (fieldNames, origin point number, result rows --- numpy.ndarray)
+    """
+    fieldNames, rows = readTableRows(db, table)
+
+    index = coordFieldIndex(fieldNames)
+    simplifier = SIMPLIFIERS[method]
+    keepMask = simplifier(rows[:, index].astype(np.float64), tolerance)
+    return fieldNames, len(rows), rows[keepMask]
+
+
+def writeResTable(conn, table, fieldNames, resRows, blockSize=DEFAULT_BLOCK_SIZE):
+    """
+    usage: write simplify result of table into "<table>_res" block by block with the given connection, no commit here
+    """
+    resTable = table + "_res"
+    conn.execute(f'DROP TABLE IF EXISTS "{resTable}";')
+    conn.execute(f'CREATE TABLE "{resTable}" AS SELECT * FROM "{table}" WHERE 0;')
+    insertExp = f'INSERT INTO "{resTable}" VALUES({",".join("?" * len(fieldNames))});'
+    for k in range(0, len(resRows), blockSize):
+        conn.executemany(insertExp, resRows[k:k + blockSize].tolist())
+
+
+def _writeResTables(conn, simplified):
+    """
+    usage: write all results in one transaction, the write lock is held only while writing
+    :param simplified: [(table, fieldNames, origin point number, resRows), ....]
+    """
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        for table, fieldNames, _, resRows in simplified:
+            writeResTable(conn, table, fieldNames, resRows)
+        conn.execute("COMMIT;")
+    except BaseException:
+        conn.execute("ROLLBACK;")
+        raise
+
+
+def _simplifyTableGroup(args):
+    """
+    usage: worker of process pool, tables are read and simplified outside any transaction,
+           then all results of the group are written in one transaction
+    """
+    db, tables, tolerance, method = args
+    conn = sqlite3.connect(db, timeout=DB_LOCK_TIMEOUT, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {DB_LOCK_TIMEOUT * 1000};")
+        simplified = [(table, *simplifyTable(db, table, tolerance, method)) for table in tables]
+        _writeResTables(conn, simplified)
+        return [(table, pntNum, len(resRows)) for table, _, pntNum, resRows in simplified]
+    finally:
+        conn.close()
+
+
+def _topoSimplifyTables(db, tables, tolerance, method, quantum):
+    """
+    usage: simplify all tables together and keep the shared parts of lines identical, each table is one line
+    """
+    tableRows = [(table, *readTableRows(db, table)) for table in tables]
+    features = [[rows[:, coordFieldIndex(fieldNames)].astype(np.float64)] for _, fieldNames, rows in tableRows]
+    keepMasks = topoKeepMasks(features, tolerance, quantum, closedAsRing=True, simplifier=SIMPLIFIERS[method])
+    simplified = [(table, fieldNames, len(rows), rows[masks[0]])
+                  for (table, fieldNames, rows), masks in zip(tableRows, keepMasks)]
+
+    conn = sqlite3.connect(db, timeout=DB_LOCK_TIMEOUT, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA busy_timeout = {DB_LOCK_TIMEOUT * 1000};")
+        _writeResTables(conn, simplified)
+    finally:
+        conn.close()
+    return [(table, pntNum, len(resRows)) for table, _, pntNum, resRows in simplified]
+
+
+def _splitTables(tables, groupNum):
+    # 按轮转方式分组，尽量让每组的表数量接近
+    groups = [tables[i::groupNum] for i in range(groupNum)]
+    return [each for each in groups if each]
+
+
+def batchSimplify(db, tables, tolerance, processNum=None, method="DP", topology=False, quantum=1e-6):
+    """
+    usage: simplify many point tables of db in parallel, result of each table is written to "<table>_res"
+    :param db: sqlite database path
+    :param tables: [tableName, ....] or a glob pattern such as "shp_*"
+    :param tolerance: Double --- 容差
+    :param processNum: number of worker process, default is cpu count
+    :param method: "DP" / "VW"
+    :param topology: Bool --- 保持拓扑，相邻线的公共部分只简化一次，此时不使用进程池
+    :param quantum: 保持拓扑时的量化步长，坐标差小于该值的节点视为同一节点
+    :return: [(table, origin point number, result point number), ....] in the order of tables
+    """
+    if not os.path.exists(db):
+        raise batchSimplifyError(f"Database is not exists --- {db}")
+
+    if method not in SIMPLIFIERS:
+        raise batchSimplifyError(f"Unknown simplify method --- {method}")
+
+    if isinstance(tables, str):
+        tables = listPntTables(db, tables)
+    tables = list(tables)
+    if not tables:
+        return []
+
+    if topology:
+        return _topoSimplifyTables(db, tables, tolerance, method, quantum)
+
+    processNum = min(processNum or multiprocessing.cpu_count(), len(tables))
+    groups = _splitTables(tables, processNum)
+    jobs = [(db, eachGroup, tolerance, method) for eachGroup in groups]
+
+    if processNum == 1:
+        groupRes = [_simplifyTableGroup(each) for each in jobs]
+    else:
+        with multiprocessing.Pool(processNum) as pool:
+            groupRes = pool.map(_simplifyTableGroup, jobs)
+
+    resDic = {each[0]: each for eachGroup in groupRes for each in eachGroup}
+    return [resDic[each] for each in tables]
+
+
+if __name__ == "__main__":
+    outdb = r"E:\GIS算法\道格拉斯和普克算法\测试数据\DPTest2.db"
+    for eachRes in batchSimplify(outdb, "shp_*", 0.001):
+        print("table: %s, origin points: %s, result points: %s" % eachRes)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+线简化算法 --- 基于 numpy 数组的实现，不依赖 arcpy
+
+输入统一为 (N, 3) 的浮点数组 (x, y, z)，(N, 2) 的数组会自动补 z = 0；
+输出统一为长度为 N 的布尔数组 keep-mask，True 表示该点保留。
+
+DP --- Douglas–Peucker，按点到线段的距离容差简化
+VW --- Visvalingam–Whyatt，按三角形有效面积简化，可以指定保留的点数
+"""
+import heapq
+import math
+
+import numpy as np
+
+
+class simplifyInputError(Exception):
+    pass
+
+
+def coordArray(pnts):
+    """
+    usage: convert points into a float (N, 3) array, enrich (x, y) into (x, y, 0)
+    :param pnts: [(x1, y1, z1), (x2, y2, z2), ....] / [(x1, y1), ....] / numpy array
+    :return: numpy.ndarray --- shape (N, 3), dtype float64
+    """
+    arr = np.asarray(pnts, dtype=np.float64)
+    if arr.ndim != 2 or arr.shape[1] < 2:
+        raise simplifyInputError("Coord is not available, points must be shaped as (N, 2) or (N, 3)")
+
+    if arr.shape[1] == 2:
+        arr = np.hstack((arr, np.zeros((arr.shape[0], 1), dtype=np.float64)))
+    elif arr.shape[1] > 3:
+        arr = arr[:, :3]
+    return np.ascontiguousarray(arr)
+
+
+def segmentDistance(pnts, start, end):
+    """
+    usage: 计算一批点到线段 start --- end 的三维垂直距离
+            垂足落在线段外时取到端点的距离，起终点重合（闭合线）时退化为点距
+    :param pnts: numpy.ndarray --- shape (M, 3)
+    :param start: numpy.ndarray --- shape (3,)
+    :param end: numpy.ndarray --- shape (3,)
+    :return: numpy.ndarray --- shape (M,)
+    """
+    seg = end - start
+    segLen2 = float(seg @ seg)
+    diff = pnts - start
+
+    if segLen2 == 0.0:
+        return np.sqrt(np.einsum("ij,ij->i", diff, diff))
+
+    t = np.clip(diff @ seg / segLen2, 0.0, 1.0)
+    foot = diff - t[:, None] * seg
+    return np.sqrt(np.einsum("ij,ij->i", foot, foot))
+
+
+def DPKeepMask(pnts, tolerance):
+    """
+    usage: Douglas–Peucker 线简化，使用显式栈代替递归，每个区间的点到线距离一次性向量化计算
+    :param pnts: (N, 3) / (N, 2) 坐标数组或坐标列表
+    :param tolerance: Double --- 容差，距离大于容差的点才会被保留
+    :return: numpy.ndarray --- shape (N,)，dtype bool，起点和终点始终保留
+    """
+    arr = coordArray(pnts)
+    pntNum = arr.shape[0]
+    keep = np.zeros(pntNum, dtype=bool)
+    if pntNum == 0:
+        return keep
+
+    keep[0] = keep[-1] = True
+    if pntNum < 3:
+        return keep
+
+    # 栈中保存待处理区间的首尾索引
+    stack = [(0, pntNum - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        dis = segmentDistance(arr[first + 1:last], arr[first], arr[last])
+        maxIndex = int(np.argmax(dis))
+        if dis[maxIndex] > tolerance:
+            splitIndex = first + 1 + maxIndex
+            keep[splitIndex] = True
+            stack.append((first, splitIndex))
+            stack.append((splitIndex, last))
+
+    return keep
+
+
+def DPSimplify(pnts, tolerance):
+    """
+    usage: Douglas–Peucker 线简化，直接返回简化后的坐标数组
+    :param pnts: (N, 3) / (N, 2) 坐标数组或坐标列表
+    :param tolerance: Double --- 容差
+    :return: numpy.ndarray --- shape (M, 3)
+    """
+    arr = coordArray(pnts)
+    return arr[DPKeepMask(arr, tolerance)]
+
+
+def triangleArea(pntA, pntB, pntC):
+    """
+    usage: 批量计算三维三角形面积
+    :param pntA: numpy.ndarray --- shape (M, 3)，pntB / pntC 同
+    :return: numpy.ndarray --- shape (M,)
+    """
+    cross = np.cross(pntB - pntA, pntC - pntA)
+    return 0.5 * np.sqrt(np.einsum("ij,ij->i", cross, cross))
+
+
+def _triangleArea(pntA, pntB, pntC):
+    # 单个三角形的面积，删除点后逐个更新时使用，避免 numpy 小数组的调用开销
+    ax, ay, az = pntB[0] - pntA[0], pntB[1] - pntA[1], pntB[2] - pntA[2]
+    bx, by, bz = pntC[0] - pntA[0], pntC[1] - pntA[1], pntC[2] - pntA[2]
+    cx, cy, cz = ay * bz - az * by, az * bx - ax * bz, ax * by - ay * bx
+    return 0.5 * math.sqrt(cx * cx + cy * cy + cz * cz)
+
+
+def VWKeepMask(pnts, tolerance=None, targetNum=None):
+    """
+    usage: Visvalingam–Whyatt 线简化，每次删除有效面积最小的点
+            有效面积保存在二叉堆中，删除点后只重新计算相邻两点，堆中过期的记录在弹出时跳过
+    :param pnts: (N, 3) / (N, 2) 坐标数组或坐标列表
+    :param tolerance: Double --- 面积容差，有效面积小于容差的点被删除；只指定 targetNum 时可为 None
+    :param targetNum: Int --- 保留的点数（不少于 2），指定后删除到只剩该数量的点为止，与 tolerance 同时指定时取删除更少的一方
+    :return: numpy.ndarray --- shape (N,)，dtype bool，起点和终点始终保留
+    """
+    if tolerance is None and targetNum is None:
+        raise simplifyInputError("tolerance or targetNum must be given")
+
+    arr = coordArray(pnts)
+    pntNum = arr.shape[0]
+    keep = np.ones(pntNum, dtype=bool)
+    if pntNum < 3:
+        return keep
+
+    minNum = max(int(targetNum), 2) if targetNum is not None else 2
+    if tolerance is None:
+        tolerance = np.inf
+
+    areas = np.full(pntNum, np.inf)
+    areas[1:-1] = triangleArea(arr[:-2], arr[1:-1], arr[2:])
+
+    # 双向链表记录删除过程中每个点的前后相邻点
+    prevIndex = np.arange(-1, pntNum - 1).tolist()
+    nextIndex = np.arange(1, pntNum + 1).tolist()
+    areaList = areas.tolist()
+    coords = arr.tolist()
+
+    heap = [(areaList[i], i) for i in range(1, pntNum - 1)]
+    heapq.heapify(heap)
+
+    remainNum = pntNum
+    while heap and remainNum > minNum:
+        area, index = heapq.heappop(heap)
+        # 过期记录：点已删除，或面积已经被重新计算
+        if not keep[index] or area != areaList[index]:
+            continue
+        if area >= tolerance:
+            break
+
+        keep[index] = False
+        remainNum -= 1
+        prev, nxt = prevIndex[index], nextIndex[index]
+        nextIndex[prev] = nxt
+        prevIndex[nxt] = prev
+
+        # 重新计算相邻点的有效面积，且不小于刚删除点的面积，保证删除顺序单调
+        for each in (prev, nxt):
+            if each == 0 or each == pntNum - 1:
+                continue
+            newArea = _triangleArea(coords[prevIndex[each]], coords[each], coords[nextIndex[each]])
+            areaList[each] = max(newArea, area)
+            heapq.heappush(heap, (areaList[each], each))
+
+    return keep
+
+
+def VWSimplify(pnts, tolerance=None, targetNum=None):
+    """
+    usage: Visvalingam–Whyatt 线简化，直接返回简化后的坐标数组
+    :return: numpy.ndarray --- shape (M, 3)
+    """
+    arr = coordArray(pnts)
+    return arr[VWKeepMask(arr, tolerance, targetNum)]
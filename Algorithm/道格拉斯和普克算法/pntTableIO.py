@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+DP 点表的流式读写 --- 按固定大小的块读写 sqlite 点表，内存占用与表的大小无关
+
+读：游标 fetchmany 逐块读取，每块转换为 (blockSize, 字段数) 的 numpy 数组
+写：WAL 模式 + 同一条参数化 INSERT 语句重复使用，按设定的行数间隔提交；
+    覆盖已有的表时先写入临时表，全部写完后在一个事务中删除原表并改名，写入失败时原表保持不变
+"""
+import sqlite3
+
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 100000
+DEFAULT_FIELDS = ("x", "y", "z")
+
+
+class pntTableIOError(Exception):
+    pass
+
+
+def _quoteName(name):
+    return '"%s"' % name.replace('"', '""')
+
+
+def tableFields(db, table):
+    """
+    usage: 读取表的字段名及声明的字段类型
+    :return: ([fieldName, ....], [fieldType, ....])
+    """
+    conn = sqlite3.connect(db)
+    try:
+        info = conn.execute(f"PRAGMA table_info({_quoteName(table)});").fetchall()
+    finally:
+        conn.close()
+    if not info:
+        raise pntTableIOError(f"Table is not exists --- {table}")
+    return [each[1] for each in info], [each[2] for each in info]
+
+
+def _isNumericType(fieldType):
+    # 按 sqlite 的类型亲和性规则判断，TEXT / BLOB / 未声明类型的字段不是数值
+    fieldType = (fieldType or "").upper()
+    if "INT" in fieldType:
+        return True
+    if not fieldType or any(each in fieldType for each in ("CHAR", "CLOB", "TEXT", "BLOB")):
+        return False
+    return True
+
+
+def fieldsDtype(fieldTypes):
+    """
+    usage: 全部字段为数值时读为 float64 数组，否则读为 object 数组，原样保留文本等字段的值
+    """
+    return np.float64 if all(_isNumericType(each) for each in fieldTypes) else object
+
+
+def readPntBlocks(db, table, fields=DEFAULT_FIELDS, blockSize=DEFAULT_BLOCK_SIZE, dtype=np.float64):
+    """
+    usage: 按 rowid 顺序逐块读取点表，生成器每次返回一个 numpy 数组
+    :param db: sqlite database path
+    :param table: point table name
+    :param fields: 需要读取的字段，默认为 ("x", "y", "z")
+    :param blockSize: 每块的最大行数
+    :param dtype: 数组类型
+    :return: generator --- numpy.ndarray, shape (<= blockSize, len(fields))
+    """
+    if blockSize <= 0:
+        raise pntTableIOError("blockSize must be greater than 0")
+
+    conn = sqlite3.connect(db)
+    try:
+        fieldExp = ", ".join(_quoteName(each) for each in fields)
+        cur = conn.execute(f"SELECT {fieldExp} FROM {_quoteName(table)} ORDER BY rowid;")
+        while True:
+            rows = cur.fetchmany(blockSize)
+            if not rows:
+                break
+            yield np.array(rows, dtype=dtype).reshape(len(rows), len(fields))
+    finally:
+        conn.close()
+
+
+def readPntArray(db, table, fields=DEFAULT_FIELDS, blockSize=DEFAULT_BLOCK_SIZE, dtype=np.float64):
+    """
+    usage: 逐块读取点表并拼接为一个数组，中间不产生整表的 python 元组列表
+    :return: numpy.ndarray, shape (N, len(fields))
+    """
+    blocks = list(readPntBlocks(db, table, fields, blockSize, dtype))
+    if not blocks:
+        return np.empty((0, len(fields)), dtype=dtype)
+    return np.concatenate(blocks)
+
+
+class pntTableWriter:
+    """
+    usage: 逐块写入点表
+     --- with pntTableWriter(db, "shp_1_res") as writer:
+             for block in blocks:
+                 writer.write(block)
+    :param db: sqlite database path
+    :param table: 输出表名
+    :param fields: 字段名，默认为 ("x", "y", "z")
+    :param fieldTypes: 字段类型，默认全部为 double
+    :param commitInterval: 每写入多少行提交一次，None 表示只在 close 时提交
+    :param overwrite: 输出表已存在时是否替换 --- 全部写完后才替换，写入失败时原表保持不变
+    """
+
+    def __init__(self, db, table, fields=DEFAULT_FIELDS, fieldTypes=None,
+                 commitInterval=DEFAULT_BLOCK_SIZE, overwrite=True):
+        if fieldTypes is None:
+            fieldTypes = ["double"] * len(fields)
+        if len(fieldTypes) != len(fields):
+            raise pntTableIOError("The number of fieldTypes is not equal to fields")
+
+        self.db = db
+        self.table = table
+        self.fields = tuple(fields)
+        self.commitInterval = commitInterval
+        self.overwrite = overwrite
+        self.rowCount = 0
+        self._uncommitted = 0
+        # 覆盖时写入临时表，close 时才替换原表
+        self._writeTable = table + "__writing" if overwrite else table
+
+        self.conn = sqlite3.connect(db, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode = WAL;")
+        self.conn.execute("PRAGMA synchronous = NORMAL;")
+
+        tableName = _quoteName(self._writeTable)
+        fieldExp = ", ".join(f"{_quoteName(name)} {fieldType}" for name, fieldType in zip(fields, fieldTypes))
+        self.conn.execute("BEGIN;")
+        if overwrite:
+            # 上次中断时残留的临时表
+            self.conn.execute(f"DROP TABLE IF EXISTS {tableName};")
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {tableName}({fieldExp});")
+
+        # 同一条语句反复执行，sqlite3 会复用已编译的语句
+        self.insertExp = (f"INSERT INTO {tableName}({', '.join(_quoteName(each) for each in fields)}) "
+                          f"VALUES({', '.join('?' * len(fields))});")
+
+    def write(self, block):
+        """
+        usage: 写入一块数据
+        :param block: numpy.ndarray, shape (M, len(fields)) or [(v1, v2, ...), ....]
+        :return: self
+        """
+        if isinstance(block, np.ndarray):
+            if block.ndim != 2 or block.shape[1] != len(self.fields):
+                raise pntTableIOError(f"Block shape {block.shape} does not match fields {self.fields}")
+            block = block.tolist()
+
+        self.conn.executemany(self.insertExp, block)
+        self.rowCount += len(block)
+        self._uncommitted += len(block)
+
+        if self.commitInterval and self._uncommitted >= self.commitInterval:
+            self.commit()
+        return self
+
+    def commit(self):
+        self.conn.execute("COMMIT;")
+        self._uncommitted = 0
+        self.conn.execute("BEGIN;")
+        return self
+
+    def close(self):
+        if self.conn is None:
+            return
+        if self.overwrite:
+            # 删除原表与改名在同一个事务中，原表只在新表完整写入后才被替换
+            self.conn.execute(f"DROP TABLE IF EXISTS {_quoteName(self.table)};")
+            self.conn.execute(f"ALTER TABLE {_quoteName(self._writeTable)} RENAME TO {_quoteName(self.table)};")
+        self.conn.execute("COMMIT;")
+        self.conn.close()
+        self.conn = None
+
+    def rollback(self):
+        if self.conn is None:
+            return
+        self.conn.execute("ROLLBACK;")
+        if self.overwrite:
+            # 已按间隔提交的部分在临时表中，原表不受影响
+            self.conn.execute(f"DROP TABLE IF EXISTS {_quoteName(self._writeTable)};")
+        self.conn.close()
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        if excType is None:
+            self.close()
+        else:
+            self.rollback()
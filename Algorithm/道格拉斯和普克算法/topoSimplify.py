@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+保持拓扑的线/面简化 --- 相邻要素的公共边只简化一次，简化后不会出现缝隙和碎片
+
+流程：
+    1. 按容差量化全部节点的 x, y 坐标，量化后坐标相同的节点视为同一个节点
+    2. 统计每个节点的相邻节点，相邻节点多于 2 个的节点和线的端点作为弧段的断点
+    3. 在断点处将每条线 / 每个环拆分为弧段，正反方向相同的弧段只保留一份
+    4. 每条弧段只简化一次，再按原来的顺序和方向拼回要素
+
+topoKeepMasks 返回每个部分原始节点的保留标记，点表的其他字段可以随之保留，
+lineSimplify_Batch.batchSimplify(..., topology=True) 即通过它简化多张点表
+"""
+import numpy as np
+
+from lineSimplify_Numpy import DPKeepMask, coordArray, segmentDistance
+
+
+class topoSimplifyError(Exception):
+    pass
+
+
+def _dropRepeatIds(ids, isRing):
+    # 量化后相邻的重复节点只保留一个
+    if ids.size < 2:
+        return ids
+    keep = np.ones(ids.size, dtype=bool)
+    keep[1:] = ids[1:] != ids[:-1]
+    ids = ids[keep]
+    if isRing and ids.size > 1 and ids[0] == ids[-1]:
+        ids = ids[:-1]
+    return ids
+
+
+def _junctionMask(partIds, ringFlags, vertexNum):
+    """
+    usage: 判断节点是否为弧段断点 --- 线的端点，或者相邻节点数量多于 2 个的节点
+    """
+    pairs = []
+    junction = np.zeros(vertexNum, dtype=bool)
+    for ids, isRing in zip(partIds, ringFlags):
+        if ids.size < 2:
+            junction[ids] = True
+            continue
+        if isRing:
+            nextIds = np.roll(ids, -1)
+            pairs.append(np.stack((ids, nextIds), axis=1))
+            pairs.append(np.stack((nextIds, ids), axis=1))
+        else:
+            junction[ids[0]] = junction[ids[-1]] = True
+            pairs.append(np.stack((ids[:-1], ids[1:]), axis=1))
+            pairs.append(np.stack((ids[1:], ids[:-1]), axis=1))
+
+    if pairs:
+        pairs = np.unique(np.concatenate(pairs), axis=0)
+        neighbourNum = np.bincount(pairs[:, 0], minlength=vertexNum)
+        junction |= neighbourNum > 2
+    return junction
+
+
+def _splitPart(ids, isRing, junction):
+    """
+    usage: 在断点处将一条线 / 一个环拆分为节点序号序列
+    :return: [numpy.ndarray, ....]
+    """
+    if not isRing:
+        cut = np.nonzero(junction[ids])[0]
+        return [ids[cut[i]:cut[i + 1] + 1] for i in range(cut.size - 1)]
+
+    cut = np.nonzero(junction[ids])[0]
+    if cut.size == 0:
+        # 没有断点的环从序号最小的节点起算，保证相同的环拆出相同的弧段
+        start = int(np.argmin(ids))
+        ring = np.roll(ids, -start)
+        return [np.append(ring, ring[0])]
+
+    ring = np.roll(ids, -cut[0])
+    ring = np.append(ring, ring[0])
+    cut = np.append(cut - cut[0], ids.size)
+    return [ring[cut[i]:cut[i + 1] + 1] for i in range(cut.size - 1)]
+
+
+def extractArcs(features, quantum=1e-6, closedAsRing=True):
+    """
+    usage: 提取全部要素的公共弧段
+    :param features: [[part, ....], ....] --- 每个要素由若干部分（线或环）组成，每个部分为 (N, 2) / (N, 3) 坐标
+    :param quantum: 量化步长，坐标差小于该值的节点视为同一节点
+    :param closedAsRing: 首尾节点相同的部分按环处理
+    :return: (vertexCoords, arcs, featureArcs)
+     --- vertexCoords: (V, 3) 节点坐标
+     --- arcs: [numpy.ndarray, ....] 每条弧段的节点序号，已去重
+     --- featureArcs: [[[(arcIndex, reverse), ....], ....], ....] 每个要素每个部分由哪些弧段按什么方向组成
+    """
+    if quantum <= 0:
+        raise topoSimplifyError("quantum must be greater than 0")
+
+    vertexCoords, arcs, featureArcs, _ = _extractArcs(features, quantum, closedAsRing)
+    return vertexCoords, arcs, featureArcs
+
+
+def _extractArcs(features, quantum, closedAsRing):
+    """
+    usage: 同 extractArcs，另外返回每个部分原始节点（去重之前）的节点序号
+    :return: (vertexCoords, arcs, featureArcs, featureVertexIds)
+    """
+    partCoords = []
+    partOwner = []
+    for featureIndex, parts in enumerate(features):
+        for eachPart in parts:
+            partCoords.append(coordArray(eachPart))
+            partOwner.append(featureIndex)
+
+    if not partCoords:
+        return np.empty((0, 3)), [], [[] for _ in features], [[] for _ in features]
+
+    allCoords = np.concatenate(partCoords)
+    quantized = np.round(allCoords[:, :2] / quantum).astype(np.int64)
+    _, firstIndex, vertexId = np.unique(quantized, axis=0, return_index=True, return_inverse=True)
+    vertexId = vertexId.reshape(-1)
+    vertexCoords = allCoords[firstIndex]
+
+    partIds = []
+    ringFlags = []
+    featureVertexIds = [[] for _ in features]
+    offset = 0
+    for coords, featureIndex in zip(partCoords, partOwner):
+        ids = vertexId[offset:offset + coords.shape[0]]
+        offset += coords.shape[0]
+        featureVertexIds[featureIndex].append(ids)
+        isRing = bool(closedAsRing and ids.size > 3 and ids[0] == ids[-1])
+        ids = _dropRepeatIds(ids, isRing)
+        partIds.append(ids)
+        ringFlags.append(isRing and ids.size >= 3)
+
+    junction = _junctionMask(partIds, ringFlags, vertexCoords.shape[0])
+
+    arcs = []
+    arcDic = {}
+    featureArcs = [[] for _ in features]
+    for ids, isRing, featureIndex in zip(partIds, ringFlags, partOwner):
+        partArcs = []
+        for arcIds in _splitPart(ids, isRing, junction):
+            forward = tuple(arcIds.tolist())
+            backward = forward[::-1]
+            reverse = backward < forward
+            key = backward if reverse else forward
+            if key not in arcDic:
+                arcDic[key] = len(arcs)
+                arcs.append(np.array(key, dtype=np.int64))
+            partArcs.append((arcDic[key], reverse))
+        featureArcs[featureIndex].append(partArcs)
+
+    return vertexCoords, arcs, featureArcs, featureVertexIds
+
+
+def _assemblePart(partArcs, arcs, arcMasks):
+    ids = []
+    for arcIndex, reverse in partArcs:
+        arcIds = arcs[arcIndex][arcMasks[arcIndex]]
+        if reverse:
+            arcIds = arcIds[::-1]
+        ids.append(arcIds if not ids else arcIds[1:])
+    return np.concatenate(ids) if ids else np.empty(0, dtype=np.int64)
+
+
+def _restoreFarthest(coords, mask):
+    """
+    usage: 在弧段未保留的节点中补回离弦最远的一个
+    :return: Bool --- 是否补回了节点
+    """
+    if mask.all():
+        return False
+    dis = segmentDistance(coords, coords[0], coords[-1])
+    dis[mask] = -1.0
+    mask[int(np.argmax(dis))] = True
+    return True
+
+
+def topoSimplify(features, tolerance, quantum=1e-6, closedAsRing=True, simplifier=DPKeepMask):
+    """
+    usage: 保持拓扑的批量简化，公共弧段只简化一次
+    :param features: [[part, ....], ....] --- 每个要素由若干部分（线或环）组成，每个部分为 (N, 2) / (N, 3) 坐标
+    :param tolerance: Double --- 容差
+    :param quantum: 量化步长，坐标差小于该值的节点视为同一节点
+    :param closedAsRing: 首尾节点相同的部分按环处理
+    :param simplifier: 简化函数，simplifier(pnts, tolerance) -> keep-mask，默认为 DPKeepMask
+    :return: [[numpy.ndarray, ....], ....] --- 与输入结构相同，坐标维数与输入相同
+    """
+    vertexCoords, arcs, featureArcs = extractArcs(features, quantum, closedAsRing)
+    arcMasks = _simplifyArcs(vertexCoords, arcs, featureArcs, tolerance, simplifier)
+
+    res = []
+    for parts, featureParts in zip(featureArcs, features):
+        resParts = []
+        for partArcs, originPart in zip(parts, featureParts):
+            dim = min(np.shape(originPart)[1], 3) if np.ndim(originPart) == 2 else 3
+            resParts.append(vertexCoords[_assemblePart(partArcs, arcs, arcMasks)][:, :dim])
+        res.append(resParts)
+    return res
+
+
+def topoKeepMasks(features, tolerance, quantum=1e-6, closedAsRing=True, simplifier=DPKeepMask):
+    """
+    usage: 保持拓扑的批量简化，返回保留标记而不是坐标；每个部分的首尾节点始终保留，
+           所在的公共弧段也保留该节点，相邻要素随之一致
+    :param features: 同 topoSimplify
+    :return: [[numpy.ndarray, ....], ....] --- 每个部分一个 shape (N,)，dtype bool 的数组，与部分的原始节点一一对应
+    """
+    if quantum <= 0:
+        raise topoSimplifyError("quantum must be greater than 0")
+
+    vertexCoords, arcs, featureArcs, featureVertexIds = _extractArcs(features, quantum, closedAsRing)
+    pinned = [ids[[0, -1]] for parts in featureVertexIds for ids in parts if ids.size]
+    pinned = np.unique(np.concatenate(pinned)) if pinned else np.empty(0, dtype=np.int64)
+    arcMasks = _simplifyArcs(vertexCoords, arcs, featureArcs, tolerance, simplifier, pinned)
+
+    res = []
+    for parts, partsIds in zip(featureArcs, featureVertexIds):
+        resParts = []
+        for partArcs, ids in zip(parts, partsIds):
+            mask = np.isin(ids, _assemblePart(partArcs, arcs, arcMasks))
+            # 量化后相邻的重复节点只保留第一个
+            mask[1:] &= ids[1:] != ids[:-1]
+            if ids.size:
+                mask[0] = mask[-1] = True
+            resParts.append(mask)
+        res.append(resParts)
+    return res
+
+
+def _simplifyArcs(vertexCoords, arcs, featureArcs, tolerance, simplifier, pinned=None):
+    """
+    usage: 每条弧段简化一次，pinned 中的节点始终保留
+    :return: [numpy.ndarray, ....] --- 每条弧段的保留标记
+    """
+    arcMasks = []
+    for arcIds in arcs:
+        mask = np.asarray(simplifier(vertexCoords[arcIds], tolerance), dtype=bool)
+        mask[0] = mask[-1] = True
+        if pinned is not None and pinned.size:
+            mask |= np.isin(arcIds, pinned)
+        arcMasks.append(mask)
+
+    # 简化后退化（不足 3 个不同节点）的环，在其弧段中补回离弦最远的节点；
+    # 弧段是公共的，相邻要素也随之使用补回的节点，拓扑保持一致
+    changed = True
+    while changed:
+        changed = False
+        for parts in featureArcs:
+            for partArcs in parts:
+                arcIds = _assemblePart(partArcs, arcs, arcMasks)
+                if arcIds.size < 2 or arcIds[0] != arcIds[-1] or arcIds.size >= 4:
+                    continue
+                for arcIndex, _ in partArcs:
+                    changed |= _restoreFarthest(vertexCoords[arcs[arcIndex]], arcMasks[arcIndex])
+    return arcMasks
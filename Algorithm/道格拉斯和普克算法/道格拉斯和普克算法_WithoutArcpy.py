@@ -11,14 +11,14 @@ try:
     import functools
     import datetime
     import sys
-    import sqlite3
+    import numpy as np
+    from lineSimplify_Numpy import DPKeepMask
+    from pntTableIO import fieldsDtype, pntTableWriter, readPntArray, tableFields, DEFAULT_BLOCK_SIZE
     logging.info("All module needed have imported successfully")
 
 except BaseException as e:
     logging.error(f"Lack of module. Error Message --- {e}")
 
-sys.setrecursionlimit(10000000)
-
 
 # points type is not tuple
 class pointError(Exception):
@@ -231,6 +231,8 @@ class lineEquation:
         """
         usage: used to detect that, the point is in the line with a tolerance num.
                 before use this, please call the function "generateSpatialIndex()" yet
+                for many points and lines, use gridSpatialIndex instead:
+                gridSpatialIndex.fromLineEquations(lines).pointTouchDet(pnts, tolerance)
         :param pnt:(x, y)
         :param tolerance:
         :return:
@@ -454,43 +456,20 @@ def getRunTime(func):
 
 
 def writeDataToDB(pntList, db, table):
-    oriTable = table
-    table += "_res"
-    conn = sqlite3.connect(db)
-    c = conn.cursor()
-
-    # 获取表结构
-    tbStructure = c.execute(f"pragma table_info({oriTable})").fetchall()
-    sqlExp = ""
-    insertExp = ("?," * len(tbStructure))[:-1]
-    for eachField in tbStructure:
-        cid, fieldName, fieldType, null, default, pk = eachField
-        sqlExp += fieldName + " " + fieldType
-
-        if pk == 1:
-            sqlExp += sqlExp + " primary key"
-
-        if null == 1:
-            sqlExp += sqlExp + " not null"
-
-        if default is not None:
-            sqlExp += sqlExp + f" default {default}"
-        sqlExp += ", "
-    c.execute(f"DROP TABLE IF EXISTS {table};")
-    c.execute(f"CREATE TABLE IF NOT EXISTS {table}({sqlExp[:-2]});")
-    c.executemany(f"INSERT INTO {table} VALUES({insertExp});", pntList)
-
-    conn.commit()
-    conn.close()
+    # 字段与原表一致，逐块写入 "<table>_res"，写入完成后才替换已有的结果表
+    fieldNames, fieldTypes = tableFields(db, table)
+    with pntTableWriter(db, table + "_res", fieldNames, fieldTypes) as writer:
+        for k in range(0, len(pntList), DEFAULT_BLOCK_SIZE):
+            writer.write(pntList[k:k + DEFAULT_BLOCK_SIZE])
 
     return db
 
 
 def readDataFromDB(db, table):
-    conn = sqlite3.connect(db)
-    c = conn.cursor()
-    data = c.execute(f"SELECT * FROM {table};").fetchall()
-    print("db data is : ", data)
+    # 逐块读取为 numpy 数组，不产生整表的 python 元组列表
+    fieldNames, fieldTypes = tableFields(db, table)
+    data = readPntArray(db, table, fieldNames, dtype=fieldsDtype(fieldTypes))
+    print("db data count is : ", len(data))
 
     return data
 
@@ -534,99 +513,47 @@ def singpntVarify(pntCoord):
 
 
 def DP(pntList, tolerance):
-    # print(pntList)
     """
-    :param pntList: [(x1, y1, z1), (x2, y2, z2), (x3, y3, z3), ....]
-    :return:
+    usage: Douglas–Peucker 线简化，计算交由 lineSimplify_Numpy.DPKeepMask 以数组方式完成
+    :param pntList: [(x1, y1, z1), (x2, y2, z2), (x3, y3, z3), ....] 或 numpy.ndarray (N, 字段数) --- 每行前三个字段为坐标
+    :param tolerance: Double --- 容差
+    :return: 保留下来的点（原始行），与输入类型相同，起点和终点始终保留
     """
-    global resList
-    global xIndex, yIndex, zIndex
-    if len(pntList) > 2:
-
-        x_f, y_f, z_f = (pntList[0])
-        x_l, y_l, z_l = (pntList[-1])
-        ext = (min(x_f, x_l), min(y_f, y_l), max(x_f, x_l), max(y_f, y_l))
-
-        # 实例化起点到终点的线
-        line = lineEquation((x_f, y_f, z_f), (x_l, y_l, z_l), ext)
-
-        for eachPnt in pntList[1:-1]:
-            x, y, z = eachPnt
-            dis = line.calDisFromPnt((x, y, z))
-            # 筛出点到线距离小于容差的点集
-            if dis < tolerance:
-                # 遍历结束后，将此列表中的所有点位全部清除
-                pntList.remove(eachPnt)
-
-        maxDis = 0
-        maxDisPntIndex = 0
-        for i, eachPnt in enumerate(pntList[1:-1]):
-            x, y, z = eachPnt
-            dis = line.calDisFromPnt((x, y, z))
-            if dis > maxDis:
-                maxDis = dis
-                maxDisPntIndex = i + 1
-
-        # 找到距离最远的点，将线拆分为两条
-        pntList1 = pntList[:maxDisPntIndex + 1]
-        pntList2 = pntList[maxDisPntIndex:]
-        if len(pntList1) > 2 and len(pntList2) > 2:
-            DP(pntList1, tolerance)
-            DP(pntList2, tolerance)
-        elif len(pntList1) > 2 and len(pntList2) <= 2:
-            DP(pntList1, tolerance)
-        elif len(pntList2) > 2 and len(pntList1) <= 2:
-            DP(pntList2, tolerance)
-        else:
-            resList = resList + pntList1
-            return resList
+    if len(pntList) == 0:
+        return pntList[:0]
 
-    else:
-        resList = resList + pntList
-        return resList
+    if isinstance(pntList, np.ndarray):
+        keepMask = DPKeepMask(pntList[:, :3].astype(np.float64), tolerance)
+        return pntList[keepMask]
+
+    keepMask = DPKeepMask([eachPnt[:3] for eachPnt in pntList], tolerance)
+    return [eachPnt for eachPnt, keep in zip(pntList, keepMask) if keep]
 
 
 @getRunTime
 def main(tolerance, outdb, table):
-    global resList
     pntDataList = readDataFromDB(outdb, table)
-    pnts = (tuple(pntDataList[0]), tuple(pntDataList[-1]))
-    print("start pnt, end pnt: ", pnts)
 
     logging.debug(f"Points coord information is {pntDataList}\n")
     logging.info("Step5 --- Process points with Douglas–Peucker algorithm")
 
-    DP(pntDataList, tolerance)
+    resList = DP(pntDataList, tolerance)
 
     logging.debug(f"The result of points with DP algorithm are {resList}\n")
     logging.info("Step6 --- Create line feature class")
 
-    if pnts[0] not in resList:
-        print(1)
-        resList.insert(0, pnts[0])
-    if pnts[1] not in resList:
-        print(2)
-        resList.append(pnts[1])
-
     writeDataToDB(resList, outdb, table)
 
     logging.info("Step7 --- Process finish")
 
 
-# 内置参数
-resList = []
-
-for i in range(1, 8):
-    print("="*30)
-    print(i)
-    print("="*30)
-    # 内置参数
-    resList = []
+if __name__ == "__main__":
+    from lineSimplify_Batch import batchSimplify
 
     outdb = r"E:\GIS算法\道格拉斯和普克算法\测试数据\DPTest2.db"
-    table = fr"shp_{i}"
+    tables = [f"shp_{i}" for i in range(1, 8)]
     tolerance = 0.001
 
-    if __name__ == "__main__":
-        main(tolerance, outdb, table)
-        print(resList)
+    # 各表之间相互独立，交由进程池并行简化
+    for eachRes in batchSimplify(outdb, tables, tolerance):
+        print("table: %s, origin points: %s, result points: %s" % eachRes)
@@ -0,0 +1,236 @@
+import json, os, time
+
+import numpy as np
+
+from sysRollup import dataRange, queryRange
+
+
+"""
+增量静态监控页面 —— 数据文件（紧凑 JSON）记录每个视图最后导出的汇总桶，每次只查询之后的汇总数据追加进去，
+超出点数上限时用 LTTB（largest-triangle-three-buckets）降采样；页面为静态 HTML，打开时读取数据文件，
+只在模板变化时重写。页面大小与生成耗时不随历史增长。
+
+    store = openStore(dbUrl)
+    updateDashboard(store, r'D:\\iserver\\webapps\\monitor', htmlName='sysmonitor.html', defaultView='day')
+
+页面通过 fetch 读取数据文件，需要由 web 服务访问（file:// 打开时浏览器会拦截）。
+"""
+
+
+DATA_NAME = "sysmonitor_data.json"
+DATA_VERSION = 1
+
+# 视图名, 汇总分辨率（秒）, 时间窗口（秒，None 为全部历史）, 页面上的名称
+VIEWS = (
+    ("day", 60, 86400, "最近24小时"),
+    ("2day", 60, 2 * 86400, "最近48小时"),
+    ("month", 3600, 30 * 86400, "最近30天"),
+    ("all", 86400, None, "全部"),
+)
+# 指标, 统计值, 名称, 颜色
+SERIES = (
+    ("CPU_USE", "AVG", "CPU使用率", "#6f7de3"),
+    ("CPU_USE", "MAX", "CPU峰值", "#3fb1e3"),
+    ("MEM_USE", "AVG", "内存使用率", "#c257F6"),
+)
+
+
+class dashboardError(Exception):
+    pass
+
+
+def lttb(x, y, threshold):
+    """
+    usage: largest-triangle-three-buckets 降采样，保留首尾点，中间每个桶选出与前一个选中点、下一个桶均值构成三角形面积最大的点
+    :param x: 横坐标，升序
+    :param y: 纵坐标
+    :param threshold: int, 输出点数（>= 3）
+    :return: numpy.ndarray, 选中点的下标
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    prev = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], max(edges[i + 1], edges[i] + 1)
+        # 下一个桶的均值，最后一个桶使用终点
+        nextStart, nextEnd = end, (edges[i + 2] if i + 2 < len(edges) else n)
+        nextX = x[nextStart:max(nextEnd, nextStart + 1)].mean()
+        nextY = y[nextStart:max(nextEnd, nextStart + 1)].mean()
+        area = np.abs((x[prev] - nextX) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (nextY - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+
+
+def _seriesKey(metric, stat):
+    return f"{metric}.{stat}"
+
+
+def _loadData(dataFile):
+    if not os.path.exists(dataFile):
+        return None
+    try:
+        with open(dataFile, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except ValueError:
+        return None
+    return data if data.get("version") == DATA_VERSION else None
+
+
+def _emptyData():
+    return {
+        "version": DATA_VERSION,
+        "meta": {
+            "views": [[name, title] for name, _, _, title in VIEWS],
+            "series": [[_seriesKey(m, s), label, color] for m, s, label, color in SERIES],
+        },
+        "views": {name: {"res": res, "last": None, "series": {}} for name, res, _, _ in VIEWS},
+    }
+
+
+def updateView(store, view, res, window, now, maxPoints, firstTs=None):
+    """
+    usage: 增量更新一个视图
+     --- 从上次导出的最后一个桶开始查询（该桶导出时可能尚未结束），新数据替换旧数据中相同及之后的点，
+         删除窗口之外的点，点数超过 maxPoints 时降采样
+    :param view: {'res', 'last', 'series': {key: [[ts, value], ....]}}，原地修改
+    :return: 本次查询到的桶数量
+    """
+    windowStart = now - window if window else (firstTs or 0)
+    since = windowStart if view["last"] is None else max(view["last"], windowStart)
+
+    metrics = tuple(dict.fromkeys(m for m, _, _, _ in SERIES))
+    stats = tuple(dict.fromkeys(s for _, s, _, _ in SERIES))
+    rows = queryRange(store.conn, since, now, metrics, stats, resolution=res, placeholder=store.placeholder)
+
+    for metric, stat, _, _ in SERIES:
+        key = _seriesKey(metric, stat)
+        points = [p for p in view["series"].get(key, []) if windowStart <= p[0] < since]
+        points += [[int(ts), round(v, 2)] for ts, v in zip(rows["TS"], rows[metric][stat]) if v is not None]
+        if len(points) > maxPoints:
+            arr = np.asarray(points, dtype=np.float64)
+            points = [points[i] for i in lttb(arr[:, 0], arr[:, 1], maxPoints)]
+        view["series"][key] = points
+
+    if rows["TS"]:
+        view["last"] = int(rows["TS"][-1])
+    return len(rows["TS"])
+
+
+def _atomicWrite(fileName, text):
+    tmpFile = fileName + ".tmp"
+    with open(tmpFile, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmpFile, fileName)
+
+
+def writePage(htmlFile, dataName=DATA_NAME, defaultView="day"):
+    """
+    usage: 写出静态页面，内容不变时不重写
+    """
+    html = PAGE_TEMPLATE.replace("__DATA_NAME__", dataName).replace("__DEFAULT_VIEW__", defaultView)
+    if os.path.exists(htmlFile):
+        with open(htmlFile, "r", encoding="utf-8") as f:
+            if f.read() == html:
+                return False
+    _atomicWrite(htmlFile, html)
+    return True
+
+
+def updateDashboard(store, outDir, htmlName="sysmonitor.html", defaultView="day", maxPoints=1000, dataName=DATA_NAME):
+    """
+    usage: 增量更新监控页面的数据文件，并写出静态页面
+    :param store: monitorStorage.monitorStore
+    :param outDir: str, 输出目录，同一目录中的多个页面共用一个数据文件
+    :param htmlName: str, 页面文件名
+    :param defaultView: str, 页面打开时显示的视图，见 VIEWS
+    :param maxPoints: int, 每条曲线的最大点数
+    :return: {视图: 本次查询到的桶数量}
+    """
+    if defaultView not in [v[0] for v in VIEWS]:
+        raise dashboardError(f"Unknown view --- {defaultView}")
+    os.makedirs(outDir, exist_ok=True)
+    dataFile = os.path.join(outDir, dataName)
+
+    data = _loadData(dataFile) or _emptyData()
+    now = time.time()
+    firstTs = dataRange(store.conn)[0]
+    res = {}
+    for name, resolution, window, _ in VIEWS:
+        res[name] = updateView(store, data["views"][name], resolution, window, now, maxPoints, firstTs)
+    data["generated"] = int(now)
+
+    _atomicWrite(dataFile, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    writePage(os.path.join(outDir, htmlName), dataName, defaultView)
+    return res
+
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="UTF-8">
+<title>系统资源监控</title>
+<script src="https://assets.pyecharts.org/assets/echarts.min.js"></script>
+<style>
+body {margin: 0; background: #1A1835; color: #90979c; font-family: sans-serif;}
+#bar {height: 40px; line-height: 40px; padding: 0 12px;}
+#bar button {margin-right: 8px; background: none; color: #90979c; border: 1px solid rgba(204,187,225,0.5); cursor: pointer;}
+#bar button.active {color: #fff; border-color: #fff;}
+#chart {width: 100%; height: calc(100vh - 40px);}
+</style>
+</head>
+<body>
+<div id="bar"></div>
+<div id="chart"></div>
+<script>
+var DATA_NAME = "__DATA_NAME__";
+var DEFAULT_VIEW = location.hash ? location.hash.substring(1) : "__DEFAULT_VIEW__";
+var chart = echarts.init(document.getElementById("chart"));
+window.addEventListener("resize", function () { chart.resize(); });
+
+function showView(data, name) {
+    var view = data.views[name];
+    var series = data.meta.series.map(function (s) {
+        return {
+            name: s[1], type: "line", showSymbol: false, color: s[2],
+            data: (view.series[s[0]] || []).map(function (p) { return [p[0] * 1000, p[1]]; })
+        };
+    });
+    chart.setOption({
+        tooltip: {trigger: "axis"},
+        legend: {textStyle: {color: "#90979c"}},
+        xAxis: {type: "time", axisLine: {lineStyle: {color: "rgba(204,187,225,0.5)"}}, splitLine: {show: false}},
+        yAxis: {type: "value", axisLine: {lineStyle: {color: "rgba(204,187,225,0.5)"}}, splitLine: {show: false}},
+        dataZoom: [{type: "inside"}, {type: "slider"}],
+        series: series
+    }, true);
+    document.querySelectorAll("#bar button").forEach(function (b) {
+        b.className = b.dataset.view === name ? "active" : "";
+    });
+}
+
+fetch(DATA_NAME + "?t=" + Date.now()).then(function (r) { return r.json(); }).then(function (data) {
+    var bar = document.getElementById("bar");
+    data.meta.views.forEach(function (v) {
+        var button = document.createElement("button");
+        button.textContent = v[1];
+        button.dataset.view = v[0];
+        button.onclick = function () { showView(data, v[0]); };
+        bar.appendChild(button);
+    });
+    var span = document.createElement("span");
+    span.textContent = "更新时间: " + new Date(data.generated * 1000).toLocaleString();
+    bar.appendChild(span);
+    showView(data, data.views[DEFAULT_VIEW] ? DEFAULT_VIEW : data.meta.views[0][0]);
+});
+</script>
+</body>
+</html>
+"""
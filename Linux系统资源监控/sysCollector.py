@@ -0,0 +1,243 @@
+import queue, threading, time
+
+import psutil
+
+
+"""
+系统资源采集 —— 固定频率采样 CPU（含每个核心）、内存、swap、磁盘 IO、网络 IO 及占用最高的进程，
+全部使用非阻塞调用（cpu_percent(interval=None) 与计数器差值），样本先缓存在内存中，
+每隔 flushInterval 秒交给后台写线程，在一个事务中批量写入，采样不会被数据库写入阻塞。
+
+    collector = batchCollector(systemSampler(topN=5), flushFunc, interval=1, flushInterval=30)
+    collector.run()
+
+flushFunc 的参数为 {表名: [行, ....]}，各表字段顺序见 TABLE_FIELDS；
+MYSYS_STATUS 仍按原来的频率（legacyInterval 秒一条）写入 CPU_USE / MEM_USE，原有的绘图脚本不需要修改。
+"""
+
+
+SAMPLE_TABLE = "SYS_SAMPLE"
+PROC_TABLE = "SYS_TOP_PROC"
+LEGACY_TABLE = "MYSYS_STATUS"
+
+# 字段名, sqlite 类型, MySQL 类型
+TABLE_COLUMNS = {
+    SAMPLE_TABLE: (
+        ("TS", "REAL", "DOUBLE"),                   # 采样时间，unix 时间戳（秒）
+        ("CPU_USE", "REAL", "FLOAT"),               # 全部核心的平均使用率 %
+        ("CPU_CORES", "TEXT", "VARCHAR(1024)"),     # 每个核心的使用率 %，逗号分隔
+        ("MEM_USE", "REAL", "FLOAT"),
+        ("SWAP_USE", "REAL", "FLOAT"),
+        ("DISK_READ", "REAL", "DOUBLE"),            # 字节 / 秒
+        ("DISK_WRITE", "REAL", "DOUBLE"),
+        ("NET_SENT", "REAL", "DOUBLE"),
+        ("NET_RECV", "REAL", "DOUBLE"),
+    ),
+    PROC_TABLE: (
+        ("TS", "REAL", "DOUBLE"),
+        ("PROC_RANK", "INTEGER", "INT"),            # 按 CPU 使用率排序的名次，从 1 开始
+        ("PID", "INTEGER", "INT"),
+        ("NAME", "TEXT", "VARCHAR(255)"),
+        ("CPU_USE", "REAL", "FLOAT"),
+        ("MEM_USE", "REAL", "FLOAT"),
+    ),
+}
+TABLE_KEYS = {SAMPLE_TABLE: ("TS",), PROC_TABLE: ("TS", "PROC_RANK")}
+TABLE_FIELDS = {table: tuple(col[0] for col in cols) for table, cols in TABLE_COLUMNS.items()}
+TABLE_FIELDS[LEGACY_TABLE] = ("CPU_USE", "MEM_USE", "RTIME")
+
+
+def createTableSQL(table, mysql=False):
+    """
+    usage: 生成 SYS_SAMPLE / SYS_TOP_PROC 的建表语句，以 TS 为主键（按时间范围查询时直接走主键）
+    :param mysql: bool, 为 True 时使用 MySQL 的字段类型
+    """
+    cols = ", ".join(f"{name} {mysqlType if mysql else sqliteType}"
+                     for name, sqliteType, mysqlType in TABLE_COLUMNS[table])
+    return f"create table if not exists {table}({cols}, primary key ({', '.join(TABLE_KEYS[table])}))"
+
+
+class systemSampler:
+    """
+    usage: 非阻塞采样，速率类指标为两次采样之间的计数器差值除以时间间隔
+    """
+
+    def __init__(self, topN=5):
+        self.topN = topN
+        # 第一次调用只建立基准，返回值没有意义
+        psutil.cpu_percent(interval=None, percpu=True)
+        self._lastTime = time.monotonic()
+        self._lastDisk = psutil.disk_io_counters()
+        self._lastNet = psutil.net_io_counters()
+        for proc in psutil.process_iter():
+            try:
+                proc.cpu_percent(interval=None)
+            except psutil.Error:
+                pass
+
+    @staticmethod
+    def _rate(new, old, fields, seconds):
+        if new is None or old is None or seconds <= 0:
+            return [None] * len(fields)
+        # 计数器回绕或网卡重置时差值为负，记为 0
+        return [max(getattr(new, f) - getattr(old, f), 0) / seconds for f in fields]
+
+    def sample(self, ts=None):
+        """
+        usage: 采集一次系统指标
+        :return: tuple, 字段顺序见 TABLE_FIELDS['SYS_SAMPLE']
+        """
+        ts = time.time() if ts is None else ts
+        cores = psutil.cpu_percent(interval=None, percpu=True)
+        mem = psutil.virtual_memory().percent
+        swap = psutil.swap_memory().percent
+
+        now = time.monotonic()
+        seconds = now - self._lastTime
+        disk = psutil.disk_io_counters()
+        net = psutil.net_io_counters()
+        diskRate = self._rate(disk, self._lastDisk, ("read_bytes", "write_bytes"), seconds)
+        netRate = self._rate(net, self._lastNet, ("bytes_sent", "bytes_recv"), seconds)
+        self._lastTime, self._lastDisk, self._lastNet = now, disk, net
+
+        cpu = round(sum(cores) / len(cores), 2) if cores else None
+        return (ts, cpu, ",".join(str(c) for c in cores), mem, swap, *diskRate, *netRate)
+
+    def topProcesses(self, ts=None):
+        """
+        usage: 自上次调用以来 CPU 使用率最高的 topN 个进程
+         --- process_iter 会复用同一进程的 Process 对象，cpu_percent(interval=None) 为两次调用之间的使用率
+        :return: [tuple, ....], 字段顺序见 TABLE_FIELDS['SYS_TOP_PROC']
+        """
+        ts = time.time() if ts is None else ts
+        procs = []
+        for proc in psutil.process_iter(["name"]):
+            try:
+                with proc.oneshot():
+                    procs.append((proc.cpu_percent(interval=None), proc.pid, proc.info["name"],
+                                  proc.memory_percent()))
+            except psutil.Error:
+                continue
+        procs.sort(key=lambda x: x[0], reverse=True)
+        return [(ts, rank, pid, name, cpu, round(memUse, 3))
+                for rank, (cpu, pid, name, memUse) in enumerate(procs[:self.topN], 1)]
+
+
+class batchCollector:
+    """
+    usage: 固定频率采样 + 内存缓存 + 后台批量写入
+    :param sampler: systemSampler
+    :param flushFunc: callable, 参数为 {表名: [行, ....]}，需要在一个事务中写入；在后台写线程中调用
+    :param interval: float, 采样间隔（秒）
+    :param flushInterval: float, 批量写入间隔（秒）
+    :param topInterval: float, 进程排行的采样间隔（秒），为 0 时不采集
+    :param legacyInterval: float, MYSYS_STATUS 的写入间隔（秒），为 0 时不写入
+    :param maxPending: int, 写入失败时最多保留的样本数量，超出后丢弃最早的样本
+    """
+
+    def __init__(self, sampler, flushFunc, interval=1.0, flushInterval=30.0, topInterval=5.0, legacyInterval=30.0,
+                 maxPending=86400):
+        self.sampler = sampler
+        self.flushFunc = flushFunc
+        self.interval = interval
+        self.flushInterval = flushInterval
+        self.topInterval = topInterval
+        self.legacyInterval = legacyInterval
+        self.maxPending = maxPending
+
+        self._buffer = self._emptyBatch()
+        self._queue = queue.Queue()
+        self._stopEvent = threading.Event()
+        self._writer = None
+
+    @staticmethod
+    def _emptyBatch():
+        return {SAMPLE_TABLE: [], PROC_TABLE: [], LEGACY_TABLE: []}
+
+    def _writeLoop(self):
+        pending = self._emptyBatch()
+        while True:
+            batch = self._queue.get()
+            if batch is not None:
+                for table, rows in batch.items():
+                    pending[table] += rows
+            if any(pending.values()):
+                try:
+                    self.flushFunc(pending)
+                    pending = self._emptyBatch()
+                except Exception as e:
+                    # 数据库暂时不可用时保留样本，下次一起写入
+                    print(f"flush failed, {len(pending[SAMPLE_TABLE])} samples pending --- {e}")
+                    for table in pending:
+                        pending[table] = pending[table][-self.maxPending:]
+            if batch is None:
+                return
+
+    @staticmethod
+    def _advance(nextTime, step, now):
+        # 跳过落后时错过的时刻
+        while nextTime <= now:
+            nextTime += step
+        return nextTime
+
+    def flush(self):
+        """
+        usage: 将缓存的样本交给写线程
+        """
+        if any(self._buffer.values()):
+            self._queue.put(self._buffer)
+            self._buffer = self._emptyBatch()
+
+    def stop(self):
+        self._stopEvent.set()
+
+    def run(self, duration=None):
+        """
+        usage: 开始采集，直到调用 stop() / 收到 KeyboardInterrupt / 达到 duration 秒
+         --- 按 起始时间 + k * interval 计算每次采样的时刻，采样与写入的耗时不会累积成漂移；
+             落后超过一个间隔时跳过错过的采样点
+        """
+        self._writer = threading.Thread(target=self._writeLoop, daemon=True)
+        self._writer.start()
+
+        # 与采样器建立基准的时刻至少间隔一个周期，第一条样本才有意义
+        self._stopEvent.wait(self.interval)
+        start = time.monotonic()
+        endTime = start + duration if duration else None
+        nextFlush = start + self.flushInterval
+        nextTop = start + self.topInterval if self.topInterval else None
+        nextLegacy = start
+        tick = 0
+        try:
+            while not self._stopEvent.is_set():
+                ts = time.time()
+                now = time.monotonic()
+                row = self.sampler.sample(ts)
+                self._buffer[SAMPLE_TABLE].append(row)
+
+                if nextTop is not None and now >= nextTop:
+                    self._buffer[PROC_TABLE] += self.sampler.topProcesses(ts)
+                    nextTop = self._advance(nextTop, self.topInterval, now)
+                if self.legacyInterval and now >= nextLegacy:
+                    rTime = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts))
+                    self._buffer[LEGACY_TABLE].append((row[1], row[3], rTime))
+                    nextLegacy = self._advance(nextLegacy, self.legacyInterval, now)
+                if now >= nextFlush:
+                    self.flush()
+                    nextFlush = self._advance(nextFlush, self.flushInterval, now)
+
+                tick += 1
+                delay = start + tick * self.interval - time.monotonic()
+                if delay < 0:
+                    tick = int((time.monotonic() - start) / self.interval) + 1
+                    delay = start + tick * self.interval - time.monotonic()
+                if endTime is not None and time.monotonic() + delay >= endTime:
+                    break
+                self._stopEvent.wait(delay)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # 退出前写入剩余样本
+            self.flush()
+            self._queue.put(None)
+            self._writer.join()
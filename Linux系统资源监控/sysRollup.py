@@ -0,0 +1,308 @@
+import datetime, time
+from array import array
+
+import numpy as np
+
+from sysCollector import LEGACY_TABLE, SAMPLE_TABLE, TABLE_FIELDS
+
+
+"""
+监控数据按时间分桶汇总 —— 1 分钟 / 1 小时 / 1 天 三张汇总表，每个桶、每个指标一行（CNT / MIN / MAX / AVG / P95），
+随采样批量写入时增量更新（只改写本批样本涉及的桶）；查询时按时间范围和点数上限自动选择分辨率，
+几个月的历史只需读取几千行，不再逐 2 小时查询原始数据。
+
+    rollup = rollupAggregator()
+    rollup.restore(conn)                     # 重启后从 SYS_SAMPLE 恢复未结束的桶
+    rollup.add(batch[SAMPLE_TABLE])          # 在 flush 中调用，与样本写在同一个事务中
+    writeRollups(conn, rollup.dirtyRows()); rollup.markClean()
+
+    data = queryRange(conn, startTs, endTs, metrics=('CPU_USE', 'MEM_USE'), stats=('AVG', 'MAX'))
+
+天的分界按本地时间计算；MySQL 使用 placeholder='%s'。
+"""
+
+
+# 分辨率（秒） -> 汇总表
+ROLLUP_TABLES = {60: "SYS_ROLLUP_1M", 3600: "SYS_ROLLUP_1H", 86400: "SYS_ROLLUP_1D"}
+ROLLUP_FIELDS = ("BUCKET", "METRIC", "CNT", "MIN_V", "MAX_V", "AVG_V", "P95_V")
+ROLLUP_METRICS = ("CPU_USE", "MEM_USE", "SWAP_USE", "DISK_READ", "DISK_WRITE", "NET_SENT", "NET_RECV")
+STAT_FIELDS = {"MIN": "MIN_V", "MAX": "MAX_V", "AVG": "AVG_V", "P95": "P95_V"}
+
+_METRIC_INDEX = [TABLE_FIELDS[SAMPLE_TABLE].index(m) for m in ROLLUP_METRICS]
+
+
+class rollupError(Exception):
+    pass
+
+
+def createRollupSQL(table, mysql=False):
+    """
+    usage: 汇总表建表语句，(BUCKET, METRIC) 为主键
+    :param table: str, ROLLUP_TABLES 中的表名
+    """
+    if mysql:
+        realType, textType, intType = "DOUBLE", "VARCHAR(32)", "INT"
+    else:
+        realType, textType, intType = "REAL", "TEXT", "INTEGER"
+    return (f"create table if not exists {table}(BUCKET {realType}, METRIC {textType}, CNT {intType}, "
+            f"MIN_V {realType}, MAX_V {realType}, AVG_V {realType}, P95_V {realType}, primary key (BUCKET, METRIC))")
+
+
+def upsertSQL(table, placeholder="?"):
+    """
+    usage: 覆盖写入汇总行，sqlite 与 MySQL 均支持 replace into
+    """
+    return (f"replace into {table}({', '.join(ROLLUP_FIELDS)}) "
+            f"values({', '.join([placeholder] * len(ROLLUP_FIELDS))})")
+
+
+def _utcOffset(ts):
+    return time.localtime(ts).tm_gmtoff
+
+
+def bucketStart(ts, res):
+    """
+    usage: 时间戳所在桶的起始时间，按本地时间对齐（天从本地 0 点开始）
+    """
+    offset = _utcOffset(ts)
+    return (ts + offset) // res * res - offset
+
+
+def _rows(cur):
+    for row in cur.fetchall():
+        # pymysql 的 DictCursor 返回 dict
+        yield tuple(row.values()) if isinstance(row, dict) else row
+
+
+class rollupAggregator:
+    """
+    usage: 在内存中保存未写入 / 未结束的桶，桶内保留原始值以计算 p95（一天 1 秒一次的样本约 5 MB）
+    :param resolutions: 需要汇总的分辨率（秒），均需在 ROLLUP_TABLES 中
+    """
+
+    def __init__(self, resolutions=tuple(ROLLUP_TABLES)):
+        for res in resolutions:
+            if res not in ROLLUP_TABLES:
+                raise rollupError(f"Unsupported resolution --- {res}")
+        self.resolutions = tuple(resolutions)
+        # {res: {bucket: [array('d'), ....]}}，列表与 ROLLUP_METRICS 一一对应
+        self._buckets = {res: {} for res in self.resolutions}
+        self._dirty = {res: set() for res in self.resolutions}
+        self.lastTs = None
+
+    def add(self, samples):
+        """
+        usage: 加入一批 SYS_SAMPLE 样本（按时间顺序），早于 lastTs 的样本视为已加入（写入失败后的重试）并跳过
+        :return: 加入的样本数量
+        """
+        num = 0
+        for row in samples:
+            ts = row[0]
+            if self.lastTs is not None and ts <= self.lastTs:
+                continue
+            values = [row[i] for i in _METRIC_INDEX]
+            for res in self.resolutions:
+                bucket = bucketStart(ts, res)
+                arrays = self._buckets[res].get(bucket)
+                if arrays is None:
+                    arrays = self._buckets[res][bucket] = [array("d") for _ in ROLLUP_METRICS]
+                for arr, value in zip(arrays, values):
+                    if value is not None:
+                        arr.append(value)
+                self._dirty[res].add(bucket)
+            self.lastTs = ts
+            num += 1
+        return num
+
+    def dirtyRows(self):
+        """
+        usage: 自上次 markClean 以来有变化的桶的汇总行
+        :return: {table: [(BUCKET, METRIC, CNT, MIN_V, MAX_V, AVG_V, P95_V), ....]}
+        """
+        res = {}
+        for resolution in self.resolutions:
+            rows = []
+            for bucket in sorted(self._dirty[resolution]):
+                for metric, arr in zip(ROLLUP_METRICS, self._buckets[resolution][bucket]):
+                    if not arr:
+                        continue
+                    values = np.frombuffer(arr, dtype=np.float64)
+                    rows.append((bucket, metric, len(values), float(values.min()), float(values.max()),
+                                 float(values.mean()), float(np.percentile(values, 95))))
+            res[ROLLUP_TABLES[resolution]] = rows
+        return res
+
+    def markClean(self):
+        """
+        usage: 汇总行写入成功后调用，释放已经结束的桶
+        """
+        for res in self.resolutions:
+            self._dirty[res].clear()
+            if self.lastTs is None:
+                continue
+            current = bucketStart(self.lastTs, res)
+            for bucket in [b for b in self._buckets[res] if b < current]:
+                del self._buckets[res][bucket]
+
+    def restore(self, conn, placeholder="?"):
+        """
+        usage: 从 SYS_SAMPLE 读取最大分辨率当前桶（一般为今天）内的样本，恢复未结束的桶，之后的 add 只需加入新样本
+        :return: 恢复的样本数量
+        """
+        cur = conn.cursor()
+        cur.execute(f"select max(TS) from {SAMPLE_TABLE}")
+        lastTs = next(_rows(cur))[0]
+        if lastTs is None:
+            return 0
+        since = bucketStart(lastTs, max(self.resolutions))
+        cur.execute(f"select {', '.join(TABLE_FIELDS[SAMPLE_TABLE])} from {SAMPLE_TABLE} "
+                    f"where TS >= {placeholder} order by TS", (since,))
+        num = self.add(_rows(cur))
+        self.markClean()
+        return num
+
+
+def writeRollups(cur, tableRows, placeholder="?"):
+    """
+    usage: 批量覆盖写入汇总行，事务由调用者控制
+    :param cur: 数据库游标（sqlite3 的 Connection 也可以）
+    :param tableRows: rollupAggregator.dirtyRows() 的返回值
+    """
+    for table, rows in tableRows.items():
+        if rows:
+            cur.executemany(upsertSQL(table, placeholder), rows)
+
+
+def _toTimestamp(rTime):
+    if isinstance(rTime, datetime.datetime):
+        return rTime.timestamp()
+    return datetime.datetime.strptime(str(rTime), "%Y-%m-%d %H:%M:%S").timestamp()
+
+
+def backfillLegacy(conn, placeholder="?", chunkSize=50000):
+    """
+    usage: 由 MYSYS_STATUS 的历史数据（CPU_USE / MEM_USE）生成汇总行，用于引入汇总表之前的数据
+     --- 只处理早于 SYS_SAMPLE 第一条样本所在的 1 天桶的数据，生成的桶与采集程序写入的桶不重叠，
+         覆盖写入时不会替换包含新样本的汇总行，可重复执行
+    :return: 处理的行数
+    """
+    cur = conn.cursor()
+    cur.execute(f"select min(TS) from {SAMPLE_TABLE}")
+    firstTs = next(_rows(cur))[0]
+    # 各分辨率的桶都按本地时间对齐，最大分辨率桶的起点也是其他分辨率桶的起点
+    endTs = None if firstTs is None else bucketStart(firstTs, max(ROLLUP_TABLES))
+
+    rollup = rollupAggregator()
+    template = [None] * len(TABLE_FIELDS[SAMPLE_TABLE])
+    cpuIndex, memIndex = TABLE_FIELDS[SAMPLE_TABLE].index("CPU_USE"), TABLE_FIELDS[SAMPLE_TABLE].index("MEM_USE")
+
+    cur.execute(f"select CPU_USE, MEM_USE, RTIME from {LEGACY_TABLE} order by RTIME")
+    writeCur = conn.cursor()
+    num = 0
+    while True:
+        rows = cur.fetchmany(chunkSize)
+        if not rows:
+            break
+        samples = []
+        for row in rows:
+            cpu, mem, rTime = tuple(row.values()) if isinstance(row, dict) else row
+            ts = _toTimestamp(rTime)
+            if endTs is not None and ts >= endTs:
+                continue
+            sample = list(template)
+            sample[0], sample[cpuIndex], sample[memIndex] = ts, cpu, mem
+            samples.append(sample)
+        num += rollup.add(samples)
+        writeRollups(writeCur, rollup.dirtyRows(), placeholder)
+        rollup.markClean()
+    conn.commit()
+    return num
+
+
+def dataRange(conn):
+    """
+    usage: 汇总数据覆盖的时间范围
+    :return: (第一个天桶的起始时间, 最后一个分钟桶的结束时间)，没有数据时为 (None, None)
+    """
+    cur = conn.cursor()
+    cur.execute(f"select min(BUCKET) from {ROLLUP_TABLES[86400]}")
+    first = next(_rows(cur))[0]
+    cur.execute(f"select max(BUCKET) from {ROLLUP_TABLES[60]}")
+    last = next(_rows(cur))[0]
+    return first, (None if last is None else last + 60)
+
+
+def timeLabels(tsList, fmt="%Y-%m-%d %H:%M:%S"):
+    """
+    usage: 时间戳转为本地时间字符串，用作图表横轴
+    """
+    return [time.strftime(fmt, time.localtime(ts)) for ts in tsList]
+
+
+def chooseResolution(startTs, endTs, maxPoints=2000, sampleInterval=1):
+    """
+    usage: 选择点数不超过 maxPoints 的最高分辨率
+    :return: 0 表示直接读取 SYS_SAMPLE，其余为 ROLLUP_TABLES 中的分辨率
+    """
+    span = max(endTs - startTs, 0)
+    if span / sampleInterval <= maxPoints:
+        return 0
+    for res in sorted(ROLLUP_TABLES):
+        if span / res <= maxPoints:
+            return res
+    return max(ROLLUP_TABLES)
+
+
+def queryRange(conn, startTs, endTs, metrics=("CPU_USE", "MEM_USE"), stats=("AVG",), maxPoints=2000,
+               resolution=None, placeholder="?", sampleInterval=1):
+    """
+    usage: 读取时间范围内的指标，自动选择分辨率
+    :param startTs, endTs: 时间范围（unix 时间戳，含两端）
+    :param metrics: ROLLUP_METRICS 中的指标
+    :param stats: 'AVG' / 'MIN' / 'MAX' / 'P95'，读取原始样本时各统计值均为样本值
+    :param resolution: 指定分辨率，为空时由 chooseResolution 选择
+    :return: {'RES': 分辨率, 'TS': [桶起始时间, ....], metric: {stat: [value, ....]}}
+    """
+    for metric in metrics:
+        if metric not in ROLLUP_METRICS:
+            raise rollupError(f"Unsupported metric --- {metric}")
+    for stat in stats:
+        if stat not in STAT_FIELDS:
+            raise rollupError(f"Unsupported stat --- {stat}")
+
+    res = chooseResolution(startTs, endTs, maxPoints, sampleInterval) if resolution is None else resolution
+    cur = conn.cursor()
+    data = {"RES": res, "TS": []}
+
+    if res == 0:
+        cur.execute(f"select TS, {', '.join(metrics)} from {SAMPLE_TABLE} "
+                    f"where TS between {placeholder} and {placeholder} order by TS", (startTs, endTs))
+        rows = list(_rows(cur))
+        data["TS"] = [row[0] for row in rows]
+        for i, metric in enumerate(metrics, 1):
+            values = [row[i] for row in rows]
+            data[metric] = {stat: values for stat in stats}
+        return data
+
+    if res not in ROLLUP_TABLES:
+        raise rollupError(f"Unsupported resolution --- {res}")
+    cur.execute(f"select BUCKET, METRIC, {', '.join(STAT_FIELDS[s] for s in stats)} from {ROLLUP_TABLES[res]} "
+                f"where BUCKET between {placeholder} and {placeholder} "
+                f"and METRIC in ({', '.join([placeholder] * len(metrics))}) order by BUCKET",
+                (bucketStart(startTs, res), endTs, *metrics))
+
+    # 长表转宽表，某个桶缺少指标时为 None
+    index = {}
+    columns = {(metric, stat): [] for metric in metrics for stat in stats}
+    for row in _rows(cur):
+        bucket, metric = row[0], row[1]
+        if bucket not in index:
+            index[bucket] = len(data["TS"])
+            data["TS"].append(bucket)
+            for col in columns.values():
+                col.append(None)
+        for stat, value in zip(stats, row[2:]):
+            columns[(metric, stat)][index[bucket]] = value
+    for metric in metrics:
+        data[metric] = {stat: columns[(metric, stat)] for stat in stats}
+    return data
@@ -1,26 +1,39 @@
-import psutil
-import time
-import sqlite3
+import sys
 
+from monitorStorage import openStore
+from sysCollector import SAMPLE_TABLE, batchCollector, systemSampler
+from sysRollup import rollupAggregator
 
-db = "./db/sysStatus.db"
-conn = sqlite3.connect(db)
-cur = conn.cursor()
 
-while True:
-    # try:
-    # 查看 cpu 的使用率
-    cpuStatus = psutil.cpu_percent(interval=1, percpu=False)
-    # print("CPU使用率：", cpuStatus)
+# 采样间隔 / 批量写入间隔（秒）
+interval = 1
+flushInterval = 30
+topN = 5
 
-    # 查看 内存 使用情况
-    virMemStatus = psutil.virtual_memory()
-    # print(virMemStatus)
 
-    info = [cpuStatus, virMemStatus.percent]
+def runMonitor(dbUrl=None, interval=interval, flushInterval=flushInterval, topN=topN):
+    """
+    usage: 采集系统资源并批量写入存储，同时维护 1 分钟 / 1 小时 / 1 天汇总
+    :param dbUrl: str, 存储地址，见 monitorStorage.openStore；为空时读取环境变量 MONITOR_DB，默认为 ./db/sysStatus.db
+    """
+    store = openStore(dbUrl)
+    store.createTables()
 
-    cur.execute("insert into MYSYS_STATUS(CPU_USE, MEM_USE) values(?, ?)", info)
-    conn.commit()
+    # 重启后先恢复未结束的汇总桶
+    rollup = rollupAggregator()
+    rollup.restore(store.conn, store.placeholder)
 
-    time.sleep(29)
+    def flushToStore(batch):
+        # 一次事务写入一批样本及其涉及的汇总行
+        rollup.add(batch[SAMPLE_TABLE])
+        store.writeBatch(batch, rollup.dirtyRows())
+        rollup.markClean()
 
+    collector = batchCollector(systemSampler(topN), flushToStore, interval=interval, flushInterval=flushInterval)
+    collector.run()
+    store.close()
+
+
+if __name__ == "__main__":
+    # python3 -u systemInfoMonitor.py [sqlite:///./db/sysStatus.db | mysql://user@host:port/db]
+    runMonitor(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -1,21 +1,12 @@
-import pymysql
+import os, sys
 
-conn = pymysql.connect(
-    host="192.168.10.149",
-    port=3306,
-    user="sysmon",
-    password="0403",
-    db="iserver_monitor",
-    charset="utf8",
-    cursorclass=pymysql.cursors.DictCursor
-)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitorStorage import MYSQL_URL, URL_ENV, openStore
 
-cur = conn.cursor()
-cur.execute("drop table if exists MYSYS_STATUS;")
-cur.execute("create table if not exists MYSYS_STATUS(ID integer primary key auto_increment, CPU_USE float,"
-            " MEM_USE float, RTIME TimeStamp NOT NULL DEFAULT CURRENT_TIMESTAMP);")
-# cur.execute("create table if not exists MYSYS_STATUS(ID integer primary key auto_increment, CPU_USE float,"
-#             " MEM_USE float, RTIME TimeStamp not null);")
+# mysql 地址，密码取自环境变量 MONITOR_DB_PASSWORD
+dbUrl = os.environ.get(URL_ENV, MYSQL_URL)
 
-conn.commit()
-conn.close()
+# 重新创建全部表（清空原有数据）
+store = openStore(dbUrl)
+store.createTables(drop=True)
+store.close()
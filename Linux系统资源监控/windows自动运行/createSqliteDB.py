@@ -1,9 +1,9 @@
-import sqlite3
+import os, sys
 
-db = sqlite3.connect("./db/sysStatus.db")
-cur = db.cursor()
-cur.execute("drop table if exists MYSYS_STATUS")
-cur.execute("create table if not exists MYSYS_STATUS(ID integer primary key, CPU_USE REAL,"
-            " MEM_USE REAL, RTIME TimeStamp NOT NULL DEFAULT (datetime('now','localtime')))")
-db.commit()
-db.close()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitorStorage import openStore
+
+# 重新创建全部表（清空原有数据）
+store = openStore("sqlite:///./db/sysStatus.db")
+store.createTables(drop=True)
+store.close()
@@ -1,49 +1,12 @@
-import psutil
-import time
-import pymysql
+import os, sys
 
-# sqlite params
-tableName = "MYSYS_STATUS"
-cpuField = "CPU_USE"
-memField = "MEM_USE"
-timeField = "RTIME"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitorStorage import MYSQL_URL, URL_ENV
+from systemInfoMonitor import runMonitor
 
-# mysql params
-ip = "192.168.10.149"
-port = 3306
-username = "sysmon"
-password = "0403"
-db = "iserver_monitor"
-charset = "utf8"
+# mysql 地址，密码取自环境变量 MONITOR_DB_PASSWORD；也可以通过环境变量 MONITOR_DB 指定完整地址
+dbUrl = os.environ.get(URL_ENV, MYSQL_URL)
 
 
-# mysql
-conn = pymysql.connect(
-    host=ip,
-    port=port,
-    user=username,
-    password=password,
-    db=db,
-    charset=charset,
-    cursorclass=pymysql.cursors.DictCursor
-)
-
-cur = conn.cursor()
-
-while True:
-    # try:
-    # 查看 cpu 的使用率
-    cpuStatus = psutil.cpu_percent(interval=1, percpu=False)
-    # print("CPU使用率：", cpuStatus)
-
-    # 查看 内存 使用情况
-    virMemStatus = psutil.virtual_memory()
-
-    sqlExp = f"insert into MYSYS_STATUS(CPU_USE, MEM_USE) values({cpuStatus}, {virMemStatus.percent});"
-    print(sqlExp)
-
-    cur.execute(sqlExp)
-    conn.commit()
-
-    time.sleep(29)
-
+if __name__ == "__main__":
+    runMonitor(dbUrl)
@@ -0,0 +1,14 @@
+import os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitorStorage import MYSQL_URL, URL_ENV, openStore
+from sysRollup import backfillLegacy
+
+# 由 MYSYS_STATUS 中的历史数据生成 1 分钟 / 1 小时 / 1 天汇总（只需在引入汇总表后执行一次）
+# mysql 地址，密码取自环境变量 MONITOR_DB_PASSWORD
+dbUrl = os.environ.get(URL_ENV, MYSQL_URL)
+
+store = openStore(dbUrl)
+store.createTables()
+print(backfillLegacy(store.conn, store.placeholder), "rows")
+store.close()
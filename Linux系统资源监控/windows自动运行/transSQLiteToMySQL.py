@@ -1,49 +1,21 @@
-import sqlite3
-import pymysql
+import os, sys
 
-# sqlite params
-tableName = "MYSYS_STATUS"
-cpuField = "CPU_USE"
-memField = "MEM_USE"
-timeField = "RTIME"
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from monitorStorage import MYSQL_URL, URL_ENV, migrate, openStore
 
-# mysql params
-ip = "192.168.10.149"
-port = 3306
-username = "sysmon"
-password = "0403"
-db = "iserver_monitor"
-charset = "utf8"
+# python transSQLiteToMySQL.py [源地址] [目标地址]
+#   默认由 ./db/sysStatus.db 迁移到 MySQL，MySQL 密码取自环境变量 MONITOR_DB_PASSWORD
+srcUrl = "sqlite:///./db/sysStatus.db"
+dstUrl = os.environ.get(URL_ENV, MYSQL_URL)
 
-# sqlite
-sqliteDB = "./db/sysStatus.db"
 
-conn_sqlite = sqlite3.connect(sqliteDB)
-cur_sqlite = conn_sqlite.cursor()
-datas = cur_sqlite.execute(f"select {cpuField}, {memField}, {timeField} from {tableName};").fetchall()
-conn_sqlite.commit()
-conn_sqlite.close()
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        srcUrl = sys.argv[1]
+    if len(sys.argv) > 2:
+        dstUrl = sys.argv[2]
 
-# mysql
-conn_mysql = pymysql.connect(
-    host=ip,
-    port=port,
-    user=username,
-    password=password,
-    db=db,
-    charset=charset,
-    cursorclass=pymysql.cursors.DictCursor
-)
-
-cur_mysql = conn_mysql.cursor()
-
-for i, each in enumerate(datas):
-    sqlExp = (f"insert into {tableName}({cpuField}, {memField}, {timeField}) "
-              f"values({each[0]}, {each[1]}, STR_TO_DATE(" + "'" + each[2] + "', '%Y-%m-%d %H:%i:%s'));")
-    cur_mysql.execute(sqlExp)
-
-    if i % 50 == 0:
-        print(i)
-
-conn_mysql.commit()
-conn_mysql.close()
+    src, dst = openStore(srcUrl), openStore(dstUrl)
+    print(migrate(src, dst))
+    src.close()
+    dst.close()
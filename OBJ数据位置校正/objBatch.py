@@ -0,0 +1,189 @@
+import hashlib, json, os
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+from objTransform import transformObj
+
+
+"""
+OBJ / MTL 目录批处理 —— 一次遍历找出全部 .obj / .mtl，交给进程池并行处理，
+每个文件先写临时文件再原子替换；处理后的文件第一行写入任务标记（'# objBatch task <参数摘要>'），
+中断后重新运行时，第一行带有相同标记的文件视为已完成并跳过，不会重复平移坐标；
+进度文件只用于免去重新打开已记录的文件。
+
+    runObjBatch(path, objMatrix(offset=(xoff, yoff, zoff)), objHeader='powered by esri china hacter\\n',
+                mtlLineFunc=mtlDropTransparency)
+"""
+
+
+PROGRESS_NAME = '.objBatch.progress'
+DONE_MARK = '# objBatch task '
+
+
+# ************************* mtl 逐行处理规则 *************************
+# 输入一行（含换行符），返回新的行，返回 None 时删除该行；需要定义在模块顶层，以便进程池序列化
+
+def mtlDropTransparency(line):
+    # 删除透明度
+    if "	d " in line or "	Tr " in line:
+        return None
+    return line
+
+
+def mtlTgaToPng(line):
+    # 删除透明度及自发光贴图，tga 贴图改为 png，环境光 / 漫反射颜色改为白色
+    if "Tr" in line or "map_Ke" in line or "map_d" in line:
+        return None
+    if ("map_Ka" in line or "map_Kd" in line) and "tga" in line:
+        return line[:-5] + ".png\n"
+    if "	Ka" in line:
+        return "	Ka 1 1 1\n"
+    if "	Kd" in line:
+        return "	Kd 1 1 1\n"
+    return line
+
+
+def transformMtl(srcFile, lineFunc, header=None):
+    """
+    usage: 逐行处理 mtl 文件（按 utf-8 读写），先写临时文件再替换原文件
+    :return: 输出的行数
+    """
+    with open(srcFile, 'r', encoding='utf-8') as rf:
+        lines = [lineFunc(line) for line in rf]
+    lines = [line for line in lines if line is not None]
+
+    tmpFile = srcFile + '.tmp'
+    with open(tmpFile, 'w', encoding='utf-8') as wf:
+        if header:
+            wf.write(header)
+        wf.writelines(lines)
+    os.replace(tmpFile, srcFile)
+    return len(lines)
+
+
+# ************************* 批处理 *************************
+
+def findObjMtl(rootDir):
+    """
+    usage: 遍历目录，找出全部 .obj / .mtl 文件
+    :return: [(kind, path), ....] --- kind 为 'obj' / 'mtl'，同名的 obj 与 mtl 相邻
+    """
+    jobs = []
+    for root, dirs, files in os.walk(rootDir):
+        for f in sorted(files):
+            ext = f[-3:].lower()
+            if ext in ('obj', 'mtl') and f[-4:-3] == '.':
+                jobs.append((ext, os.path.join(root, f)))
+    return jobs
+
+
+def taskKey(mat, objHeader, mtlLineFunc, mtlHeader):
+    """
+    usage: 批处理参数的摘要，进度文件中只跳过相同参数下已完成的文件
+    """
+    md5 = hashlib.md5()
+    md5.update(b'' if mat is None else np.asarray(mat, dtype=np.float64).tobytes())
+    md5.update(repr((objHeader, getattr(mtlLineFunc, '__name__', None), mtlHeader)).encode('utf-8'))
+    return md5.hexdigest()
+
+
+def doneMarker(key):
+    """
+    usage: 写在输出文件第一行的任务标记
+    """
+    return DONE_MARK + key + '\n'
+
+
+def isDone(path, key):
+    """
+    usage: 文件第一行是否为该任务的标记（替换完成后才可见，与进度文件是否写入无关）
+    """
+    with open(path, 'rb') as f:
+        return f.readline().rstrip(b'\r\n') == doneMarker(key).rstrip('\n').encode('utf-8')
+
+
+def _loadProgress(progressFile, key):
+    done = set()
+    if not os.path.exists(progressFile):
+        return done
+    with open(progressFile, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # 中断时最后一行可能不完整
+                continue
+            if record.get('task') == key:
+                done.add(record['file'])
+    return done
+
+
+def _runJob(args):
+    """
+    usage: worker of process pool
+    :return: (relPath, 处理结果 / 错误信息, 是否成功)
+    """
+    kind, path, relPath, key, mat, objHeader, mtlLineFunc, mtlHeader = args
+    try:
+        if isDone(path, key):
+            return relPath, 'already done', True
+        marker = doneMarker(key)
+        # 去掉之前任务留下的标记
+        if kind == 'obj':
+            return relPath, transformObj(path, mat, header=marker + (objHeader or ''), dropPrefix=DONE_MARK), True
+        lineFunc = lambda line: None if line.startswith(DONE_MARK) else mtlLineFunc(line)
+        return relPath, transformMtl(path, lineFunc, marker + (mtlHeader or '')), True
+    except Exception as e:
+        return relPath, f'{type(e).__name__}: {e}', False
+
+
+def runObjBatch(rootDir, mat=None, objHeader=None, mtlLineFunc=None, mtlHeader=None, processNum=None,
+                progressFile=None):
+    """
+    usage: 并行处理目录中的全部 obj / mtl，支持中断后继续
+    :param rootDir: str, 输入目录
+    :param mat: 4x4 仿射矩阵（见 objTransform.objMatrix），为空时不处理 obj
+    :param objHeader: str, 写在 obj 开头的内容
+    :param mtlLineFunc: mtl 逐行处理规则，为空时不处理 mtl
+    :param mtlHeader: str, 写在 mtl 开头的内容
+    :param processNum: int, 进程数量，默认为 cpu 数量
+    :param progressFile: str, 进度文件，默认为 rootDir 下的 .objBatch.progress
+    :return: {'done': [...], 'skipped': [...], 'failed': {relPath: 错误信息}}
+    """
+    progressFile = progressFile or os.path.join(rootDir, PROGRESS_NAME)
+    key = taskKey(mat, objHeader, mtlLineFunc, mtlHeader)
+    finished = _loadProgress(progressFile, key)
+
+    jobs = []
+    skipped = []
+    for kind, path in findObjMtl(rootDir):
+        if (kind == 'obj' and mat is None) or (kind == 'mtl' and mtlLineFunc is None):
+            continue
+        relPath = os.path.relpath(path, rootDir)
+        if relPath in finished:
+            skipped.append(relPath)
+            continue
+        jobs.append((kind, path, relPath, key, mat, objHeader, mtlLineFunc, mtlHeader))
+
+    print(f'total: {len(jobs) + len(skipped)}, skipped: {len(skipped)}')
+    res = {'done': [], 'skipped': skipped, 'failed': {}}
+    if not jobs:
+        return res
+
+    processNum = min(processNum or cpu_count(), len(jobs))
+    # 只有主进程写进度文件，每完成一个文件立即写入；写入之前中断时由文件中的任务标记判断是否已完成
+    with open(progressFile, 'a', encoding='utf-8') as pf, Pool(processNum) as pool:
+        for i, (relPath, info, success) in enumerate(pool.imap_unordered(_runJob, jobs)):
+            if success:
+                pf.write(json.dumps({'task': key, 'file': relPath}, ensure_ascii=False) + '\n')
+                pf.flush()
+                res['done'].append(relPath)
+            else:
+                res['failed'][relPath] = info
+                print(f'failed: {relPath} --- {info}')
+            if i % 50 == 0:
+                print(f'{i + 1} / {len(jobs)}')
+
+    print(f'done: {len(res["done"])}, failed: {len(res["failed"])}')
+    return res
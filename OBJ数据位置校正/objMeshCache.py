@@ -0,0 +1,409 @@
+import json, os, re, shutil
+import numpy as np
+
+from objTransform import applyMatrix, formatVertexLines, iterChunkLines
+
+
+"""
+OBJ 二进制缓存 —— 文本 OBJ 只解析一次，顶点 / 纹理坐标 / 法线 / 面索引保存为 .npy，
+之后以内存映射方式读取，反复尝试不同的平移、轴交换参数时直接变换并导出 OBJ，不再重新解析文本。
+
+    <obj>.objcache/
+        v.npy (N, 3) float64          vt.npy (M, 2|3) float64      vn.npy (K, 3) float64
+        v_extra.npy (N, E) float64    --- v 记录中 x y z 之后的数值（如顶点颜色），不参与变换，导出时原样追加
+        face_indptr.npy (F + 1,)      --- 第 i 个面的角点为 [indptr[i], indptr[i + 1])
+        face_v.npy / face_vt.npy / face_vn.npy (C,) int32 --- 从 1 开始的绝对索引，0 表示缺失
+        face_mtl.npy (F,) int32       --- 材质表 meta['materials'] 中的序号，-1 表示未指定
+        meta.json                     --- 材质表、mtllib、其他记录（o / g / s / usemtl ...）及其所在的面序号，
+                                          v_extra / vt / vn 在源文件中的小数位数
+
+    cache = objMeshCache.build(r'E:\\obj\\qiao.obj')          # 缓存已存在且源文件未变化时直接读取
+    cache.exportObj(r'E:\\obj\\new.obj', objMatrix(offset=(629452.8281, 0, 3546467.041)))
+"""
+
+
+CACHE_VERSION = 2
+FLOAT_ARRAYS = ('v', 'vt', 'vn')
+EXTRA_ARRAY = 'v_extra'
+INDEX_ARRAYS = ('face_v', 'face_vt', 'face_vn', 'face_mtl')
+
+
+class ObjCacheError(Exception):
+    pass
+
+
+def defaultCacheDir(objFile):
+    return objFile + '.objcache'
+
+
+class _arrayAppender:
+    """
+    usage: 分块追加写入原始数据，结束时转换为 .npy，解析时不需要在内存中保存整个数组
+    """
+
+    def __init__(self, npyFile, dtype, colNum=None):
+        self.npyFile = npyFile
+        self.rawFile = npyFile + '.raw'
+        self.dtype = np.dtype(dtype)
+        self.colNum = colNum
+        self.rowNum = 0
+        self.f = open(self.rawFile, 'wb')
+
+    def append(self, arr):
+        if arr.shape[0] == 0:
+            return
+        arr = np.ascontiguousarray(arr, dtype=self.dtype)
+        if arr.ndim == 2:
+            if self.colNum is None:
+                self.colNum = arr.shape[1]
+            elif self.colNum != arr.shape[1]:
+                raise ObjCacheError(f'Column number of {os.path.basename(self.npyFile)} changes '
+                                    f'from {self.colNum} to {arr.shape[1]}')
+        self.f.write(arr.tobytes())
+        self.rowNum += arr.shape[0]
+
+    def finish(self, blockRows=4 * 1024 * 1024):
+        self.f.close()
+        shape = (self.rowNum,) if self.colNum is None else (self.rowNum, self.colNum)
+        out = np.lib.format.open_memmap(self.npyFile, mode='w+', dtype=self.dtype, shape=shape)
+        rowSize = int(np.prod(shape[1:], dtype=np.int64))
+        with open(self.rawFile, 'rb') as rf:
+            for k in range(0, self.rowNum, blockRows):
+                rows = min(blockRows, self.rowNum - k)
+                out[k:k + rows] = np.fromfile(rf, dtype=self.dtype, count=rows * rowSize).reshape((rows,) + shape[1:])
+        out.flush()
+        del out
+        os.remove(self.rawFile)
+
+
+def _parseFloatRecords(recLines):
+    """
+    usage: 批量解析 v / vt / vn 记录中标记之后的数值
+    :return: numpy.ndarray (n, k)
+    """
+    tokens = b' '.join(recLines).split()
+    colNum = len(tokens) // len(recLines)
+    if colNum * len(recLines) == len(tokens):
+        arr = np.array(tokens, dtype=bytes).reshape(len(recLines), colNum)
+        if np.all(arr[:, 0] == arr[0, 0]):
+            return arr[:, 1:].astype(np.float64)
+
+    rows = [line.split()[1:] for line in recLines]
+    colNum = min(len(each) for each in rows)
+    return np.array([each[:colNum] for each in rows], dtype=np.float64)
+
+
+def _decimals(recLines):
+    """
+    usage: 记录中数值的最大小数位数，出现科学计数法时返回 None
+    """
+    text = b' '.join(recLines)
+    if re.search(rb'\d[eE]', text):
+        return None
+    return max((len(each) for each in re.findall(rb'\.(\d+)', text)), default=0)
+
+
+def _mergeDecimals(old, new):
+    if old == 'e' or new is None:
+        return 'e'
+    return new if old is None else max(old, new)
+
+
+def _decimalFormat(decimals):
+    if decimals is None:
+        return '%.6f'
+    return '%.17g' if decimals == 'e' else f'%.{decimals}f'
+
+
+def _parseCorners(corners):
+    """
+    usage: 批量解析面角点 'v' / 'v/vt' / 'v//vn' / 'v/vt/vn'
+    :return: numpy.ndarray (C, 3) int64 --- v, vt, vn，缺失为 0
+    """
+    res = np.zeros((len(corners), 3), dtype=np.int64)
+    text = b' '.join(corners).replace(b'//', b'/0/')
+    slashNum = corners[0].replace(b'//', b'/0/').count(b'/')
+    if all(each.count(b'/') == slashNum for each in text.split()):
+        tokens = text.replace(b'/', b' ').split()
+        res[:, :slashNum + 1] = np.array(tokens, dtype=np.int64).reshape(len(corners), slashNum + 1)
+        return res
+
+    # 同一个文件中角点格式不一致时逐个解析
+    for i, corner in enumerate(corners):
+        for j, each in enumerate(corner.split(b'/')):
+            res[i, j] = int(each) if each else 0
+    return res
+
+
+class objMeshCache:
+    """
+    usage: OBJ 二进制缓存，数组以内存映射方式读取
+    """
+
+    def __init__(self, cacheDir):
+        metaFile = os.path.join(cacheDir, 'meta.json')
+        if not os.path.exists(metaFile):
+            raise ObjCacheError(f'{cacheDir} is not an obj cache')
+        with open(metaFile, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != CACHE_VERSION:
+            raise ObjCacheError(f'Version of {cacheDir} is not supported')
+
+        self.cacheDir = cacheDir
+        for name in FLOAT_ARRAYS + (EXTRA_ARRAY,) + INDEX_ARRAYS + ('face_indptr',):
+            setattr(self, name, np.load(os.path.join(cacheDir, name + '.npy'), mmap_mode='r'))
+        self.materials = self.meta['materials']
+
+    @staticmethod
+    def isValid(objFile, cacheDir=None):
+        """
+        usage: 缓存是否存在且与源文件的大小、修改时间一致
+        """
+        metaFile = os.path.join(cacheDir or defaultCacheDir(objFile), 'meta.json')
+        try:
+            with open(metaFile, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            st = os.stat(objFile)
+        except (OSError, ValueError):
+            return False
+        return (meta.get('version') == CACHE_VERSION and meta.get('sourceSize') == st.st_size
+                and meta.get('sourceMtime') == st.st_mtime)
+
+    @classmethod
+    def build(cls, objFile, cacheDir=None, rebuild=False, chunkSize=64 * 1024 * 1024):
+        """
+        usage: 流式解析 OBJ 并生成缓存，缓存有效时直接读取
+        :param objFile: str, 输入 obj
+        :param cacheDir: str, 缓存目录，默认为 '<objFile>.objcache'
+        :param rebuild: bool, 是否强制重新生成
+        :return: objMeshCache
+        """
+        cacheDir = cacheDir or defaultCacheDir(objFile)
+        if not rebuild and cls.isValid(objFile, cacheDir):
+            return cls(cacheDir)
+
+        tmpDir = cacheDir + '.tmp'
+        shutil.rmtree(tmpDir, ignore_errors=True)
+        os.makedirs(tmpDir)
+
+        st = os.stat(objFile)
+        writers = {name: _arrayAppender(os.path.join(tmpDir, name + '.npy'), np.float64)
+                   for name in FLOAT_ARRAYS + (EXTRA_ARRAY,)}
+        writers.update({name: _arrayAppender(os.path.join(tmpDir, name + '.npy'), np.int32) for name in INDEX_ARRAYS})
+        writers['face_indptr'] = _arrayAppender(os.path.join(tmpDir, 'face_indptr.npy'), np.int64)
+        writers['face_indptr'].append(np.zeros(1, dtype=np.int64))
+
+        counts = {'v': 0, 'vt': 0, 'vn': 0, 'f': 0, 'corner': 0}
+        decimals = {EXTRA_ARRAY: None, 'vt': None, 'vn': None}
+        materials = []
+        materialIndex = {}
+        currentMtl = -1
+        head = []
+        events = []
+        try:
+            with open(objFile, 'rb') as rf:
+                for lines, _ in iterChunkLines(rf, chunkSize):
+                    currentMtl = cls._parseChunk(lines, writers, counts, decimals, materials, materialIndex,
+                                                 currentMtl, head, events)
+            for each in writers.values():
+                each.finish()
+        except BaseException:
+            for each in writers.values():
+                each.f.close()
+            shutil.rmtree(tmpDir, ignore_errors=True)
+            raise
+
+        meta = {'version': CACHE_VERSION, 'source': os.path.abspath(objFile), 'sourceSize': st.st_size,
+                'sourceMtime': st.st_mtime, 'materials': materials, 'head': head, 'events': events,
+                'counts': counts, 'decimals': decimals}
+        with open(os.path.join(tmpDir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        shutil.rmtree(cacheDir, ignore_errors=True)
+        os.replace(tmpDir, cacheDir)
+        return cls(cacheDir)
+
+    @staticmethod
+    def _parseChunk(lines, writers, counts, decimals, materials, materialIndex, currentMtl, head, events):
+        kinds = []
+        for line in lines:
+            tag = line[:3]
+            if tag[:2] in (b'v ', b'v\t'):
+                kinds.append(0)
+            elif tag in (b'vt ', b'vt\t'):
+                kinds.append(1)
+            elif tag in (b'vn ', b'vn\t'):
+                kinds.append(2)
+            elif tag[:2] in (b'f ', b'f\t'):
+                kinds.append(3)
+            else:
+                kinds.append(4)
+        kinds = np.array(kinds, dtype=np.int8)
+
+        for kind, name in enumerate(FLOAT_ARRAYS):
+            index = np.nonzero(kinds == kind)[0]
+            if not index.size:
+                continue
+            recLines = [lines[i] for i in index.tolist()]
+            arr = _parseFloatRecords(recLines)
+            if name == 'v':
+                if arr.shape[1] < 3:
+                    raise ObjCacheError(f'Invalid vertex record --- {recLines[0][:80]}')
+                # 只有 x y z 参与变换，之后的数值单独保存
+                writers['v'].append(arr[:, :3])
+                writers[EXTRA_ARRAY].append(arr[:, 3:])
+                if arr.shape[1] > 3:
+                    decimals[EXTRA_ARRAY] = _mergeDecimals(decimals[EXTRA_ARRAY],
+                                                           _decimals([b' '.join(each.split(None, 4)[4:]) for each in recLines]))
+            else:
+                writers[name].append(arr)
+                decimals[name] = _mergeDecimals(decimals[name], _decimals(recLines))
+
+        # 每一行之前已有的 v / vt / vn 数量，用于把负数（相对）索引转换为绝对索引
+        before = {name: counts[name] + np.cumsum(kinds == kind) - (kinds == kind)
+                  for kind, name in enumerate(FLOAT_ARRAYS)}
+
+        faceLines = np.nonzero(kinds == 3)[0]
+        faceMtl = np.full(faceLines.size, currentMtl, dtype=np.int32)
+
+        # 其他记录：按所在的面序号保存，usemtl 同时写入材质表
+        for i in np.nonzero(kinds == 4)[0].tolist():
+            text = lines[i].rstrip(b'\r').decode('utf-8', errors='replace')
+            if not text.strip():
+                continue
+            faceCursor = int(np.searchsorted(faceLines, i))
+            faceIndex = counts['f'] + faceCursor
+            if text.startswith('usemtl'):
+                name = text[6:].strip()
+                if name not in materialIndex:
+                    materialIndex[name] = len(materials)
+                    materials.append(name)
+                currentMtl = materialIndex[name]
+                faceMtl[faceCursor:] = currentMtl
+            if faceIndex == 0 and counts['v'] + int(before['v'][i]) == 0:
+                head.append(text)
+            else:
+                events.append([faceIndex, text])
+
+        if faceLines.size:
+            cornerLists = [lines[i].split()[1:] for i in faceLines.tolist()]
+            cornerNum = np.array([len(each) for each in cornerLists], dtype=np.int64)
+            corners = _parseCorners([c for each in cornerLists for c in each])
+
+            faceOfCorner = np.repeat(faceLines, cornerNum)
+            for j, name in enumerate(FLOAT_ARRAYS):
+                col = corners[:, j]
+                neg = col < 0
+                col[neg] += before[name][faceOfCorner[neg]] + 1
+                if col.size and col.max() > np.iinfo(np.int32).max:
+                    raise ObjCacheError('Index exceeds int32')
+                writers['face_' + name].append(col)
+
+            writers['face_indptr'].append(counts['corner'] + np.cumsum(cornerNum))
+            writers['face_mtl'].append(faceMtl)
+            counts['corner'] += int(cornerNum.sum())
+
+        for kind, name in enumerate(FLOAT_ARRAYS):
+            counts[name] += int(np.count_nonzero(kinds == kind))
+        counts['f'] += int(faceLines.size)
+        return currentMtl
+
+    def vertices(self, mat=None):
+        """
+        :param mat: 4x4 仿射矩阵，为空时返回原始坐标（内存映射）
+        """
+        if mat is None:
+            return self.v
+        return applyMatrix(np.asarray(self.v), np.asarray(mat, dtype=np.float64))
+
+    def exportObj(self, dstFile, mat=None, fmt='%f', attrFmt=None, header=None, blockSize=1024 * 1024):
+        """
+        usage: 变换顶点并导出 OBJ —— 顶点、纹理坐标、法线在前，面及 o / g / usemtl 等记录按原顺序在后
+        :param dstFile: str, 输出 obj
+        :param mat: 4x4 仿射矩阵，见 objTransform.objMatrix
+        :param fmt: str, 顶点坐标格式
+        :param attrFmt: str, 顶点附加数值、纹理坐标、法线的格式，为空时保持源文件中的小数位数
+        :param header: str, 写在文件开头的内容
+        :param blockSize: int, 每次格式化的记录数量
+        """
+        mat = None if mat is None else np.asarray(mat, dtype=np.float64)
+        tmpFile = dstFile + '.tmp'
+        with open(tmpFile, 'wb', buffering=1024 * 1024) as wf:
+            if header:
+                wf.write(header.encode('utf-8'))
+            for text in self.meta['head']:
+                wf.write(text.encode('utf-8') + b'\n')
+
+            decimals = self.meta['decimals']
+            hasExtra = self.v_extra.ndim == 2 and self.v_extra.shape[1] > 0
+            extraFmt = ' '.join([attrFmt or _decimalFormat(decimals[EXTRA_ARRAY])] * self.v_extra.shape[-1])
+            for k in range(0, self.v.shape[0], blockSize):
+                xyz = np.asarray(self.v[k:k + blockSize])
+                if mat is not None:
+                    xyz = applyMatrix(xyz, mat)
+                tails = None
+                if hasExtra:
+                    extra = np.asarray(self.v_extra[k:k + blockSize])
+                    tails = ('\n'.join([extraFmt] * extra.shape[0]) % tuple(extra.ravel().tolist())).encode('ascii') \
+                        .split(b'\n')
+                wf.write(b'\n'.join(formatVertexLines(xyz, tails, fmt=fmt)) + b'\n')
+
+            for name in ('vt', 'vn'):
+                arr = getattr(self, name)
+                if arr.shape[0] == 0:
+                    continue
+                lineFmt = name + ' ' + ' '.join([attrFmt or _decimalFormat(decimals[name])] * arr.shape[1])
+                for k in range(0, arr.shape[0], blockSize):
+                    block = np.asarray(arr[k:k + blockSize])
+                    wf.write(('\n'.join([lineFmt] * block.shape[0]) % tuple(block.ravel().tolist()) + '\n')
+                             .encode('ascii'))
+
+            self._writeFaces(wf, blockSize)
+        os.replace(tmpFile, dstFile)
+
+    def _writeFaces(self, wf, blockSize):
+        events = self.meta['events']
+        eventCursor = 0
+        faceNum = self.face_indptr.shape[0] - 1
+
+        for k in range(0, max(faceNum, 1), blockSize):
+            f1 = min(k + blockSize, faceNum)
+            c0, c1 = int(self.face_indptr[k]), int(self.face_indptr[f1])
+            cornerStr = self._cornerStrings(c0, c1)
+            indptr = np.asarray(self.face_indptr[k:f1 + 1]) - c0
+
+            out = []
+            for i in range(k, f1):
+                while eventCursor < len(events) and events[eventCursor][0] <= i:
+                    out.append(events[eventCursor][1])
+                    eventCursor += 1
+                out.append('f ' + ' '.join(cornerStr[indptr[i - k]:indptr[i - k + 1]]))
+            if out:
+                wf.write(('\n'.join(out) + '\n').encode('utf-8'))
+
+        # 最后一个面之后的记录
+        if eventCursor < len(events):
+            wf.write(('\n'.join(each[1] for each in events[eventCursor:]) + '\n').encode('utf-8'))
+
+    def _cornerStrings(self, c0, c1):
+        fv = np.asarray(self.face_v[c0:c1])
+        fvt = np.asarray(self.face_vt[c0:c1])
+        fvn = np.asarray(self.face_vn[c0:c1])
+        if fv.size == 0:
+            return []
+
+        hasVt = fvt != 0
+        hasVn = fvn != 0
+        # 角点格式一致时批量格式化
+        if hasVt.all() and hasVn.all():
+            values, cornerFmt = np.stack((fv, fvt, fvn), axis=1), '%d/%d/%d'
+        elif hasVt.all() and not hasVn.any():
+            values, cornerFmt = np.stack((fv, fvt), axis=1), '%d/%d'
+        elif hasVn.all() and not hasVt.any():
+            values, cornerFmt = np.stack((fv, fvn), axis=1), '%d//%d'
+        elif not hasVt.any() and not hasVn.any():
+            values, cornerFmt = fv[:, None], '%d'
+        else:
+            return [f'{a}/{b if b else ""}/{c}' if c else (f'{a}/{b}' if b else f'{a}')
+                    for a, b, c in zip(fv.tolist(), fvt.tolist(), fvn.tolist())]
+        return ('\n'.join([cornerFmt] * values.shape[0]) % tuple(values.ravel().tolist())).split('\n')
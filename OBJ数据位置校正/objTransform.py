@@ -0,0 +1,176 @@
+import os
+import numpy as np
+
+
+"""
+OBJ 顶点坐标变换 —— 分块流式读取，v 记录批量解析为 numpy 数组，一次矩阵运算完成变换，
+其余记录原样写出；不再 readlines() 整个文件，也不再逐行拼接字符串，多 GB 的 OBJ 内存占用只与块大小有关。
+
+    mat = objMatrix(offset=(13520542.39, 3696391.63, -1.924))
+    transformObj(r'E:\\obj\\a.obj', mat)                            # 原地改写（先写临时文件再替换）
+    transformObj(r'E:\\obj\\a.obj', mat, r'E:\\obj\\new\\a.obj', header='powered by esri china hacter\\n')
+"""
+
+
+CHUNK_SIZE = 64 * 1024 * 1024
+
+
+class ObjTransformError(Exception):
+    pass
+
+
+def objMatrix(offset=None, scale=None, axisOrder=None, matrix=None):
+    """
+    usage: 组合 4x4 仿射矩阵，依次为 轴交换 -> 缩放 -> 平移 -> 自定义矩阵
+    :param offset: (dx, dy, dz)
+    :param scale: 数值或 (sx, sy, sz)
+    :param axisOrder: 新坐标取自原坐标的哪一轴，如 (0, 2, 1) 为 y / z 交换
+    :param matrix: 4x4 矩阵，最后左乘
+    :return: numpy.ndarray (4, 4)
+    """
+    res = np.eye(4)
+    if axisOrder is not None:
+        swap = np.zeros((4, 4))
+        swap[3, 3] = 1
+        swap[[0, 1, 2], list(axisOrder)] = 1
+        res = swap @ res
+    if scale is not None:
+        res = np.diag(np.append(np.broadcast_to(np.asarray(scale, dtype=np.float64), 3), 1.0)) @ res
+    if offset is not None:
+        move = np.eye(4)
+        move[:3, 3] = offset
+        res = move @ res
+    if matrix is not None:
+        matrix = np.asarray(matrix, dtype=np.float64)
+        if matrix.shape != (4, 4):
+            raise ObjTransformError('Matrix must be shaped as (4, 4)')
+        res = matrix @ res
+    return res
+
+
+def applyMatrix(xyz, mat):
+    """
+    usage: 对 (N, 3) 坐标做仿射变换
+    """
+    return xyz @ mat[:3, :3].T + mat[:3, 3]
+
+
+def _parseVertexLines(vLines):
+    """
+    usage: 批量解析 v 记录
+    :param vLines: [bytes, ....] --- 不含换行符
+    :return: (xyz, tails) --- xyz: (N, 3)，tails: 每行 x y z 之后的内容（如顶点颜色），全部为空时为 None
+    """
+    tokens = b' '.join(vLines).split()
+    colNum = len(tokens) // len(vLines)
+    if colNum >= 4 and colNum * len(vLines) == len(tokens):
+        arr = np.array(tokens, dtype=bytes).reshape(len(vLines), colNum)
+        # 每行第一个为 'v'，否则说明各行字段数不同
+        if np.all(arr[:, 0] == b'v'):
+            xyz = arr[:, 1:4].astype(np.float64)
+            tails = None if colNum == 4 else [b' '.join(each) for each in arr[:, 4:].tolist()]
+            return xyz, tails
+
+    # 字段数量不一致时逐行解析
+    xyz = np.empty((len(vLines), 3))
+    tails = []
+    for i, line in enumerate(vLines):
+        parts = line.split()
+        if len(parts) < 4:
+            raise ObjTransformError(f'Invalid vertex record --- {line[:80]}')
+        xyz[i] = parts[1:4]
+        tails.append(b' '.join(parts[4:]))
+    return xyz, (tails if any(tails) else None)
+
+
+def formatVertexLines(xyz, tails=None, fmt='%f', eol=b''):
+    """
+    usage: 批量格式化 v 记录
+    :return: [bytes, ....]
+    """
+    lineFmt = f'v {fmt} {fmt} {fmt}'
+    text = ('\n'.join([lineFmt] * xyz.shape[0]) % tuple(xyz.ravel().tolist())).encode('ascii')
+    lines = text.split(b'\n')
+    if tails is not None:
+        lines = [line + b' ' + tail if tail else line for line, tail in zip(lines, tails)]
+    if eol:
+        lines = [line + eol for line in lines]
+    return lines
+
+
+def transformLines(lines, mat, fmt='%f'):
+    """
+    usage: 变换一组行中的 v 记录，其余行保持不变
+    :param lines: [bytes, ....] --- 不含 '\\n'，可以含 '\\r'
+    :return: 变换后的顶点数量，lines 原地修改
+    """
+    vIndex = [i for i, line in enumerate(lines) if line[:2] == b'v ' or line[:2] == b'v\t']
+    if not vIndex:
+        return 0
+
+    eol = b'\r' if lines[vIndex[0]].endswith(b'\r') else b''
+    xyz, tails = _parseVertexLines([lines[i] for i in vIndex])
+    newLines = formatVertexLines(applyMatrix(xyz, mat), tails, fmt, eol)
+    for i, line in zip(vIndex, newLines):
+        lines[i] = line
+    return len(vIndex)
+
+
+def iterChunkLines(fileObj, chunkSize=CHUNK_SIZE):
+    """
+    usage: 按块读取二进制文件，每次返回完整的若干行（不含 '\\n'），最后一块可能不以换行结尾
+    :return: (lines, endWithNewline)
+    """
+    rest = b''
+    while True:
+        data = fileObj.read(chunkSize)
+        if not data:
+            break
+        data = rest + data
+        cut = data.rfind(b'\n')
+        if cut < 0:
+            rest = data
+            continue
+        rest = data[cut + 1:]
+        yield data[:cut].split(b'\n'), True
+    if rest:
+        yield rest.split(b'\n'), False
+
+
+def transformObj(srcFile, mat, dstFile=None, header=None, fmt='%f', chunkSize=CHUNK_SIZE, dropPrefix=None):
+    """
+    usage: 流式变换 OBJ 文件中的全部顶点
+    :param srcFile: str, 输入 obj
+    :param mat: 4x4 仿射矩阵，见 objMatrix
+    :param dstFile: str, 输出 obj，为空时原地改写
+    :param header: str, 写在文件开头的内容
+    :param fmt: str, 坐标格式
+    :param chunkSize: int, 每次读取的字节数
+    :param dropPrefix: str, 删除以此开头的行（如之前写入的 header）
+    :return: 变换的顶点数量
+    """
+    mat = np.asarray(mat, dtype=np.float64)
+    dstFile = dstFile or srcFile
+    tmpFile = dstFile + '.tmp'
+
+    dropPrefix = dropPrefix.encode('utf-8') if dropPrefix else None
+    vertexNum = 0
+    try:
+        with open(srcFile, 'rb') as rf, open(tmpFile, 'wb', buffering=1024 * 1024) as wf:
+            if header:
+                wf.write(header.encode('utf-8'))
+            for lines, endWithNewline in iterChunkLines(rf, chunkSize):
+                if dropPrefix:
+                    lines = [line for line in lines if not line.startswith(dropPrefix)]
+                    if not lines:
+                        continue
+                vertexNum += transformLines(lines, mat, fmt)
+                wf.write(b'\n'.join(lines))
+                if endWithNewline:
+                    wf.write(b'\n')
+        os.replace(tmpFile, dstFile)
+    except BaseException:
+        if os.path.exists(tmpFile):
+            os.remove(tmpFile)
+        raise
+    return vertexNum
@@ -1,20 +1,9 @@
-import os
+from objBatch import runObjBatch, mtlDropTransparency
 
 
 path = r'E:\cesium\objtest'
-for root, dirs, files in os.walk(path):
-    for f in files:
-        if f[-3:] == "mtl":
-            newmtl = ""
-            mtlpath = os.path.join(root, f)
-            print(mtlpath)
-            with open(mtlpath, 'r')as rf:
-                lines = rf.readlines()
-                for line in lines:
-                    if "	Tr " in line or "	d " in line:
-                        pass
-                    else:
-                        newmtl += line
-            with open(mtlpath, 'w')as rf:
-                rf.write(newmtl)
-print("finish!")
+
+# 进程池并行处理全部 mtl，中断后重新运行会跳过已完成的文件
+if __name__ == "__main__":
+    runObjBatch(path, mtlLineFunc=mtlDropTransparency)
+    print("finish!")
@@ -1,37 +1,13 @@
-import os
+from objTransform import objMatrix
+from objBatch import runObjBatch, mtlDropTransparency
 
 xoff = 121.4558094
 yoff = 31.4876612
 zoff = 0
+mat = objMatrix(offset=(xoff, yoff, zoff))
 path = r'E:\cesium\objtest'
-for root, dirs, files in os.walk(path):
-    for f in files:
-        if f[-3:] == "mtl":
-            newmtl = ""
-            mtlpath = os.path.join(root, f)
-            print(mtlpath)
-            with open(mtlpath, 'r')as rf:
-                lines = rf.readlines()
-                for line in lines:
-                    if "	Tr " in line or "	d " in line:
-                        pass
-                    else:
-                        newmtl += line
-            with open(mtlpath, 'w')as rf:
-                rf.write(newmtl)
-        if f[-3:] == "obj":
-            newobj = "powered by esri china hacter\n"
-            objpath = os.path.join(root, f)
-            print(objpath)
-            with open(objpath, 'r')as rf:
-                lines = rf.readlines()
-                for line in lines:
-                    if line[:2] == "v ":
-                        temp = line.rstrip().split(" ")
-                        newobj += "v %f %f %f\n" % (
-                            float(temp[-3]) + xoff, float(temp[-2]) + yoff, float(temp[-1]) + zoff)
-                    else:
-                        newobj += line
-            with open(objpath, 'w')as rf:
-                rf.write(newobj)
-print("finish!")
+
+# 进程池并行处理全部 obj / mtl，中断后重新运行会跳过已完成的文件
+if __name__ == "__main__":
+    runObjBatch(path, mat, objHeader="powered by esri china hacter\n", mtlLineFunc=mtlDropTransparency)
+    print("finish!")
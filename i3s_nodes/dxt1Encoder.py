@@ -0,0 +1,153 @@
+import struct
+import numpy as np
+from PIL import Image
+
+
+"""
+BC1 / DXT1 编码 —— 纯 numpy 实现，不再依赖外部 nvdxt.exe
+
+    一次处理整张图片的全部 4x4 块（超大图片按块分批，限制内存）：
+    主成分方向上取端点，量化为 RGB565，块内每个像素取调色板中最近的颜色。
+
+    ddsData = imageToDDS(Image.open('0.jpg'))                 # 相当于 nvdxt -dxt1a -nomipmap
+    ddsData = imageToDDS(Image.open('0.jpg'), mipmaps=True)
+"""
+
+
+# DDS 头中的标记
+DDSD_CAPS = 0x1
+DDSD_HEIGHT = 0x2
+DDSD_WIDTH = 0x4
+DDSD_PIXELFORMAT = 0x1000
+DDSD_MIPMAPCOUNT = 0x20000
+DDSD_LINEARSIZE = 0x80000
+DDPF_FOURCC = 0x4
+DDSCAPS_COMPLEX = 0x8
+DDSCAPS_TEXTURE = 0x1000
+DDSCAPS_MIPMAP = 0x400000
+
+
+def imageBlocks(rgb):
+    """
+    usage: 将图片切分为 4x4 块，边缘不足 4 个像素时重复最后一行 / 列
+    :param rgb: numpy.ndarray (h, w, 3)
+    :return: numpy.ndarray (blockNum, 16, 3) --- 块按行优先排列，块内像素按行优先排列
+    """
+    h, w = rgb.shape[:2]
+    padH = (-h) % 4
+    padW = (-w) % 4
+    if padH or padW:
+        rgb = np.pad(rgb, ((0, padH), (0, padW), (0, 0)), mode='edge')
+    by, bx = rgb.shape[0] // 4, rgb.shape[1] // 4
+    return rgb.reshape(by, 4, bx, 4, 3).transpose(0, 2, 1, 3, 4).reshape(-1, 16, 3)
+
+
+def _to565(colors):
+    r = np.rint(colors[:, 0] * (31 / 255)).astype(np.uint16)
+    g = np.rint(colors[:, 1] * (63 / 255)).astype(np.uint16)
+    b = np.rint(colors[:, 2] * (31 / 255)).astype(np.uint16)
+    return (r << 11) | (g << 5) | b
+
+
+def _from565(c):
+    r = (c >> 11) & 0x1f
+    g = (c >> 5) & 0x3f
+    b = c & 0x1f
+    return np.stack(((r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)), axis=-1).astype(np.float32)
+
+
+def encodeBlocks(blocks, iterNum=4):
+    """
+    usage: 编码 DXT1 块（四色模式）
+    :param blocks: numpy.ndarray (blockNum, 16, 3)
+    :param iterNum: 幂迭代次数，用于求块内颜色的主成分方向
+    :return: numpy.ndarray (blockNum, 8) uint8 --- 每块 color0, color1 (uint16), 索引 (uint32)，小端
+    """
+    blocks = blocks.astype(np.float32)
+    mean = blocks.mean(axis=1, keepdims=True)
+    centered = blocks - mean
+
+    # 主成分方向 —— 协方差矩阵幂迭代，初值为外包盒对角线
+    cov = np.einsum('bpi,bpj->bij', centered, centered)
+    axis = blocks.max(axis=1) - blocks.min(axis=1)
+    for i in range(iterNum):
+        axis = np.einsum('bij,bj->bi', cov, axis)
+        norm = np.linalg.norm(axis, axis=1, keepdims=True)
+        axis = np.divide(axis, norm, out=np.full_like(axis, 1 / np.sqrt(3)), where=norm > 0)
+
+    proj = np.einsum('bpi,bi->bp', centered, axis)
+    mean = mean[:, 0]
+    maxColor = np.clip(mean + proj.max(axis=1)[:, None] * axis, 0, 255)
+    minColor = np.clip(mean + proj.min(axis=1)[:, None] * axis, 0, 255)
+
+    c0 = _to565(maxColor)
+    c1 = _to565(minColor)
+    # 四色模式要求 color0 > color1
+    swap = c0 < c1
+    c0[swap], c1[swap] = c1[swap], c0[swap].copy()
+
+    p0 = _from565(c0)
+    p1 = _from565(c1)
+    palette = np.stack((p0, p1, (2 * p0 + p1) / 3, (p0 + 2 * p1) / 3), axis=1)
+
+    dis = ((blocks[:, :, None, :] - palette[:, None, :, :]) ** 2).sum(axis=-1)
+    indices = dis.argmin(axis=-1).astype(np.uint32)
+    # color0 == color1 时为三色模式，索引 3 为透明色，全部使用索引 0
+    indices[c0 == c1] = 0
+
+    packed = (indices << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+
+    res = np.empty((blocks.shape[0], 8), dtype=np.uint8)
+    res[:, 0:2] = c0.astype('<u2').view(np.uint8).reshape(-1, 2)
+    res[:, 2:4] = c1.astype('<u2').view(np.uint8).reshape(-1, 2)
+    res[:, 4:8] = packed.astype('<u4').view(np.uint8).reshape(-1, 4)
+    return res
+
+
+def encodeImage(img, chunkBlocks=65536):
+    """
+    usage: 编码一张图片（不含 DDS 头）
+    :param img: PIL.Image
+    :param chunkBlocks: 每批编码的块数量
+    :return: bytes
+    """
+    blocks = imageBlocks(np.asarray(img.convert('RGB')))
+    return b''.join(encodeBlocks(blocks[k:k + chunkBlocks]).tobytes()
+                    for k in range(0, max(blocks.shape[0], 1), chunkBlocks))
+
+
+def ddsHeader(width, height, mipMapCount=1):
+    flags = DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_LINEARSIZE
+    caps = DDSCAPS_TEXTURE
+    if mipMapCount > 1:
+        flags |= DDSD_MIPMAPCOUNT
+        caps |= DDSCAPS_COMPLEX | DDSCAPS_MIPMAP
+    linearSize = max(1, (width + 3) // 4) * max(1, (height + 3) // 4) * 8
+
+    pixelFormat = struct.pack('<II4s5I', 32, DDPF_FOURCC, b'DXT1', 0, 0, 0, 0, 0)
+    header = struct.pack('<7I', 124, flags, height, width, linearSize, 0, mipMapCount)
+    header += b'\x00' * 44 + pixelFormat + struct.pack('<5I', caps, 0, 0, 0, 0)
+    return b'DDS ' + header
+
+
+def imageToDDS(img, mipmaps=False):
+    """
+    usage: PIL 图片转 DXT1 格式的 dds
+    :param img: PIL.Image
+    :param mipmaps: bool, 是否生成 mipmap（逐级缩小一半直到 1x1）
+    :return: bytes
+    """
+    img = img.convert('RGB')
+    width, height = img.size
+    levels = [img]
+    if mipmaps:
+        while levels[-1].size != (1, 1):
+            w, h = levels[-1].size
+            levels.append(levels[-1].resize((max(1, w // 2), max(1, h // 2)), Image.BOX))
+
+    return ddsHeader(width, height, len(levels)) + b''.join(encodeImage(each) for each in levels)
+
+
+def imageToDDSWithMipmaps(img):
+    # 可以被进程池序列化的 mipmap 版本
+    return imageToDDS(img, mipmaps=True)
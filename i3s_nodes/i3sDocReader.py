@@ -0,0 +1,107 @@
+import gzip, os, json, zipfile
+
+
+"""
+i3s 文档读取 —— .gz 文档直接在内存中解压并解析为 json，不再解压到同级目录后重新读取再删除
+
+    doc = readJsonDoc(r'E:\\slpk\\max\\nodes\\1\\3dNodeIndexDocument.json.gz')
+
+    # 不解压 .slpk，直接从压缩包中读取
+    with slpkArchive(r'E:\\slpk\\max.slpk') as slpk:
+        for nodeId in slpk.nodeIds():
+            doc = slpk.readNodeDoc(nodeId)
+"""
+
+
+NODE_DOC = '3dNodeIndexDocument.json'
+
+
+class i3sDocNotFound(Exception):
+    pass
+
+
+def loadJsonGz(fileObj):
+    """
+    usage: 从文件对象中流式解压并解析 json
+    :param fileObj: 二进制文件对象（本地文件 / zip 中的成员）
+    """
+    with gzip.GzipFile(fileobj=fileObj, mode='rb') as g:
+        return json.load(g)
+
+
+def readJsonDoc(docFile):
+    """
+    usage: 读取 .json 或 .json.gz 文档，.gz 在内存中解压
+    """
+    with open(docFile, 'rb') as f:
+        if docFile.endswith('.gz'):
+            return loadJsonGz(f)
+        return json.load(f)
+
+
+def findNodeDoc(nodeDir):
+    """
+    usage: 查找节点目录中的 3dNodeIndexDocument，优先使用 .json.gz
+    :return: (docFile, os.stat_result) / None
+    """
+    for docName in (NODE_DOC + '.gz', NODE_DOC):
+        docFile = os.path.join(nodeDir, docName)
+        try:
+            return docFile, os.stat(docFile)
+        except OSError:
+            continue
+    return None
+
+
+class slpkArchive:
+    """
+    usage: 直接读取 .slpk（zip）中的文档，不解压到磁盘
+     --- 压缩包中的成员路径形如 nodes/<nodeId>/3dNodeIndexDocument.json.gz
+    """
+
+    def __init__(self, slpkFile):
+        self.slpkFile = slpkFile
+        self.zf = zipfile.ZipFile(slpkFile, 'r')
+
+        # nodeId -> 文档的 ZipInfo
+        self.nodeDocs = {}
+        for info in self.zf.infolist():
+            parts = info.filename.replace('\\', '/').split('/')
+            if len(parts) == 3 and parts[0] == 'nodes' and parts[2] in (NODE_DOC + '.gz', NODE_DOC):
+                # 同时存在时优先使用 .json.gz
+                if parts[1] not in self.nodeDocs or parts[2].endswith('.gz'):
+                    self.nodeDocs[parts[1]] = info
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.zf.close()
+
+    def nodeIds(self):
+        return list(self.nodeDocs)
+
+    def readJson(self, name):
+        """
+        usage: 读取压缩包中的任意 json / json.gz 成员，如 '3dSceneLayer.json.gz'
+        """
+        try:
+            info = self.zf.getinfo(name)
+        except KeyError:
+            raise i3sDocNotFound(f'{name} is not exists in {self.slpkFile}')
+        return self._readInfo(info)
+
+    def readNodeDoc(self, nodeId):
+        info = self.nodeDocs.get(str(nodeId))
+        if info is None:
+            raise i3sDocNotFound(f'{NODE_DOC} of node {nodeId} is not exists in {self.slpkFile}')
+        return self._readInfo(info)
+
+    def _readInfo(self, info):
+        with self.zf.open(info, 'r') as f:
+            if info.filename.endswith('.gz'):
+                return loadJsonGz(f)
+            return json.load(f)
@@ -0,0 +1,212 @@
+import hashlib, os, json
+from concurrent.futures import ThreadPoolExecutor
+
+from i3sDocReader import findNodeDoc, readJsonDoc, slpkArchive
+
+
+"""
+i3s 节点树扫描 —— 替代逐层 os.listdir + 串行读取 3dNodeIndexDocument.json 的 buildTree
+
+    nodes 目录只用 os.scandir 遍历一次，每个节点的 3dNodeIndexDocument.json(.gz) 在线程池中读取并在内存中解压，
+    结果为节点表 {id: {'id', 'parent', 'level', 'maxError', 'children'}}；
+    节点表连同每个文档的 mtime / size 保存为旁路索引文件（默认在用户缓存目录中，以路径的哈希区分，不写入场景），
+    再次扫描时只重新读取发生变化的节点。
+    也可以不解压 .slpk，直接扫描压缩包（scanSlpk），此时以文档的 CRC / size 判断是否变化。
+
+    table = scanNodes(r'E:\\slpk\\max\\nodes')
+    table = scanSlpk(r'E:\\slpk\\max.slpk')
+    levelDict = levelNodes(table)          # {level: [nodeId, ....]}
+    resDic = leafPaths(table, withLevel=True)
+"""
+
+
+CACHE_VERSION = 1
+# 旁路索引的默认目录，Windows 为 %LOCALAPPDATA%\i3sNodeScanner，其他系统为 ~/.cache/i3sNodeScanner
+CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache'),
+                         'i3sNodeScanner')
+
+
+class NoRootNodes(Exception):
+    pass
+
+
+def defaultCacheFile(nodesDir):
+    # 旁路索引放在用户缓存目录中，文件名包含绝对路径的哈希，场景目录保持只读
+    absPath = os.path.normcase(os.path.abspath(nodesDir))
+    pathKey = hashlib.md5(absPath.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, f'{os.path.basename(absPath)}_{pathKey}.nodeTable.json')
+
+
+def nodeRecord(docDic):
+    """
+    usage: 从节点文档中提取节点表需要的字段
+    :return: {'id', 'parent', 'level', 'maxError', 'children'}
+    """
+    parent = docDic.get('parentNode') or {}
+    lodSelection = docDic.get('lodSelection') or []
+    maxError = None
+    for each in lodSelection:
+        if each.get('metricType') == 'maxScreenThreshold':
+            maxError = each.get('maxError')
+            break
+    if maxError is None and lodSelection:
+        maxError = lodSelection[0].get('maxError')
+
+    return {'id': str(docDic['id']),
+            'parent': str(parent['id']) if 'id' in parent else None,
+            'level': docDic.get('level'),
+            'maxError': maxError,
+            'children': [str(each['id']) for each in docDic.get('children') or []]}
+
+
+def _statNodeDoc(nodeDir):
+    """
+    :return: (docFile, mtime, size) / None
+    """
+    res = findNodeDoc(nodeDir)
+    if res is None:
+        return None
+    docFile, st = res
+    return docFile, st.st_mtime, st.st_size
+
+
+def _readNodeJob(docFile):
+    return nodeRecord(readJsonDoc(docFile))
+
+
+def _loadCache(cacheFile):
+    try:
+        with open(cacheFile, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get('version') != CACHE_VERSION:
+        return {}
+    return cache.get('nodes', {})
+
+
+def _saveCache(cacheFile, cacheNodes):
+    if os.path.dirname(cacheFile):
+        os.makedirs(os.path.dirname(cacheFile), exist_ok=True)
+    tmpFile = cacheFile + '.tmp'
+    with open(tmpFile, 'w', encoding='utf-8') as f:
+        json.dump({'version': CACHE_VERSION, 'nodes': cacheNodes}, f)
+    os.replace(tmpFile, cacheFile)
+
+
+def _mergeCache(cacheNodes, docStats):
+    """
+    usage: 与旁路索引比较，找出需要重新读取的文档
+    :param docStats: [(key, stamp, size), ....]
+    :return: (newNodes, readList) --- readList: [(key, stamp, size), ....]
+    """
+    newNodes = {}
+    readList = []
+    for key, stamp, size in docStats:
+        cached = cacheNodes.get(key)
+        if cached and cached['mtime'] == stamp and cached['size'] == size:
+            newNodes[key] = cached
+        else:
+            readList.append((key, stamp, size))
+    return newNodes, readList
+
+
+def _finishScan(cacheFile, useCache, cacheNodes, newNodes, readList):
+    print(f'nodes: {len(newNodes)}, read: {len(readList)}, cached: {len(newNodes) - len(readList)}')
+    if useCache and (readList or len(newNodes) != len(cacheNodes)):
+        _saveCache(cacheFile, newNodes)
+    return {each['record']['id']: each['record'] for each in newNodes.values()}
+
+
+def scanNodes(nodesDir, cacheFile=None, useCache=True, threadNum=None):
+    """
+    usage: 扫描 nodes 目录，生成节点表
+    :param nodesDir: str, slpk 解压后的 nodes 目录
+    :param cacheFile: str, 旁路索引文件，默认为用户缓存目录中的 '<目录名>_<路径哈希>.nodeTable.json'，见 defaultCacheFile
+    :param useCache: bool, 是否使用并更新旁路索引
+    :param threadNum: int, 读取文档的线程数量，默认为 min(32, cpu 数量 + 4)
+    :return: {nodeId: {'id', 'parent', 'level', 'maxError', 'children'}, ....}
+    """
+    cacheFile = cacheFile or defaultCacheFile(nodesDir)
+    cacheNodes = _loadCache(cacheFile) if useCache else {}
+
+    with os.scandir(nodesDir) as it:
+        nodeDirs = [each.path for each in it if each.is_dir()]
+
+    with ThreadPoolExecutor(threadNum) as pool:
+        # 查找文档与读取 mtime 也放在线程池中，网络存储上的 stat 同样很慢
+        docStats = [(os.path.relpath(docFile, nodesDir), mtime, size)
+                    for docFile, mtime, size in filter(None, pool.map(_statNodeDoc, nodeDirs))]
+        newNodes, readList = _mergeCache(cacheNodes, docStats)
+
+        records = pool.map(_readNodeJob, [os.path.join(nodesDir, each[0]) for each in readList])
+        for (key, mtime, size), record in zip(readList, records):
+            newNodes[key] = {'mtime': mtime, 'size': size, 'record': record}
+
+    return _finishScan(cacheFile, useCache, cacheNodes, newNodes, readList)
+
+
+def scanSlpk(slpkFile, cacheFile=None, useCache=True):
+    """
+    usage: 不解压，直接扫描 .slpk 中的节点文档，生成节点表
+    :param slpkFile: str, .slpk 文件
+    :param cacheFile: str, 旁路索引文件，默认为用户缓存目录中的 '<文件名>_<路径哈希>.nodeTable.json'，见 defaultCacheFile
+    :return: {nodeId: {'id', 'parent', 'level', 'maxError', 'children'}, ....}
+    """
+    cacheFile = cacheFile or defaultCacheFile(slpkFile)
+    cacheNodes = _loadCache(cacheFile) if useCache else {}
+
+    with slpkArchive(slpkFile) as slpk:
+        # zip 的目录中已经包含 CRC 和大小，不需要读取文档即可判断是否变化
+        nodeIdDic = {info.filename: nodeId for nodeId, info in slpk.nodeDocs.items()}
+        docStats = [(info.filename, info.CRC, info.file_size) for info in slpk.nodeDocs.values()]
+        newNodes, readList = _mergeCache(cacheNodes, docStats)
+
+        for key, crc, size in readList:
+            record = nodeRecord(slpk.readNodeDoc(nodeIdDic[key]))
+            newNodes[key] = {'mtime': crc, 'size': size, 'record': record}
+
+    return _finishScan(cacheFile, useCache, cacheNodes, newNodes, readList)
+
+
+def levelNodes(nodeTable):
+    """
+    usage: 按层级分组节点
+    :return: {level: [nodeId, ....]}
+    """
+    levelDict = {}
+    for nodeId, record in nodeTable.items():
+        levelDict.setdefault(record['level'], []).append(nodeId)
+    return levelDict
+
+
+def leafPaths(nodeTable, rootId='root', withLevel=False, withMaxError=False):
+    """
+    usage: 生成从根节点到每个叶子节点的路径，与原 buildTree 输出的 resDic 相同
+    :param withLevel: 路径中每个节点后附加 (level)
+    :param withMaxError: 路径中每个节点后附加 (level,maxError)
+    :return: {'root.1.5': 3, ....} / {'root(0).1(1).5(2)': 3, ....}
+    """
+    if rootId not in nodeTable:
+        raise NoRootNodes(f'Node {rootId} is not exists')
+
+    def _nodeName(record):
+        if withMaxError:
+            return f"{record['id']}({record['level']},{record['maxError']})"
+        if withLevel:
+            return f"{record['id']}({record['level']})"
+        return record['id']
+
+    resDic = {}
+    # 显式栈，避免层级很深时递归溢出
+    stack = [(nodeTable[rootId], _nodeName(nodeTable[rootId]), 1)]
+    while stack:
+        record, path, depth = stack.pop()
+        children = [nodeTable[each] for each in record['children'] if each in nodeTable]
+        if not children:
+            if record['id'] != rootId:
+                resDic[path] = depth
+            continue
+        for child in reversed(children):
+            stack.append((child, path + '.' + _nodeName(child), depth + 1))
+    return resDic
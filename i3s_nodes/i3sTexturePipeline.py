@@ -0,0 +1,179 @@
+import gzip, io, os, shutil, subprocess, tempfile
+from multiprocessing import Pool
+from PIL import Image
+
+from dxt1Encoder import imageToDDS
+
+
+"""
+i3s 纹理替换 / 压缩流水线 —— 按 层级 -> 节点 映射批量处理
+
+    每个层级的替换图片只编码一次（jpg 压缩 -> dds -> gzip），中间结果全部保存在内存中，
+    同一层级的全部节点共享编码结果，直接写出 .dds.gz；层级编码和节点写出都交给进程池。
+
+    compressTextures(nodesDir, {1: ['1', '5'], 2: [....]}, repJPGDir)         # 默认使用 dxt1Encoder.imageToDDS
+    compressTextures(nodesDir, levelDict, repJPGDir, externalDDSEncoder('D:/softs/soft/ddsInstall/nvdxt.exe'))
+"""
+
+
+DDS_GZ_NAME = '0_0_1.bin.dds.gz'
+JPG_NAME = '0.jpg'
+
+
+class TextureError(Exception):
+    pass
+
+
+class externalDDSEncoder:
+    """
+    usage: 调用外部转换程序（如 nvdxt.exe）生成 dds，只在每个层级调用一次
+     --- 可被进程池序列化，替代每个节点一次的 os.system
+    """
+
+    def __init__(self, exePath, args=('-dxt1a', '-nomipmap')):
+        self.exePath = exePath
+        self.args = tuple(args)
+
+    def __call__(self, img):
+        tempDir = tempfile.mkdtemp()
+        try:
+            jpgFile = os.path.join(tempDir, 'tex.jpg')
+            ddsFile = os.path.join(tempDir, 'tex.dds')
+            img.convert('RGB').save(jpgFile, quality=95)
+            subprocess.run([self.exePath, '-file', jpgFile, '-output', ddsFile, *self.args], check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            with open(ddsFile, 'rb') as f:
+                return f.read()
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise TextureError(f'DDS converter failed --- {e}')
+        finally:
+            shutil.rmtree(tempDir, ignore_errors=True)
+
+
+def encodeTexture(imgFile, ddsEncoder=imageToDDS, quality=1):
+    """
+    usage: 编码一张替换图片，全部在内存中完成
+    :param imgFile: str, 替换图片
+    :param ddsEncoder: callable, PIL.Image -> dds bytes
+    :param quality: int, 写入 dds 前的 jpg 压缩质量
+    :return: (jpgBytes, ddsGzBytes) --- jpgBytes 为原图重新编码的 jpg，ddsGzBytes 为 gzip 后的 dds
+    """
+    with Image.open(imgFile) as img:
+        img = img.convert('RGB')
+
+    jpgBuf = io.BytesIO()
+    img.save(jpgBuf, format='JPEG')
+
+    # 低质量 jpg 压缩后再转 dds（原流程中的 0_com.jpg）
+    comBuf = io.BytesIO()
+    img.save(comBuf, format='JPEG', quality=quality)
+    comBuf.seek(0)
+    with Image.open(comBuf) as comImg:
+        ddsData = ddsEncoder(comImg)
+
+    return jpgBuf.getvalue(), gzip.compress(ddsData)
+
+
+def _atomicWrite(fileName, data):
+    tmpFile = fileName + '.tmp'
+    with open(tmpFile, 'wb') as f:
+        f.write(data)
+    os.replace(tmpFile, fileName)
+
+
+def _encodeLevelJob(args):
+    level, imgFile, ddsEncoder, quality = args
+    return level, encodeTexture(imgFile, ddsEncoder, quality)
+
+
+def _writeNodesJob(args):
+    """
+    usage: worker of process pool —— 将一个层级的编码结果写入一批节点
+    :return: [已写入的节点, ....]
+    """
+    nodesDir, nodeIds, textureDir, jpgData, ddsGzData, writeJpg = args
+    written = []
+    for nodeId in nodeIds:
+        targetDir = os.path.join(nodesDir, str(nodeId), textureDir)
+        if not os.path.isdir(targetDir):
+            continue
+        _atomicWrite(os.path.join(targetDir, DDS_GZ_NAME), ddsGzData)
+        if writeJpg:
+            _atomicWrite(os.path.join(targetDir, JPG_NAME), jpgData)
+        written.append(nodeId)
+    return written
+
+
+def compressTextures(nodesDir, levelDict, repImgDir, ddsEncoder=imageToDDS, textureDir='textures', quality=1,
+                     writeJpg=True, processNum=None, chunkSize=256):
+    """
+    usage: 按层级替换并压缩节点纹理
+    :param nodesDir: str, slpk 解压后的 nodes 目录
+    :param levelDict: {level: [nodeId, ....]} —— 可由 i3sNodeScanner.levelNodes 生成
+    :param repImgDir: str, 替换图片目录，图片名为 '<level>.jpg'
+    :param ddsEncoder: callable, PIL.Image -> dds bytes，需要可以被 pickle，默认为 numpy 实现的 DXT1 编码（无 mipmap）
+    :param textureDir: str, 节点中纹理所在的目录名
+    :param quality: int, 转 dds 前的 jpg 压缩质量
+    :param writeJpg: bool, 是否同时写出 0.jpg
+    :param processNum: int, 进程数量，默认为 cpu 数量；为 1 时不创建进程池
+    :param chunkSize: int, 每个写出任务包含的节点数量
+    :return: {level: [已写入的节点, ....]}
+    """
+    levelJobs = []
+    for level in levelDict:
+        imgFile = os.path.join(repImgDir, str(level) + '.jpg')
+        if not os.path.exists(imgFile):
+            print(f'level {level}: {imgFile} is not exists, skip')
+            continue
+        levelJobs.append((level, imgFile, ddsEncoder, quality))
+
+    pool = Pool(processNum) if processNum != 1 else None
+    try:
+        mapFunc = pool.map if pool else lambda func, jobs: list(map(func, jobs))
+
+        # 每个层级只编码一次
+        encoded = dict(mapFunc(_encodeLevelJob, levelJobs))
+
+        writeJobs = []
+        jobLevels = []
+        for level, (jpgData, ddsGzData) in encoded.items():
+            nodeIds = list(levelDict[level])
+            for k in range(0, len(nodeIds), chunkSize):
+                writeJobs.append((nodesDir, nodeIds[k:k + chunkSize], textureDir, jpgData, ddsGzData, writeJpg))
+                jobLevels.append(level)
+
+        resDict = {level: [] for level in encoded}
+        for level, written in zip(jobLevels, mapFunc(_writeNodesJob, writeJobs)):
+            resDict[level] += written
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    for level, written in resDict.items():
+        print(f'level {level}: {len(written)} nodes')
+    return resDict
+
+
+def replaceNodeTextures(nodesDir, nodeIds, imgFile, ddsEncoder=imageToDDS, textureDir='textures', quality=1,
+                        writeJpg=True, processNum=None, chunkSize=256):
+    """
+    usage: 使用同一张图片替换指定节点的纹理，图片只编码一次
+    :param nodeIds: [nodeId, ....]
+    :param imgFile: str, 替换图片
+    :return: [已写入的节点, ....]
+    """
+    jpgData, ddsGzData = encodeTexture(imgFile, ddsEncoder, quality)
+    nodeIds = list(nodeIds)
+    writeJobs = [(nodesDir, nodeIds[k:k + chunkSize], textureDir, jpgData, ddsGzData, writeJpg)
+                 for k in range(0, len(nodeIds), chunkSize)]
+
+    if processNum == 1 or len(writeJobs) <= 1:
+        results = list(map(_writeNodesJob, writeJobs))
+    else:
+        with Pool(processNum) as pool:
+            results = pool.map(_writeNodesJob, writeJobs)
+
+    written = [nodeId for each in results for nodeId in each]
+    print(f'{imgFile}: {len(written)} nodes')
+    return written
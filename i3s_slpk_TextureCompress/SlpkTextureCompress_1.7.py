@@ -1,6 +1,12 @@
-import gzip, os
+import gzip, os, sys
 from PIL import Image
 
+# 共用 i3s_nodes 中的节点扫描和纹理流水线
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'i3s_nodes'))
+from i3sNodeScanner import scanNodes, levelNodes
+from i3sTexturePipeline import compressTextures
+from dxt1Encoder import imageToDDS
+
 
 # define errors
 class NotDir(Exception):
@@ -12,7 +18,43 @@ class NotExist(Exception):
 
 
 class CompressSLPK:
-    pass
+    """
+    usage: 按层级替换并压缩 slpk（解压后的目录）中的节点纹理
+     --- com = CompressSLPK(r'E:\\slpk\\max', r'E:\\slpk\\Desktop\\16张不同的')
+         com.compress(levels=[1, 2, 3])
+    :param slpkDir: str, slpk 解压后的目录（包含 nodes）
+    :param repImgDir: str, 替换图片目录，图片名为 '<level>.jpg'
+    :param ddsEncoder: callable, PIL.Image -> dds bytes，默认为 numpy 实现的 DXT1 编码
+    """
+
+    def __init__(self, slpkDir, repImgDir, ddsEncoder=imageToDDS, textureDir='textures', quality=1, processNum=None):
+        if not os.path.isdir(slpkDir):
+            raise NotDir(f'{slpkDir} is not a directory')
+        self.nodesDir = os.path.join(slpkDir, 'nodes')
+        if not os.path.isdir(self.nodesDir):
+            raise NotExist(f'{self.nodesDir} is not exists')
+        if not os.path.isdir(repImgDir):
+            raise NotExist(f'{repImgDir} is not exists')
+
+        self.repImgDir = repImgDir
+        self.ddsEncoder = ddsEncoder
+        self.textureDir = textureDir
+        self.quality = quality
+        self.processNum = processNum
+
+    def levelDict(self):
+        return levelNodes(scanNodes(self.nodesDir))
+
+    def compress(self, levels=None):
+        """
+        :param levels: 需要压缩的层级，默认为全部层级
+        :return: {level: [已写入的节点, ....]}
+        """
+        levelDict = self.levelDict()
+        if levels is not None:
+            levelDict = {level: nodeIds for level, nodeIds in levelDict.items() if level in levels}
+        return compressTextures(self.nodesDir, levelDict, self.repImgDir, self.ddsEncoder,
+                                textureDir=self.textureDir, quality=self.quality, processNum=self.processNum)
 
 
 def comPressJPG(dir, newdir):
@@ -25,6 +67,7 @@ def comPressJPG(dir, newdir):
         img.save(newData)
 
 
-dir = r"D:\a\datas"
-newdir = r"D:\a\newdatas"
-comPressJPG(dir, newdir)
+if __name__ == "__main__":
+    dir = r"D:\a\datas"
+    newdir = r"D:\a\newdatas"
+    comPressJPG(dir, newdir)
@@ -1,21 +1,15 @@
 import re, os, sys
 
-objData = './data/大桥/qiao.obj'
-
-i = 0
-newf = open(r'E:\cesium\cesium数据导入测试\obj\长江镇大桥obj_原始\newobj\newobj.obj', 'w')
-with open(objData) as f:
-    for each in f.readlines():
-        dataType = each.replace('  ', ' ').split(' ')[0]
-        if dataType == 'v':
-            data_x = str(float(each.replace('  ', ' ').split(' ')[1]) + 629452.8281)
-            data_y = str(float(each.replace('  ', ' ').split(' ')[3]) + 3546467.041)
-            data_z = each.replace('  ', ' ').split(' ')[2]
-            newdata = dataType + '  ' + data_x + ' ' + data_z + ' ' + data_y + '\n'
-            newf.write(newdata)
-        else:
-            newf.write(each)
+# 共用 OBJ数据位置校正 中的顶点变换和二进制缓存
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'OBJ数据位置校正'))
+from objTransform import objMatrix
+from objMeshCache import objMeshCache
 
+objData = './data/大桥/qiao.obj'
 
+# 第一次运行时解析 obj 并生成 qiao.obj.objcache，之后调整参数只读取缓存
+cache = objMeshCache.build(objData)
 
-newf.close()
\ No newline at end of file
+# x 加 629452.8281，z 加 3546467.041，y 保持不变
+mat = objMatrix(offset=(629452.8281, 0, 3546467.041))
+cache.exportObj(r'E:\cesium\cesium数据导入测试\obj\长江镇大桥obj_原始\newobj\newobj.obj', mat)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Author: ALun
+Usage: 多段线线性参考（里程定位）核心，不依赖 arcpy
+Porject: SH.ShenTong Metro
+
+多段线保存为坐标数组和累计里程数组，按里程定位使用 numpy.searchsorted，
+任意数量的分割点 / 桩号点在一次向量化调用中插值完成。
+"""
+import numpy as np
+
+
+class linearRefError(Exception):
+    pass
+
+
+class linearRefPolyline:
+    """
+    usage: 平面多段线的线性参考对象
+     --- ply = linearRefPolyline([(x1, y1), (x2, y2), ....], startMile=0)
+         xy = ply.interpolate([100, 250.5, 1000])
+         pieces = ply.splitAtMiles([100, 250.5])
+    :param coordsList: (N, 2) 坐标，多余的 z 值等会被忽略
+    :param startMile: 起点里程
+    """
+
+    def __init__(self, coordsList, startMile=0):
+        coords = np.asarray(coordsList, dtype=np.float64)
+        if coords.ndim != 2 or coords.shape[1] < 2:
+            raise linearRefError("Coords must be shaped as (N, 2)")
+        if coords.shape[0] < 2:
+            raise linearRefError("At least two points are needed to build a polyline")
+
+        self.coords = np.ascontiguousarray(coords[:, :2])
+        segLength = np.hypot(*np.diff(self.coords, axis=0).T)
+
+        # miles[i] 为第 i 个节点的里程
+        self.miles = np.empty(self.coords.shape[0], dtype=np.float64)
+        self.miles[0] = startMile
+        np.cumsum(segLength, out=self.miles[1:])
+        self.miles[1:] += startMile
+
+        self.startMile = float(startMile)
+        self.endMile = float(self.miles[-1])
+        self.length = self.endMile - self.startMile
+
+    def locate(self, miles):
+        """
+        usage: 按里程定位所在线段
+        :param miles: 里程值数组，超出范围的里程按起点 / 终点处理
+        :return: (segIndex, ratio) --- 所在线段序号（线段 i 由节点 i, i + 1 组成）及在线段中的比例
+        """
+        miles = np.clip(np.asarray(miles, dtype=np.float64), self.startMile, self.endMile)
+        segIndex = np.searchsorted(self.miles, miles, side="right") - 1
+        segIndex = np.clip(segIndex, 0, self.miles.size - 2)
+
+        segStart = self.miles[segIndex]
+        segLength = self.miles[segIndex + 1] - segStart
+        ratio = np.divide(miles - segStart, segLength, out=np.zeros_like(miles), where=segLength > 0)
+        return segIndex, ratio
+
+    def interpolate(self, miles):
+        """
+        usage: 计算任意数量里程点的坐标
+        :param miles: 里程值数组
+        :return: numpy.ndarray --- shape (M, 2)
+        """
+        segIndex, ratio = self.locate(miles)
+        start = self.coords[segIndex]
+        return start + ratio[:, None] * (self.coords[segIndex + 1] - start)
+
+    def splitAtMiles(self, cutMiles):
+        """
+        usage: 在给定里程处打断多段线，返回首尾相接、覆盖整条线的各段
+        :param cutMiles: 打断点里程，自动排序去重，线范围以外的里程被忽略
+        :return: [(coords, startMile, endMile), ....] --- coords 为 (K, 2) 数组
+        """
+        cutMiles = np.unique(np.asarray(cutMiles, dtype=np.float64))
+        cutMiles = cutMiles[(cutMiles > self.startMile) & (cutMiles < self.endMile)]
+
+        bounds = np.concatenate(([self.startMile], cutMiles, [self.endMile]))
+        boundXY = np.vstack((self.coords[:1], self.interpolate(cutMiles), self.coords[-1:]))
+
+        # 每段内部的节点范围 [first, last)，节点里程严格位于段的起止里程之间
+        first = np.searchsorted(self.miles, bounds[:-1], side="right")
+        last = np.searchsorted(self.miles, bounds[1:], side="left")
+
+        pieces = []
+        for k in range(bounds.size - 1):
+            coords = np.vstack((boundXY[k:k + 1], self.coords[first[k]:last[k]], boundXY[k + 1:k + 2]))
+            pieces.append((coords, float(bounds[k]), float(bounds[k + 1])))
+        return pieces
+
+    def splitByRanges(self, starts, ends):
+        """
+        usage: 按 excel 中的分割记录（起点里程、终点里程）打断多段线，等价于在全部起点和终点里程处打断
+        :param starts: 起点里程数组
+        :param ends: 终点里程数组
+        :return: [(coords, startMile, endMile), ....]
+        """
+        return self.splitAtMiles(np.concatenate((np.asarray(starts, dtype=np.float64),
+                                                 np.asarray(ends, dtype=np.float64))))
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Author: ALun
+Usage: 将多段线节点和 excel 中的分割点 / 桩号点里程批量写入 sqlite
+Porject: SH.ShenTong Metro
+
+节点与分割点在内存中按里程归并，每张表只执行一次 executemany 并在一个事务内提交，
+MILE 字段建立索引，排序表使用 INSERT ... SELECT ... ORDER BY 一次生成；
+分割点坐标一次读出整张排序表，向量化插值后一次批量更新。
+
+表结构与 plyParse_NoArcpy.createTable 相同：
+    ID, X, Y, MILE, LINE, SHT_LINE_ID
+    LINE = 0 --- 多段线节点
+    LINE = 1 --- 分割点 / 桩号点（X, Y 为空，待插值）
+    LINE = 2 --- 与分割点里程重合的多段线节点
+"""
+import sqlite3
+
+import numpy as np
+
+FIELDS = ("X", "Y", "MILE", "LINE", "SHT_LINE_ID")
+
+
+class mileDBError(Exception):
+    pass
+
+
+def mergeMileRows(vertexXYM, stationMiles, stationIds):
+    """
+    usage: 按里程归并多段线节点与分割点
+    :param vertexXYM: (N, 3) --- 节点的 x, y, 里程，里程递增
+    :param stationMiles: (M,) --- 分割点里程
+    :param stationIds: (M,) --- 分割点在 sheet 中的 id
+    :return: [(X, Y, MILE, LINE, SHT_LINE_ID), ....] --- 按里程排序
+     --- 超过线长的分割点不写入；与节点里程相同的分割点不写入，该节点 LINE 记为 2；
+         里程相同的多个分割点只保留第一个
+    """
+    vertexXYM = np.asarray(vertexXYM, dtype=np.float64).reshape(-1, 3)
+    stationMiles = np.asarray(stationMiles, dtype=np.float64).reshape(-1)
+    stationIds = list(stationIds)
+    if stationMiles.size != len(stationIds):
+        raise mileDBError("The number of station miles and ids is not equal")
+
+    vertexMiles = vertexXYM[:, 2]
+    maxMile = vertexMiles.max() if vertexMiles.size else -np.inf
+
+    valid = stationMiles <= maxMile
+    _, firstIndex = np.unique(stationMiles, return_index=True)
+    unique = np.zeros(stationMiles.size, dtype=bool)
+    unique[firstIndex] = True
+    keep = np.nonzero(valid & unique)[0]
+
+    # 分割点与节点里程重合
+    pos = np.searchsorted(vertexMiles, stationMiles[keep])
+    pos = np.minimum(pos, max(vertexMiles.size - 1, 0))
+    onVertex = vertexMiles.size > 0
+    onVertex = (vertexMiles[pos] == stationMiles[keep]) if onVertex else np.zeros(keep.size, dtype=bool)
+
+    vertexLine = np.zeros(vertexMiles.size, dtype=np.int64)
+    vertexLine[pos[onVertex]] = 2
+    keep = keep[~onVertex]
+
+    # 归并：节点在前，里程相同时保持原来的顺序
+    allMiles = np.concatenate((vertexMiles, stationMiles[keep]))
+    order = np.argsort(allMiles, kind="stable")
+
+    vertexRows = [(x, y, m, line, None) for (x, y, m), line in zip(vertexXYM.tolist(), vertexLine.tolist())]
+    stationRows = [(None, None, float(stationMiles[i]), 1, stationIds[i]) for i in keep.tolist()]
+    allRows = vertexRows + stationRows
+    return [allRows[i] for i in order.tolist()]
+
+
+def createMileTable(cur, tableName):
+    cur.execute(f'DROP TABLE IF EXISTS "{tableName}";')
+    cur.execute(f'CREATE TABLE "{tableName}"(ID integer primary key autoincrement, '
+                f'X real, Y real, MILE real, LINE integer, SHT_LINE_ID integer);')
+    cur.execute(f'CREATE INDEX "{tableName}_MILE" ON "{tableName}"(MILE);')
+
+
+def writeMileTable(conn, tableName, rows, ordered=True):
+    """
+    usage: 在一个事务内写入一张里程表，并生成排序表 "<tableName>_ORDERD"
+    :param conn: sqlite3 connection
+    :param rows: [(X, Y, MILE, LINE, SHT_LINE_ID), ....]
+    :param ordered: 是否生成排序表
+    :return: 排序表表名 / 原表表名
+    """
+    orderedTable = tableName + "_ORDERD"
+    fieldExp = ", ".join(FIELDS)
+    with conn:
+        cur = conn.cursor()
+        # 建表语句也放在同一个事务中
+        cur.execute("BEGIN;")
+        createMileTable(cur, tableName)
+        cur.executemany(f'INSERT INTO "{tableName}"({fieldExp}) VALUES(?, ?, ?, ?, ?);', rows)
+        if not ordered:
+            return tableName
+
+        createMileTable(cur, orderedTable)
+        cur.execute(f'INSERT INTO "{orderedTable}"({fieldExp}) '
+                    f'SELECT {fieldExp} FROM "{tableName}" ORDER BY MILE, ID;')
+    return orderedTable
+
+
+def interpolateXY(ids, xs, ys, miles):
+    """
+    usage: 为 X, Y 为空的行插值坐标 --- 前后最近的有坐标行作为线段，按与前一行的里程差在线段上取点
+    :param ids, xs, ys, miles: 按里程排序的各列，空值为 nan
+    :return: [(X, Y, ID), ....] --- 需要更新的行，前后缺少有坐标行的点不返回
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    miles = np.asarray(miles, dtype=np.float64)
+    rowNum = xs.size
+    position = np.arange(rowNum)
+
+    known = ~(np.isnan(xs) | np.isnan(ys))
+
+    # 前向填充 / 后向填充有坐标行的位置
+    prevIndex = np.maximum.accumulate(np.where(known, position, -1))
+    nextIndex = np.minimum.accumulate(np.where(known, position, rowNum)[::-1])[::-1]
+
+    target = np.nonzero(~known & (prevIndex >= 0) & (nextIndex < rowNum))[0]
+    prev = prevIndex[target]
+    nxt = nextIndex[target]
+
+    dx = xs[nxt] - xs[prev]
+    dy = ys[nxt] - ys[prev]
+    segLength = np.hypot(dx, dy)
+    scale = np.divide(miles[target] - miles[prev], segLength,
+                      out=np.zeros(target.size), where=segLength > 0)
+
+    tarX = xs[prev] + scale * dx
+    tarY = ys[prev] + scale * dy
+    tarIds = np.asarray(ids)[target]
+    return list(zip(tarX.tolist(), tarY.tolist(), tarIds.tolist()))
+
+
+def calXYInTable(conn, tableName):
+    """
+    usage: 读取一次排序表，计算全部分割点坐标并在一个事务内批量写回
+    :param conn: sqlite3 connection
+    :param tableName: 排序表表名
+    :return: 更新的行数
+    """
+    rows = conn.execute(f'SELECT ID, X, Y, MILE FROM "{tableName}" ORDER BY MILE, ID;').fetchall()
+    if not rows:
+        return 0
+
+    ids, xs, ys, miles = zip(*rows)
+    xs = [np.nan if each is None else each for each in xs]
+    ys = [np.nan if each is None else each for each in ys]
+    miles = [np.nan if each is None else each for each in miles]
+
+    updateRows = interpolateXY(ids, xs, ys, miles)
+    with conn:
+        conn.executemany(f'UPDATE "{tableName}" SET X = ?, Y = ? WHERE ID = ?;', updateRows)
+    return len(updateRows)
+
+
+def calXYInTables(dbFile, tableNameList):
+    """
+    usage: 批量计算多张排序表中分割点的坐标，替代逐行查询前后节点的 calXYInDB / calXYInPntDB
+    :return: {表名: 更新的行数}
+    """
+    conn = sqlite3.connect(dbFile)
+    try:
+        return {eachTable: calXYInTable(conn, eachTable) for eachTable in tableNameList}
+    finally:
+        conn.close()
+
+
+def _stationRecords(shtDirData):
+    """
+    usage: 将 sheet 中某方向的记录转换为 (里程数组, id 列表)
+            分割记录的起点和终点都作为分割点，按 起点1, 终点1, 起点2, .... 的顺序排列
+    :param shtDirData: [{"id": , "start": , "end": }, ....] 或 (M, 3) / (M, 2) 数组 --- (id, start[, end])
+    """
+    if isinstance(shtDirData, np.ndarray):
+        if shtDirData.shape[1] > 2:
+            miles = shtDirData[:, 1:3].astype(np.float64).reshape(-1)
+            ids = np.repeat(shtDirData[:, 0], 2).tolist()
+        else:
+            miles = shtDirData[:, 1].astype(np.float64)
+            ids = shtDirData[:, 0].tolist()
+        return miles, ids
+
+    ids = []
+    miles = []
+    for eachData in shtDirData:
+        ids.append(eachData["id"])
+        miles.append(eachData["start"])
+        if eachData.get("end") is not None:
+            ids.append(eachData["id"])
+            miles.append(eachData["end"])
+    return np.array(miles, dtype=np.float64), ids
+
+
+def buildMileTables(dbFile, xlsxData, plyCoord):
+    """
+    usage: 批量生成全部 sheet、全部方向的里程表及排序表，替代 insertPlyToDB / insertXlsxToDB / createOrderdTable
+    :param dbFile: str, 数据库文件地址
+    :param xlsxData: [{"NAME": sheet名, "DATA": {方向: 分割记录}}, ....]
+    :param plyCoord: [{"GEOMETRY": [[ID, X, Y, MILE], ....], "DIRECTION": 方向}, ....] --- calculateMiles 的结果
+    :return: [排序表表名, ....]
+    """
+    conn = sqlite3.connect(dbFile)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    newTableNames = []
+    try:
+        for eachPly in plyCoord:
+            plyGeoList, plyDir = eachPly["GEOMETRY"], eachPly["DIRECTION"]
+            vertexXYM = np.array([eachPnt[1:4] for eachPnt in plyGeoList], dtype=np.float64)
+
+            for eachSheet in xlsxData:
+                shtName, shtData = eachSheet["NAME"], eachSheet["DATA"]
+                if plyDir not in shtData:
+                    continue
+                tableName = shtName + "_" + plyDir
+                print(f"正在处理{tableName}")
+
+                stationMiles, stationIds = _stationRecords(shtData[plyDir])
+                rows = mergeMileRows(vertexXYM, stationMiles, stationIds)
+                newTableNames.append(writeMileTable(conn, tableName, rows))
+    finally:
+        conn.close()
+    return newTableNames
@@ -1,13 +1,12 @@
-import functools
 import math
 # import arcpy
-import re
-import sys
 import pandas as pd
 import os
-import openpyxl
 import sqlite3
-import shapefile
+
+from plyLinearRef import linearRefPolyline
+from plyMileDB import calXYInTables
+from xlsxMileReader import excelReadError, readMileSheets
 
 
 # arcpy.env.overwriteOutput = True
@@ -276,54 +275,18 @@ class myXYPolyline:
 #     return plyCoordList
 
 
-def readSplitPntFromXLSX(xls):
-    # 确保文件类型为 .xlsx
-    data, ext = os.path.splitext(xls)
-    if ext == ".xls":
-        # todo 目前需要将一个xls的多个sheet各自读取并写入到新的xlsx中
-        df = pd.read_excel(xls)
-        xlsx = data + ".xlsx"
-
-        if os.path.exists(xlsx):
-            os.remove(xlsx)
-
-        df.to_excel(xlsx, index=False)
-    elif ext != ".xlsx":
-        print("Error --- the extension of input file not in (.xls, .xlsx)")
-        raise fileExtionNotAvailable
-    else:
-        xlsx = xls
-
-    wb = openpyxl.load_workbook(xlsx)
-    shts = wb.sheetnames
-    # print(shts)
-
-    xlsxDataList = []
-    for eachSht in shts:
-        shtData = {}
-        shtDataList = {}
-        # 每个单独的sheet
-        sht = wb[eachSht]
-        rowMax = sht.max_row
-        # 有效数据从第三行开始
-        oDict = {}
-        for i in range(3, rowMax + 1):
-            dataDict = {}
-            oId, oStart, oEnd, oDir = (sht.cell(i, 1).value, sht.cell(i, 2).value,
-                                       sht.cell(i, 3).value, sht.cell(i, 4).value)
-            if oId is None or oStart is None or oEnd is None or oDir is None:
-                continue
-            oDict.setdefault(oDir, [])
-            (dataDict["id"], dataDict["start"],
-             dataDict["end"], dataDict["direc"]) = (oId, oStart, oEnd, oDir)
-            oDict[oDir].append(dataDict)
-            # print(oDict)
-            # shtDataList[oDir] = oDict
-        shtData["NAME"] = eachSht
-        shtData["DATA"] = oDict
-        xlsxDataList.append(shtData)
-    print(xlsxDataList)
-    return xlsxDataList
+def readSplitPntFromXLSX(xls, processNum=None):
+    """
+    usage: 读取 excel 中全部 sheet 的分割记录，有效数据从第三行开始，第 1 ~ 4 列为 id, 起点里程, 终点里程, 方向
+            .xlsx 以只读模式逐行读取，.xls 直接读取不再转存，多个 sheet 并行读取
+    :return: [{"NAME": sheet名, "DATA": {方向: numpy.ndarray (M, 3) --- id, start, end}}, ....]
+    """
+    try:
+        return readMileSheets(xls, columns=(0, 1, 2), dirColumn=3, startRow=3, processNum=processNum,
+                              blank="skip")
+    except excelReadError as e:
+        print(f"Error --- {e}")
+        raise fileExtionNotAvailable(str(e))
 
 
 # todo 现在已经获取了excel中需要打断的数据，明天按打断的数据 先做复制 6 个图层，每个图层打断一次
@@ -338,134 +301,18 @@ def _splitLine(singleLineDict, singleXlsxDict):
     """
     # 拆分线数据（字典）
     lineGeo, lineDir, attrDict = singleLineDict["GEOMETRY"], singleLineDict["DIRECTION"], singleLineDict["ATTRIBUTES"]
-
-    # 实例化多段线
-    oPly = myXYPolyline(lineGeo)
-
-    oLines = [oPly.lines]
-    # print(oLines)
-
     shtName, shtData = singleXlsxDict["NAME"], singleXlsxDict["DATA"]
 
-    resPlyFC = []
     # 从xlsx中获取与lineDir相同的（上行或下行）数据
     splitDataList = shtData[lineDir]
-    for eachData in splitDataList:
-        dId, dStart, dEnd, dDir = eachData["id"], eachData["start"], eachData["end"], eachData["direc"]
-        plyFC = []
-
-        # 各多段线
-        for l, eachLine in enumerate(oLines):
-            # 按里程插入点，并将点集提取为单独列表
-            ply = []
-
-            # 多段线中的各段
-            for k, each in enumerate(eachLine):
-                (pID, pStartMile, pLine,
-                 pEndMile, pStartPnt, pEndPnt) = (each["ID"], each["STARTMILEAGE"], each["LINE"],
-                                                  each["ENDMILEAGE"], each["STARTPNT"], each["ENDPNT"])
-                if l == 0 and k == 0:
-                    startMile = pStartMile
-                elif l != 0 and k == 0:
-                    startMile = pStartMile
-                # 情况一、线段的终止里程 小于 要拆分的数据的起点里程
-                # 将起终两点加入到ply中
-                if pEndMile <= dStart:
-                    if pStartPnt not in ply:
-                        ply.append(pStartPnt)
-
-                    if pEndPnt not in ply:
-                        ply.append(pEndPnt)
-                # 情况二、线段的起终点 夹着 excel 分割的起点，但是线段的终点 仍有小于/等于/大于 分割终点，三种情况
-                elif pEndMile >= dStart > pStartMile:
-                    # step1、将起点加入到点集中
-                    if pStartPnt not in ply:
-                        ply.append(pStartPnt)
-
-                    # step2、按里程差（分割起点）计算分割起点的坐标
-                    length = dStart - pStartMile
-                    # 计算分割起点坐标
-                    splitPnt = pLine.calXYWithLength(length)
-                    # 将分割起点坐标加入到 上一段线的点集中
-                    ply.append(splitPnt)
-                    # 将上一段线加入到线要素类中
-                    plyFC.append((ply, startMile, dStart))
-
-                    # 设置下一段的 startMile 为上一段的 pEndMile
-                    startMile = dStart
-
-                    # step3、上一段线结束，开启下一段线
-                    # 将分割起点加入到新线段的ply中
-                    ply = [splitPnt]
-
-                    # 此处开始有三种情况，
-                    #   * 线段终点 小于/等于 分割终点
-                    if pEndMile <= dEnd:
-                        # 将未被分割的线段的终点直接加入到新线段的点集中
-                        # 目前有两个点，分割点及未分割线的终点，在后面的段中 将分割点纳入，并分割
-                        ply.append(pEndPnt)
-                    #   * 线段终点 大于 分割终点，两个分割点 将线段拆为三份
-                    else:
-                        length = dEnd - pStartMile
-                        # 计算分割终点坐标
-                        splitPnt = pLine.calXYWithLength(length)
-                        # 将分割终点加入到 线的点集中
-                        ply.append(splitPnt)
-                        # 将线要素加入到线要素类中，该段结束（分割的起点、终点）
-                        plyFC.append((ply, startMile, dEnd))
-
-                        startMile = dEnd
-
-                        # 此处开启新的线段，并以分割点的终点作为 第一个点， 线段的终点作为 第二个点
-                        ply = [splitPnt, pEndPnt]
-                # 情况三、线段起点大于等于分割起点
-                elif dStart <= pStartMile < dEnd:
-                    # 线段起点与分割点起点重合
-                    if pStartPnt not in ply:
-                        ply.append(pStartPnt)
-
-                    # 终点的三种情况 在分割终点 左侧/上/右侧
-                    # 终点在分割终点的  左侧 / 上
-                    if pEndMile <= dEnd:
-                        if pEndPnt not in ply:
-                            ply.append(pEndPnt)
-                    # 线段终点在分割终点的右侧，以分割终点 将线段分割开
-                    else:
-                        # 分割点前的段
-                        length = dEnd - pStartMile
-                        splitPnt = pLine.calXYWithLength(length)
-                        ply.append(splitPnt)
-                        plyFC.append((ply, pStartMile, dEnd))
-
-                        startMile = dEnd
-
-                        # 分割点后段
-                        ply = [splitPnt, pEndPnt]
-                # 线段起点在分割终点后
-                elif pStartMile >= dEnd:
-                    if pStartPnt not in ply:
-                        ply.append(pStartPnt)
-
-                    if pEndPnt not in ply:
-                        ply.append(pEndPnt)
-                else:
-                    print("注意！！！ 出现没想到的情况了！！！！")
-
-            # 每条线(eachLine)分割结束后
-            plyFC.append((ply, startMile, pEndMile))
-
-        # 所有的线要素分割结束后，
-        # 修改olines， 将其改为本次循环结束后的所有线要素类 实例化后的对象
-        oLines = []
-        for eachPly in plyFC:
-            oStartMile = eachPly[1]
-            eachPly = eachPly[0]
-            plyObj = myXYPolyline(eachPly, oStartMile)
-            oLines.append(plyObj.lines)
-        n = len(plyFC)
-        m = len(oLines)
-    print(shtName, n)
-    print(shtName, m)
+
+    # 线性参考对象 —— 坐标数组 + 累计里程数组，所有分割点一次插值完成
+    oPly = linearRefPolyline(lineGeo)
+    pieces = oPly.splitByRanges(splitDataList[:, 1], splitDataList[:, 2])
+
+    plyFC = [([tuple(eachPnt) for eachPnt in coords.tolist()], startMile, endMile)
+             for coords, startMile, endMile in pieces]
+    print(shtName, len(plyFC))
     return plyFC
 
 
@@ -553,17 +400,8 @@ def insertValueXlsxData(dbObj, curObj, tableName, values):
 
 
 def copyOrderdTable(dbObj, curObj, oriTable, tarTable):
-    resData = curObj.execute(f"select * from {oriTable} order by MILE;").fetchall()
-    for each in resData:
-        # print(each)
-        insertData = []
-        for eachSingle in each:
-            if eachSingle == None:
-                eachSingle = "null"
-            insertData.append(eachSingle)
-        curObj.execute(f"insert into {tarTable}(X, Y, MILE, LINE, SHT_LINE_ID) "
-                       f"values({insertData[1]}, {insertData[2]}, {insertData[3]}, {insertData[4]}, {insertData[5]});")
-        # curObj.execute(f"insert into {tarTable} select * from {oriTable} order by MILE;")
+    curObj.execute(f"insert into {tarTable}(X, Y, MILE, LINE, SHT_LINE_ID) "
+                   f"select X, Y, MILE, LINE, SHT_LINE_ID from {oriTable} order by MILE, ID;")
     dbObj.commit()
 
 
@@ -604,59 +442,10 @@ def calculateMiles(plyCoord):
 
 
 def calXYInDB(dbFile, tarTableNameList):
-    db, cur = openConnectDB(dbFile)
-    # 读取表中所有数据
-    for eachTable in tarTableNameList:
-        resData = cur.execute(f"select * from {eachTable} where LINE = 1;").fetchall()
-
-        print(resData)
-        print(len(resData))
-        # sys.exit()
-
-        #
-        for eachLine in resData:
-            (oId, oX, oY, oMile,
-             oLine, oShtLineId) = (eachLine[0], eachLine[1], eachLine[2],
-                                   eachLine[3], eachLine[4], eachLine[5])
-
-            calX, calY, preX, preY, nextX, nextY = None, None, None, None, None, None
-            calId = oId
-            calMile, preMile, nextMile = None, None, None
-            # 寻找无 x, y 的行
-            if oX is None and oY is None:
-                # 向前寻找具有坐标值的点
-                while calX is None and calY is None:
-                    calId -= 1
-                    coord = cur.execute(f"select X, Y, MILE from {eachTable} where ID = {calId}").fetchall()
-                    calX, calY, calMile = coord[0]
-
-                # 前向坐标点
-                preX, preY, preMile = calX, calY, calMile
-
-                # 向后搜索坐标值
-                calX, calY, calMile = None, None, None
-                calId = oId
-                while calX is None and calY is None:
-                    calId += 1
-                    coord = cur.execute(f"select X, Y, MILE from {eachTable} where ID = {calId}").fetchall()
-                    calX, calY, calMile = coord[0]
-
-                # 后向坐标点
-                nextX, nextY, nextMile = calX, calY, calMile
-
-                # 求当前点到前向点的 里程差
-                preDis = float(oMile) - float(preMile)
-
-                # 实例化线
-                lineObj = myXYLine((preX, preY), (nextX, nextY))
-                # 求当前点的坐标值
-                tarX, tarY = lineObj.calXYWithLength(preDis)
-
-                # 将坐标值写入到表中
-                cur.execute(f"update {eachTable} set X = {tarX}, Y = {tarY} where ID = {oId}")
-                db.commit()
-
-    closeConnectDB(db, cur)
+    # 每张表只读取一次，前后节点由向量化的前向 / 后向填充得到，坐标一次批量写回
+    resDic = calXYInTables(dbFile, tarTableNameList)
+    for eachTable, updateNum in resDic.items():
+        print(eachTable, updateNum)
 
 
 def insertPlyToDB(dbFile, xlsxData, plyCoord):
@@ -700,8 +489,7 @@ def insertXlsxToDB(dbFile, xlsxData, plyCoord):
             geoMaxMile = cur.execute(f"select max(MILE) from {tableName};").fetchone()[0]
 
             # 插入所有值
-            for eachData in shtDirData:
-                shtLineId, sPnt, ePnt = eachData["id"], eachData["start"], eachData["end"]
+            for shtLineId, sPnt, ePnt in shtDirData.tolist():
                 valuesStart = ("null", "null", "null", sPnt, "1", shtLineId)
                 valuesEnd = ("null", "null", "null", ePnt, "1", shtLineId)
 
@@ -751,53 +539,16 @@ def createOrderdTable(dbFile, tableNameList):
 # ************************* 生成桩号点 *************************
 
 
-def readPntXlsx(xls):
-    # 确保文件类型为 .xlsx
-    data, ext = os.path.splitext(xls)
-    if ext == ".xls":
-        # todo 目前需要将一个xls的多个sheet各自读取并写入到新的xlsx中
-        df = pd.read_excel(xls)
-        xlsx = data + ".xlsx"
-
-        if os.path.exists(xlsx):
-            os.remove(xlsx)
-
-        df.to_excel(xlsx, index=False)
-    elif ext != ".xlsx":
-        print("Error --- the extension of input file not in (.xls, .xlsx)")
-        raise fileExtionNotAvailable
-    else:
-        xlsx = xls
-
-    wb = openpyxl.load_workbook(xlsx)
-    shts = wb.sheetnames
-    # print(shts)
-
-    xlsxDataList = []
-    for eachSht in shts:
-        shtData = {}
-        # 每个单独的sheet
-        sht = wb[eachSht]
-        rowMax = sht.max_row
-        # 有效数据从第三行开始
-        oDict = {}
-        for i in range(3, rowMax + 1):
-            dataDict = {}
-            oId, oStart, oDir = (sht.cell(i, 1).value, sht.cell(i, 6).value,
-                                       sht.cell(i, 5).value)
-            if oId is None or oStart is None or oDir is None:
-                continue
-            oDict.setdefault(oDir, [])
-            (dataDict["id"], dataDict["start"],
-              dataDict["direc"]) = (oId, oStart, oDir)
-            oDict[oDir].append(dataDict)
-            # print(oDict)
-            # shtDataList[oDir] = oDict
-        shtData["NAME"] = eachSht
-        shtData["DATA"] = oDict
-        xlsxDataList.append(shtData)
-    print(xlsxDataList)
-    return xlsxDataList
+def readPntXlsx(xls, processNum=None):
+    """
+    usage: 读取 excel 中全部 sheet 的桩号点，有效数据从第三行开始，第 1 / 6 / 5 列为 id, 里程, 方向
+    :return: [{"NAME": sheet名, "DATA": {方向: numpy.ndarray (M, 2) --- id, start}}, ....]
+    """
+    try:
+        return readMileSheets(xls, columns=(0, 5), dirColumn=4, startRow=3, processNum=processNum, blank="skip")
+    except excelReadError as e:
+        print(f"Error --- {e}")
+        raise fileExtionNotAvailable(str(e))
 
 
 def insertPntXlsxToDB(dbFile, xlsxData, plyCoord):
@@ -816,8 +567,7 @@ def insertPntXlsxToDB(dbFile, xlsxData, plyCoord):
             geoMaxMile = cur.execute(f"select max(MILE) from {tableName};").fetchone()[0]
 
             # 插入所有值
-            for eachData in shtDirData:
-                shtLineId, sPnt = eachData["id"], eachData["start"]
+            for shtLineId, sPnt in shtDirData.tolist():
                 valuesStart = ("null", "null", "null", sPnt, "1", shtLineId)
 
                 # 当分割点的起始里程 大于线长时，则不插入起点 和 终点
@@ -859,59 +609,10 @@ def createOrderdPntTable(dbFile, tableNameList):
 
 
 def calXYInPntDB(dbFile, tarTableNameList):
-    db, cur = openConnectDB(dbFile)
-    # 读取表中所有数据
-    for eachTable in tarTableNameList:
-        resData = cur.execute(f"select * from {eachTable} where LINE = 1;").fetchall()
-
-        print(resData)
-        print(len(resData))
-        # sys.exit()
-
-        #
-        for eachLine in resData:
-            (oId, oX, oY, oMile,
-             oLine, oShtLineId) = (eachLine[0], eachLine[1], eachLine[2],
-                                   eachLine[3], eachLine[4], eachLine[5])
-
-            calX, calY, preX, preY, nextX, nextY = None, None, None, None, None, None
-            calId = oId
-            calMile, preMile, nextMile = None, None, None
-            # 寻找无 x, y 的行
-            if oX is None and oY is None:
-                # 向前寻找具有坐标值的点
-                while calX is None and calY is None:
-                    calId -= 1
-                    coord = cur.execute(f"select X, Y, MILE from {eachTable} where ID = {calId}").fetchall()
-                    calX, calY, calMile = coord[0]
-
-                # 前向坐标点
-                preX, preY, preMile = calX, calY, calMile
-
-                # 向后搜索坐标值
-                calX, calY, calMile = None, None, None
-                calId = oId
-                while calX is None and calY is None:
-                    calId += 1
-                    coord = cur.execute(f"select X, Y, MILE from {eachTable} where ID = {calId}").fetchall()
-                    calX, calY, calMile = coord[0]
-
-                # 后向坐标点
-                nextX, nextY, nextMile = calX, calY, calMile
-
-                # 求当前点到前向点的 里程差
-                preDis = float(oMile) - float(preMile)
-
-                # 实例化线
-                lineObj = myXYLine((preX, preY), (nextX, nextY))
-                # 求当前点的坐标值
-                tarX, tarY = lineObj.calXYWithLength(preDis)
-
-                # 将坐标值写入到表中
-                cur.execute(f"update {eachTable} set X = {tarX}, Y = {tarY} where ID = {oId}")
-                db.commit()
-
-    closeConnectDB(db, cur)
+    # 每张表只读取一次，前后节点由向量化的前向 / 后向填充得到，坐标一次批量写回
+    resDic = calXYInTables(dbFile, tarTableNameList)
+    for eachTable, updateNum in resDic.items():
+        print(eachTable, updateNum)
 
 
 def createPntFCWithDB(dbFile, tableName):
@@ -977,19 +678,13 @@ dbFile = r"D:\codeProjcet\ArcGISProPycharm\myScript\自用工具_github\上海
 # # 给多段线中所有点单独计算出一个自己的里程值
 # plyCoord = calculateMiles(plyCoord)
 #
-# # 将多段线中所有点插入表中
-# insertPlyToDB(dbFile, xlsxData, plyCoord)
-#
-# # 将 xlsx 的分割线，按照起始里程、终止里程当作点插入到表中
-# oriTableNameList = insertXlsxToDB(dbFile, xlsxData, plyCoord)
-#
+# # 将多段线中所有点、xlsx 的分割线起止里程在内存中归并后批量写入表中，并生成排序表
+# newTableNameList = buildMileTables(dbFile, xlsxData, plyCoord)
 #
-# # oriTableNameList = ["VERT_ID_上行", "CUR_ID_上行", "LOT_ID_上行", "ACO_ID_上行", "SLO_ID_上行",
-# #                     "GUA_ID_上行", "VERT_ID_下行", "CUR_ID_下行", "LOT_ID_下行", "ACO_ID_下行",
-# #                     "SLO_ID_下行", "GUA_ID_下行"]
-#
-# # 将插入xlsx数据后的表格，重排序
-# newTableNameList = createOrderdTable(dbFile, oriTableNameList)
+# # # 逐行写入的旧流程
+# # insertPlyToDB(dbFile, xlsxData, plyCoord)
+# # oriTableNameList = insertXlsxToDB(dbFile, xlsxData, plyCoord)
+# # newTableNameList = createOrderdTable(dbFile, oriTableNameList)
 #
 # newTableNameList = ['VERT_ID_上行_ORDERD', 'CUR_ID_上行_ORDERD', 'LOT_ID_上行_ORDERD',
 #                     'ACO_ID_上行_ORDERD', 'SLO_ID_上行_ORDERD', 'GUA_ID_上行_ORDERD',
@@ -1027,12 +722,7 @@ dbFile = r"D:\codeProjcet\ArcGISProPycharm\myScript\自用工具_github\上海
 #
 # plyCoord = calculateMiles(plyCoord)
 #
-# insertPlyToDB(dbFile, xlsxPntData, plyCoord)
-#
-# tableNameList = insertPntXlsxToDB(dbFile, xlsxPntData, plyCoord)
-# print(tableNameList)
-#
-# newTableNameList = createOrderdPntTable(dbFile, tableNameList)
+# newTableNameList = buildMileTables(dbFile, xlsxPntData, plyCoord)
 # print(newTableNameList)
 #
 # calXYInPntDB(dbFile, newTableNameList)
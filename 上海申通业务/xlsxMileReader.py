@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Author: ALun
+Usage: 从 excel 中读取分割线 / 桩号点的里程数据
+Porject: SH.ShenTong Metro
+
+.xlsx 使用 openpyxl 只读模式逐行读取（iter_rows(values_only=True)），不加载样式；
+.xls 使用 xlrd 直接读取，不再经 pandas 转存为新的 .xlsx；
+多个 sheet 交给进程池并行读取，每个 sheet 按方向返回 numpy 数组。
+"""
+import multiprocessing
+import os
+
+import numpy as np
+
+try:
+    import openpyxl
+    XLSX_LIB = True
+except:
+    XLSX_LIB = False
+
+try:
+    import xlrd
+    XLS_LIB = True
+except:
+    XLS_LIB = False
+
+
+class excelReadError(Exception):
+    pass
+
+
+def _excelType(excelFile):
+    ext = os.path.splitext(excelFile)[1].lower()
+    if ext not in (".xls", ".xlsx"):
+        print("Error --- the extension of input file not in (.xls, .xlsx)")
+        raise excelReadError(f"The extension of input file not in (.xls, .xlsx) --- {excelFile}")
+    if ext == ".xlsx" and not XLSX_LIB:
+        raise excelReadError("Module 'openpyxl' is needed to read .xlsx")
+    if ext == ".xls" and not XLS_LIB:
+        raise excelReadError("Module 'xlrd' is needed to read .xls")
+    return ext
+
+
+def listSheetNames(excelFile):
+    ext = _excelType(excelFile)
+    if ext == ".xlsx":
+        wb = openpyxl.load_workbook(excelFile, read_only=True)
+        try:
+            return list(wb.sheetnames)
+        finally:
+            wb.close()
+
+    book = xlrd.open_workbook(excelFile, on_demand=True)
+    try:
+        return book.sheet_names()
+    finally:
+        book.release_resources()
+
+
+def _xlsCellValue(value):
+    # xlrd 中的数值均为 float，整数值转换为 int（与 openpyxl / pandas 一致），空单元格转换为 None
+    if value == "":
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _iterSheetRows(excelFile, sheetName):
+    """
+    usage: 逐行返回 sheet 中的值（元组），空单元格为 None
+    """
+    ext = _excelType(excelFile)
+    if ext == ".xlsx":
+        wb = openpyxl.load_workbook(excelFile, read_only=True, data_only=True)
+        try:
+            for row in wb[sheetName].iter_rows(values_only=True):
+                yield row
+        finally:
+            wb.close()
+        return
+
+    book = xlrd.open_workbook(excelFile, on_demand=True)
+    try:
+        sht = book.sheet_by_name(sheetName)
+        for i in range(sht.nrows):
+            yield tuple(_xlsCellValue(each) for each in sht.row_values(i))
+    finally:
+        book.release_resources()
+
+
+# 提取列中有空单元格时的处理方式
+BLANK_MODES = ("nan", "skip", "raise")
+
+
+def _toArray(rows, columnNum):
+    # 全部为数值（含 nan）时返回 float64 数组，否则返回 object 数组
+    if not rows:
+        return np.empty((0, columnNum), dtype=np.float64)
+    try:
+        return np.array(rows, dtype=np.float64)
+    except (TypeError, ValueError):
+        arr = np.empty((len(rows), columnNum), dtype=object)
+        arr[:] = rows
+        return arr
+
+
+def readSheet(excelFile, sheetName, columns=(0, 1, 2), dirColumn=3, startRow=3, headerRow=None, blank="nan"):
+    """
+    usage: 读取一个 sheet，按方向分组
+    :param excelFile: str, 输入 xls 或 xlsx 文件路径
+    :param sheetName: str, sheet 名
+    :param columns: 需要提取的列，列索引（从 0 开始）或表头名（需要指定 headerRow）
+    :param dirColumn: 方向所在的列，列索引或表头名
+    :param startRow: int, 有效数据开始的行号（从 1 开始，与 openpyxl 一致），指定 headerRow 时忽略
+    :param headerRow: int, 表头所在的行索引（从 0 开始，与 pandas 一致），表头之上的行会被忽略
+    :param blank: str, 提取列中有空单元格时的处理方式
+                  "nan" --- 保留该行，空单元格为 nan（与 pandas 一致）
+                  "skip" --- 跳过该行
+                  "raise" --- 抛出 excelReadError
+    :return: {"NAME": sheet名, "DATA": {方向: numpy.ndarray (M, len(columns))}}
+     --- 全部为空的行会被跳过；"nan" 方式下方向为空时无法分组，同样抛出 excelReadError
+    """
+    if blank not in BLANK_MODES:
+        raise excelReadError(f"Unknown blank mode --- {blank}")
+
+    # 行号从 1 开始，用于报错
+    rows = enumerate(_iterSheetRows(excelFile, sheetName), 1)
+    columns = list(columns)
+
+    if headerRow is not None:
+        header = None
+        for rowNum, row in rows:
+            if rowNum - 1 == headerRow:
+                header = [None if each is None else str(each).strip() for each in row]
+                break
+        if header is None:
+            raise excelReadError(f"Header row {headerRow} is not exists in sheet '{sheetName}'")
+
+        try:
+            columns = [header.index(each) if isinstance(each, str) else each for each in columns]
+            dirColumn = header.index(dirColumn) if isinstance(dirColumn, str) else dirColumn
+        except ValueError as e:
+            raise excelReadError(f"Header is not exists in sheet '{sheetName}' --- {e}")
+    else:
+        for i in range(startRow - 1):
+            if next(rows, None) is None:
+                break
+
+    dirRows = {}
+    width = max(columns + [dirColumn]) + 1
+    for rowNum, row in rows:
+        # 行尾的空单元格可能不会返回
+        row = tuple(row) + (None,) * (width - len(row))
+        oDir = row[dirColumn]
+        values = [row[each] for each in columns]
+        if oDir is None and all(each is None for each in values):
+            continue
+        if oDir is None or any(each is None for each in values):
+            if blank == "skip":
+                continue
+            if blank == "raise" or oDir is None:
+                raise excelReadError(f"Blank cell in row {rowNum} of sheet '{sheetName}'")
+            values = [np.nan if each is None else each for each in values]
+        dirRows.setdefault(oDir, []).append(values)
+
+    return {"NAME": sheetName,
+            "DATA": {oDir: _toArray(values, len(columns)) for oDir, values in dirRows.items()}}
+
+
+def _readSheetJob(args):
+    return readSheet(*args)
+
+
+def readMileSheets(excelFile, sheetNames=None, columns=(0, 1, 2), dirColumn=3, startRow=3, headerRow=None,
+                   processNum=None, blank="nan"):
+    """
+    usage: 并行读取多个 sheet，参数含义同 readSheet
+    :param sheetNames: list, 需要读取的 sheet，默认为全部 sheet
+    :param processNum: 进程数量，默认为 cpu 数量；为 1 时不创建进程池
+    :return: [{"NAME": sheet名, "DATA": {方向: numpy.ndarray}}, ....] --- 与 sheetNames 顺序相同
+    """
+    if not os.path.exists(excelFile):
+        raise excelReadError(f"Excel file is not exists --- {excelFile}")
+
+    if sheetNames is None:
+        sheetNames = listSheetNames(excelFile)
+    jobs = [(excelFile, eachSht, tuple(columns), dirColumn, startRow, headerRow, blank) for eachSht in sheetNames]
+
+    processNum = min(processNum or multiprocessing.cpu_count(), len(jobs))
+    if processNum <= 1:
+        return [_readSheetJob(each) for each in jobs]
+
+    with multiprocessing.Pool(processNum) as pool:
+        return pool.map(_readSheetJob, jobs)
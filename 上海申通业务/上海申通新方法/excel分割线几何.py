@@ -1,9 +1,13 @@
 import arcpy
 import os
-import pandas as pd
+import sys
 import functools
 import datetime
 
+# 共用上一级目录中的 excel 读取模块
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from xlsxMileReader import readSheet
+
 """
 Author: ALun
 Create: 2020-11-30
@@ -163,30 +167,11 @@ def readMileFromExcel_Pandas(inExcelFile, headerRow, dirHeaderName, selectHeader
     :param inExcelFile: str, 输入xls或xlsx文件路径
     :param headerRow: int, excel数据中表头开始的行索引，第一行为0。 表头以上的行会被忽略
     :param selectHeaderList: list, 要提取的信息的列名（非索引）的列表
-    :return:
+    :return: {方向: [[每个列名的值, ....], ....]} --- 空单元格为 nan，与 pandas 一致
     """
-    # 确保输入表头索引非其他类型
-    headerRow = int(headerRow)
-
-    # 从excel中读取数据
-    df = pd.read_excel(inExcelFile, header=headerRow, index=False, sheet_name=sheetName)
-    print(df)
-
-    rowDataDict = {}
-    for row in df.iterrows():
-        data = row[1]
-
-        # 获取方向值
-        dataDir = data[dirHeaderName]
-
-        # 获取每行的
-        rowDataList = []
-        rowDataDict.setdefault(dataDir, [])
-        for eachHeader in selectHeaderList:
-            rowDataList.append(data[eachHeader])
-        rowDataDict[dataDir].append(rowDataList)
-    print(rowDataDict)
-    return rowDataDict
+    # 只读模式逐行读取，不再经 pandas 加载整个 sheet
+    shtData = readSheet(inExcelFile, sheetName, selectHeaderList, dirHeaderName, headerRow=int(headerRow), blank="nan")
+    return {dataDir: arr.tolist() for dataDir, arr in shtData["DATA"].items()}
 
 
 def createFeatureClass(outputPath, outputName, createField, wkid=None, wkt=None):
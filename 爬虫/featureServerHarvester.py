@@ -0,0 +1,433 @@
+import datetime, fnmatch, json, os, random, threading, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+try:
+    import shapefile
+    HAS_PYSHP = True
+except ImportError:
+    HAS_PYSHP = False
+
+
+"""
+FeatureServer / MapServer 图层下载 —— 先用 returnIdsOnly 取得全部 objectId，按 pageSize 分页，线程池并发请求（限速 + 失败重试退避），
+每完成一页写入断点目录，中断后重新运行只请求未完成的页；最后逐页流式写出 GeoJSON 或 shapefile（pyshp），不依赖 arcpy。
+
+    harvestLayer('http://host/arcgis/rest/services/rugao/rugaocjz/FeatureServer/0', r'E:\\data\\cjz.shp',
+                 workers=8, rateLimit=10)
+    harvestLayer(layerUrl, r'E:\\data\\cjz.geojson', where="FLOOR > 0", outFields='NAME,FLOOR')
+
+断点目录默认为 '<输出文件>.harvest'，全部完成并写出后删除其中的断点文件（ids.json、page_*.json）；
+非空且没有 ids.json 的目录不会被当作断点目录使用。
+"""
+
+
+UA = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+      'Chrome/86.0.4240.198 Safari/537.36')
+CHECKPOINT_SUFFIX = '.harvest'
+IDS_NAME = 'ids.json'
+PAGE_PATTERN = 'page_*.json'
+
+# WGS84 的 .prj
+WGS84_PRJ = ('GEOGCS["GCS_WGS_1984",DATUM["D_WGS_1984",SPHEROID["WGS_1984",6378137.0,298.257223563]],'
+             'PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]]')
+
+
+class featureServerError(Exception):
+    pass
+
+
+class rateLimiter:
+    """
+    usage: 线程安全的限速器，相邻两次请求的间隔不小于 1 / rate 秒
+    :param rate: float, 每秒最多请求次数，为 0 或 None 时不限速
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class featureServerClient:
+    """
+    usage: 图层 REST 请求，每个线程复用自己的连接；网络错误、5xx / 429 及服务返回的 error 按指数退避重试
+    :param layerUrl: str, 图层地址，如 .../FeatureServer/0
+    :param token: str, ArcGIS Server token（见 ArcGIS Server服务请求/token请求服务.py）
+    :param retries: int, 每个请求的最大重试次数
+    :param backoff: float, 第一次重试前的等待时间（秒），之后每次翻倍
+    :param rateLimit: float, 全部线程合计每秒最多请求次数
+    """
+
+    def __init__(self, layerUrl, token=None, timeout=60, retries=5, backoff=1.0, rateLimit=10):
+        self.layerUrl = layerUrl.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = rateLimiter(rateLimit)
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers['User-Agent'] = UA
+        return session
+
+    def request(self, path='', params=None, post=False):
+        """
+        usage: 发送请求并解析 json
+        :param path: str, 图层地址之后的路径，如 'query'
+        :param post: bool, 参数较长（objectIds）时使用 POST
+        :return: dict
+        """
+        url = self.layerUrl + ('/' + path if path else '')
+        params = dict(params or {}, f='json')
+        if self.token:
+            params['token'] = self.token
+
+        lastError = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # 指数退避，加入随机抖动避免多个线程同时重试
+                time.sleep(self.backoff * 2 ** (attempt - 1) * (0.5 + random.random()))
+            self.limiter.acquire()
+            try:
+                if post:
+                    res = self._session().post(url, data=params, timeout=self.timeout)
+                else:
+                    res = self._session().get(url, params=params, timeout=self.timeout)
+                if res.status_code == 429 or res.status_code >= 500:
+                    lastError = f'HTTP {res.status_code}'
+                    continue
+                res.raise_for_status()
+                data = res.json()
+            except (requests.RequestException, ValueError) as e:
+                lastError = f'{type(e).__name__}: {e}'
+                continue
+            if 'error' in data:
+                lastError = f"service error: {data['error']}"
+                continue
+            return data
+        raise featureServerError(f'Request failed after {self.retries + 1} attempts --- {url} --- {lastError}')
+
+    def layerInfo(self):
+        return self.request()
+
+    def objectIds(self, where='1=1'):
+        """
+        usage: 查询满足条件的全部 objectId
+        :return: (objectId 字段名, [objectId, ....] 升序)
+        """
+        data = self.request('query', {'where': where, 'returnIdsOnly': 'true'}, post=True)
+        return data['objectIdFieldName'], sorted(data.get('objectIds') or [])
+
+    def queryByIds(self, ids, outFields='*', outSR=None):
+        """
+        usage: 按 objectId 查询要素（esri json）
+        :return: [feature, ....]
+        """
+        params = {'objectIds': ','.join(str(i) for i in ids), 'outFields': outFields, 'returnGeometry': 'true'}
+        if outSR is not None:
+            params['outSR'] = outSR
+        data = self.request('query', params, post=True)
+        features = data.get('features', [])
+        if len(features) < len(ids) and data.get('exceededTransferLimit'):
+            raise featureServerError(f'Page size exceeds maxRecordCount --- {len(features)} / {len(ids)}')
+        return features
+
+
+# ************************* 几何 / 写出 *************************
+
+def _ringArea(ring):
+    # 鞋带公式，顺时针为负
+    return sum(x0 * y1 - x1 * y0 for (x0, y0, *_), (x1, y1, *_) in zip(ring, ring[1:] + ring[:1])) / 2
+
+
+def _pointInRing(pnt, ring):
+    x, y = pnt[0], pnt[1]
+    inside = False
+    for (x0, y0, *_), (x1, y1, *_) in zip(ring, ring[1:] + ring[:1]):
+        if (y0 > y) != (y1 > y) and x < (x1 - x0) * (y - y0) / (y1 - y0) + x0:
+            inside = not inside
+    return inside
+
+
+def esriToGeoJSONGeometry(geometry, geometryType):
+    """
+    usage: esri json 几何转 GeoJSON 几何
+     --- esri 面的外环为顺时针、内环为逆时针，GeoJSON（RFC 7946）相反；一个要素含多个外环时转为 MultiPolygon
+    """
+    if not geometry:
+        return None
+    if geometryType == 'esriGeometryPoint':
+        return {'type': 'Point', 'coordinates': [geometry['x'], geometry['y']]}
+    if geometryType == 'esriGeometryMultipoint':
+        return {'type': 'MultiPoint', 'coordinates': geometry['points']}
+    if geometryType == 'esriGeometryPolyline':
+        paths = geometry['paths']
+        if len(paths) == 1:
+            return {'type': 'LineString', 'coordinates': paths[0]}
+        return {'type': 'MultiLineString', 'coordinates': paths}
+    if geometryType == 'esriGeometryPolygon':
+        polygons = []
+        holes = []
+        for ring in geometry['rings']:
+            if _ringArea(ring) <= 0:
+                polygons.append([ring[::-1]])
+            else:
+                holes.append(ring[::-1])
+        for hole in holes:
+            owner = next((p for p in polygons if _pointInRing(hole[0], p[0])), polygons[-1] if polygons else None)
+            if owner is None:
+                # 只有逆时针环（不规范的数据）时作为外环
+                polygons.append([hole])
+            else:
+                owner.append(hole)
+        if len(polygons) == 1:
+            return {'type': 'Polygon', 'coordinates': polygons[0]}
+        return {'type': 'MultiPolygon', 'coordinates': polygons}
+    raise featureServerError(f'Unsupported geometry type --- {geometryType}')
+
+
+class geoJSONWriter:
+    """
+    usage: 流式写出 GeoJSON FeatureCollection，先写临时文件，close 时替换
+    """
+
+    def __init__(self, fileName, layerInfo, extraFields=()):
+        self.fileName = fileName
+        self.geometryType = layerInfo.get('geometryType')
+        self._tmpFile = fileName + '.tmp'
+        self._f = open(self._tmpFile, 'w', encoding='utf-8')
+        self._f.write('{"type":"FeatureCollection","features":[\n')
+        self.count = 0
+
+    def write(self, feature):
+        geoFeature = {'type': 'Feature', 'properties': feature.get('attributes', {}),
+                      'geometry': esriToGeoJSONGeometry(feature.get('geometry'), self.geometryType)}
+        if self.count:
+            self._f.write(',\n')
+        self._f.write(json.dumps(geoFeature, ensure_ascii=False, separators=(',', ':')))
+        self.count += 1
+
+    def close(self):
+        self._f.write('\n]}\n')
+        self._f.close()
+        os.replace(self._tmpFile, self.fileName)
+
+
+class shapefileWriter:
+    """
+    usage: 写出 shapefile，字段由图层信息生成（dbf 字段名最长 10 个字符），esri 面的环方向与 shapefile 一致，直接写入
+    :param extraFields: 追加的字段，格式同图层信息中的 fields，如 {'name': 'height', 'type': 'esriFieldTypeDouble'}
+    :param prj: str, .prj 内容，为空时不写
+    """
+    shapeTypes = {'esriGeometryPoint': 'POINT', 'esriGeometryMultipoint': 'MULTIPOINT',
+                  'esriGeometryPolyline': 'POLYLINE', 'esriGeometryPolygon': 'POLYGON'}
+
+    def __init__(self, fileName, layerInfo, extraFields=(), prj=None):
+        if not HAS_PYSHP:
+            raise featureServerError('pyshp is required to write shapefile')
+        self.fileName = fileName
+        self.geometryType = layerInfo.get('geometryType')
+        if self.geometryType not in self.shapeTypes:
+            raise featureServerError(f'Unsupported geometry type --- {self.geometryType}')
+        self._writer = shapefile.Writer(fileName, shapeType=getattr(shapefile, self.shapeTypes[self.geometryType]),
+                                        encoding='utf-8')
+
+        # (源字段名, dbf 字段名, esri 类型)
+        self._fields = []
+        used = set()
+        for field in list(layerInfo.get('fields') or []) + list(extraFields):
+            if field['type'] in ('esriFieldTypeGeometry', 'esriFieldTypeBlob', 'esriFieldTypeRaster'):
+                continue
+            name = field['name'][:10]
+            k = 1
+            while name.upper() in used:
+                name = f"{field['name'][:10 - len(str(k)) - 1]}_{k}"
+                k += 1
+            used.add(name.upper())
+            self._addField(name, field)
+            self._fields.append((field['name'], name, field['type']))
+        if prj:
+            with open(os.path.splitext(fileName)[0] + '.prj', 'w') as f:
+                f.write(prj)
+        # dbf 按 utf-8 写入，.cpg 告诉 ArcGIS / QGIS 使用相同的编码读取
+        with open(os.path.splitext(fileName)[0] + '.cpg', 'w') as f:
+            f.write('UTF-8')
+        self.count = 0
+
+    def _addField(self, name, field):
+        fieldType = field['type']
+        if fieldType in ('esriFieldTypeOID', 'esriFieldTypeInteger', 'esriFieldTypeSmallInteger'):
+            self._writer.field(name, 'N', 18, 0)
+        elif fieldType in ('esriFieldTypeDouble', 'esriFieldTypeSingle'):
+            self._writer.field(name, 'N', 19, 8)
+        elif fieldType == 'esriFieldTypeDate':
+            self._writer.field(name, 'D')
+        else:
+            self._writer.field(name, 'C', min(max(field.get('length') or 254, 1), 254))
+
+    @staticmethod
+    def _dbfValue(value, fieldType):
+        if value is None:
+            return None
+        if fieldType == 'esriFieldTypeDate':
+            # esri 日期为 1970 年起的毫秒数（UTC）
+            return (datetime.datetime(1970, 1, 1) + datetime.timedelta(milliseconds=value)).date()
+        return value
+
+    def write(self, feature):
+        geometry = feature.get('geometry')
+        if not geometry:
+            self._writer.null()
+        elif self.geometryType == 'esriGeometryPoint':
+            self._writer.point(geometry['x'], geometry['y'])
+        elif self.geometryType == 'esriGeometryMultipoint':
+            self._writer.multipoint(geometry['points'])
+        elif self.geometryType == 'esriGeometryPolyline':
+            self._writer.line(geometry['paths'])
+        else:
+            self._writer.poly(geometry['rings'])
+        attrs = feature.get('attributes', {})
+        self._writer.record(*[self._dbfValue(attrs.get(src), fieldType) for src, _, fieldType in self._fields])
+        self.count += 1
+
+    def close(self):
+        self._writer.close()
+
+
+def openWriter(outFile, layerInfo, extraFields=(), outSR=None):
+    """
+    usage: 按扩展名选择写出格式，.shp 为 shapefile，其余为 GeoJSON
+    """
+    if outFile.lower().endswith('.shp'):
+        prj = WGS84_PRJ if str(outSR) == '4326' else None
+        return shapefileWriter(outFile, layerInfo, extraFields, prj)
+    return geoJSONWriter(outFile, layerInfo, extraFields)
+
+
+# ************************* 断点 *************************
+
+def _writeJson(fileName, data):
+    tmpFile = fileName + '.tmp'
+    with open(tmpFile, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmpFile, fileName)
+
+
+def _pageFile(checkpointDir, index):
+    return os.path.join(checkpointDir, f'page_{index:06d}.json')
+
+
+def _clearCheckpoint(checkpointDir):
+    # 只删除本模块写入的文件（含未完成的 .tmp），目录中的其他文件保持不动
+    for name in os.listdir(checkpointDir):
+        baseName = name[:-4] if name.endswith('.tmp') else name
+        if baseName == IDS_NAME or fnmatch.fnmatchcase(baseName, PAGE_PATTERN):
+            os.remove(os.path.join(checkpointDir, name))
+
+
+def _loadIds(checkpointDir, task):
+    idsFile = os.path.join(checkpointDir, IDS_NAME)
+    if not os.path.exists(idsFile):
+        return None
+    with open(idsFile, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    # 查询条件改变后重新开始
+    return data if data.get('task') == task else None
+
+
+def _fetchPage(client, index, ids, outFields, outSR, checkpointDir):
+    features = client.queryByIds(ids, outFields, outSR)
+    _writeJson(_pageFile(checkpointDir, index), features)
+    return index, len(features)
+
+
+def harvestLayer(layerUrl, outFile, where='1=1', outFields='*', outSR=4326, pageSize=1000, workers=8,
+                 rateLimit=10, retries=5, token=None, checkpointDir=None, attrFunc=None, extraFields=(),
+                 keepCheckpoint=False):
+    """
+    usage: 并发下载图层全部要素，支持断点续传
+    :param layerUrl: str, 图层地址，如 .../FeatureServer/0
+    :param outFile: str, 输出文件，.shp 为 shapefile，.geojson / .json 为 GeoJSON
+    :param where: str, 查询条件
+    :param outFields: str, 输出字段，逗号分隔
+    :param outSR: 输出坐标系 wkid，为空时使用服务的坐标系（GeoJSON 要求 4326）
+    :param pageSize: int, 每页要素数量，不超过服务的 maxRecordCount
+    :param workers: int, 并发线程数量
+    :param rateLimit: float, 每秒最多请求次数
+    :param retries: int, 每页的最大重试次数
+    :param checkpointDir: str, 断点目录，默认为 '<outFile>.harvest'
+    :param attrFunc: callable, 写出前处理每个要素的属性 dict（原地修改），新增的字段需要在 extraFields 中声明
+    :param extraFields: 追加的字段，如 [{'name': 'height', 'type': 'esriFieldTypeDouble'}]
+    :param keepCheckpoint: bool, 完成后是否保留断点目录
+    :return: 写出的要素数量
+    """
+    client = featureServerClient(layerUrl, token, retries=retries, rateLimit=rateLimit)
+    checkpointDir = checkpointDir or outFile + CHECKPOINT_SUFFIX
+    os.makedirs(checkpointDir, exist_ok=True)
+    if os.listdir(checkpointDir) and not os.path.exists(os.path.join(checkpointDir, IDS_NAME)):
+        # 不是本模块的断点目录，避免误删其中的文件
+        raise featureServerError(f'Checkpoint directory is not empty and has no {IDS_NAME} --- {checkpointDir}')
+
+    info = client.layerInfo()
+    pageSize = min(pageSize, info.get('maxRecordCount') or pageSize)
+    task = {'layer': client.layerUrl, 'where': where, 'outFields': outFields, 'outSR': outSR, 'pageSize': pageSize}
+
+    saved = _loadIds(checkpointDir, task)
+    if saved is None:
+        _clearCheckpoint(checkpointDir)
+        oidField, ids = client.objectIds(where)
+        _writeJson(os.path.join(checkpointDir, IDS_NAME), {'task': task, 'oidField': oidField, 'ids': ids})
+    else:
+        ids = saved['ids']
+    pages = [ids[k:k + pageSize] for k in range(0, len(ids), pageSize)]
+    pending = [i for i in range(len(pages)) if not os.path.exists(_pageFile(checkpointDir, i))]
+    print(f'{len(ids)} features, {len(pages)} pages, {len(pages) - len(pending)} pages done before')
+
+    failed = {}
+    start = time.time()
+    with ThreadPoolExecutor(workers) as executor:
+        futures = {executor.submit(_fetchPage, client, i, pages[i], outFields, outSR, checkpointDir): i
+                   for i in pending}
+        for k, future in enumerate(as_completed(futures), 1):
+            try:
+                future.result()
+            except Exception as e:
+                failed[futures[future]] = str(e)
+                print(f'page {futures[future]} failed --- {e}')
+            if k % 10 == 0 or k == len(futures):
+                print(f'{k} / {len(futures)} pages, {time.time() - start:.1f}s')
+    if failed:
+        # 已完成的页保存在断点目录中，重新运行时只请求失败的页
+        raise featureServerError(f'{len(failed)} pages failed, run again to resume --- {checkpointDir}')
+
+    writer = openWriter(outFile, info, extraFields, outSR)
+    for i in range(len(pages)):
+        with open(_pageFile(checkpointDir, i), 'r', encoding='utf-8') as f:
+            for feature in json.load(f):
+                if attrFunc:
+                    attrFunc(feature.setdefault('attributes', {}))
+                writer.write(feature)
+    writer.close()
+
+    if not keepCheckpoint:
+        _clearCheckpoint(checkpointDir)
+        if not os.listdir(checkpointDir):
+            os.rmdir(checkpointDir)
+    print(f'{writer.count} features -> {outFile}, {time.time() - start:.1f}s')
+    return writer.count